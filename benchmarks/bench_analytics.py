@@ -0,0 +1,71 @@
+"""Time each profitability report over two years of history, cold and cached.
+
+    python benchmarks/bench_analytics.py --scale 1
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+bench_dir = os.path.dirname(os.path.abspath(__file__))
+src_dir = os.path.join(os.path.dirname(bench_dir), "src")
+for path in (bench_dir, src_dir):
+    if path not in sys.path:
+        sys.path.append(path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--scale", type=float, default=1.0, help="see bench_queries.py")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+        from sqlalchemy import func, insert, select
+        from bench_queries import populate
+        from models.base import SessionLocal, init_db
+        from models.models import Job, Roster
+        from utils.analytics import cleaner_utilization, days_to_pay, margins, reports, revenue_by_month
+
+        init_db()
+        db = SessionLocal()
+        try:
+            print("Populating database...")
+            populate(db, args.scale)
+            n_jobs = db.scalar(select(func.count()).select_from(Job))
+            # Roughly two thirds of jobs went through the roster; the rest fall back to cost_rate
+            db.execute(insert(Roster), [{"job_id": i, "cost": 70.0} for i in range(1, n_jobs + 1) if i % 3])
+            db.commit()
+
+            end = date.today()
+            start = end - timedelta(days=730)
+            cases = {
+                "margins by client": lambda: margins(db, start, end, "Client"),
+                "margins by cleaner": lambda: margins(db, start, end, "Cleaner"),
+                "margins by GST type": lambda: margins(db, start, end, "GST Type"),
+                "revenue by month": lambda: revenue_by_month(db, start, end),
+                "cleaner utilization": lambda: cleaner_utilization(db, start, end),
+                "days to pay": lambda: days_to_pay(db, start, end),
+            }
+            print(f"{n_jobs} jobs, {start} to {end}")
+            print(f"{'report':22} {'rows':>6} {'cold ms':>9} {'cached ms':>10}")
+            for name, run in cases.items():
+                cold = []
+                for _ in range(args.repeat):
+                    reports.clear()
+                    started = time.perf_counter()
+                    frame = run()
+                    cold.append(time.perf_counter() - started)
+                started = time.perf_counter()
+                run()
+                cached = time.perf_counter() - started
+                print(f"{name:22} {len(frame):>6} {min(cold) * 1000:>9.1f} {cached * 1000:>10.3f}")
+        finally:
+            db.close()
+
+
+if __name__ == "__main__":
+    main()
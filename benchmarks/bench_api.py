@@ -0,0 +1,183 @@
+"""Load test the REST API: requests/sec and latency percentiles per endpoint.
+
+Builds a SQLite database with bench_queries.populate, starts uvicorn on a
+free local port and hits each scenario from --concurrency keep-alive
+connections for --duration seconds.
+
+    python benchmarks/bench_api.py --scale 0.1 --concurrency 16 --workers 2 --duration 10
+"""
+import argparse
+import http.client
+import json
+import os
+import random
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+bench_dir = os.path.dirname(os.path.abspath(__file__))
+src_dir = os.path.join(os.path.dirname(bench_dir), "src")
+for path in (bench_dir, src_dir):
+    if path not in sys.path:
+        sys.path.append(path)
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def wait_until_listening(port, process, timeout=30.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError("uvicorn exited during startup")
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=0.5).close()
+            return
+        except OSError:
+            time.sleep(0.1)
+    raise RuntimeError("uvicorn did not start listening")
+
+
+def scenarios(token, n_jobs, n_cleaners):
+    auth = {"Authorization": f"Bearer {token}"}
+
+    def get(path_for):
+        return lambda rng, etags: ("GET", path_for(rng), None, auth)
+
+    def conditional(path):
+        def request(rng, etags):
+            return "GET", path, None, {**auth, "If-None-Match": etags.get(path, "")}
+        return request
+
+    def bulk_status(rng, etags):
+        ids = rng.sample(range(1, n_jobs + 1), 100)
+        body = json.dumps({"updates": [{"id": i, "status": rng.choice(["Scheduled", "Completed"])}
+                                       for i in ids]})
+        return "POST", "/jobs/status", body, {**auth, "Content-Type": "application/json"}
+
+    return {
+        "GET /clients": get(lambda rng: "/clients?limit=50"),
+        "GET /jobs?cleaner_id": get(lambda rng: f"/jobs?cleaner_id={rng.randint(1, n_cleaners)}&limit=50"),
+        "GET /jobs/{id}": get(lambda rng: f"/jobs/{rng.randint(1, n_jobs)}"),
+        "GET /rosters": get(lambda rng: "/rosters?limit=50"),
+        "GET /invoices (304)": conditional("/invoices?status=Pending&limit=50"),
+        "POST /jobs/status x100": bulk_status,
+    }
+
+
+def run_scenario(port, make_request, concurrency, duration, etags):
+    latencies, errors = [], []
+    lock = threading.Lock()
+    stop = time.monotonic() + duration
+
+    def client(seed):
+        rng = random.Random(seed)
+        conn = http.client.HTTPConnection("127.0.0.1", port)
+        local, failed = [], 0
+        while time.monotonic() < stop:
+            method, path, body, headers = make_request(rng, etags)
+            start = time.perf_counter()
+            conn.request(method, path, body=body, headers=headers)
+            response = conn.getresponse()
+            response.read()
+            local.append(time.perf_counter() - start)
+            if response.status >= 400:
+                failed += 1
+        conn.close()
+        with lock:
+            latencies.extend(local)
+            errors.append(failed)
+
+    threads = [threading.Thread(target=client, args=(i,)) for i in range(concurrency)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    percentiles = statistics.quantiles(latencies, n=100) if len(latencies) > 1 else latencies * 99
+    return {
+        "requests": len(latencies),
+        "errors": sum(errors),
+        "rps": len(latencies) / elapsed,
+        "p50_ms": percentiles[49] * 1000,
+        "p99_ms": percentiles[98] * 1000,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--scale", type=float, default=0.1, help="see bench_queries.py")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--workers", type=int, default=2, help="uvicorn worker processes")
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds per scenario")
+    parser.add_argument("--output", help="Also write the results as JSON")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+        os.environ.setdefault("JWT_SECRET_KEY", "bench-secret")
+
+        from sqlalchemy import func, insert, select
+        from bench_queries import populate
+        from models.base import SessionLocal, init_db
+        from models.models import Cleaner, Job, Roster
+        from routes.auth import create_access_token
+
+        init_db()
+        db = SessionLocal()
+        try:
+            print("Populating database...")
+            populate(db, args.scale)
+            n_jobs = db.scalar(select(func.count()).select_from(Job))
+            n_cleaners = db.scalar(select(func.count()).select_from(Cleaner))
+            db.execute(insert(Roster), [{"job_id": i, "cost": 70.0} for i in range(1, n_jobs + 1, 10)])
+            db.commit()
+        finally:
+            db.close()
+
+        port = free_port()
+        server = subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "api:app", "--app-dir", src_dir, "--port", str(port),
+             "--workers", str(args.workers), "--no-access-log", "--log-level", "warning"],
+            env=dict(os.environ),
+        )
+        try:
+            wait_until_listening(port, server)
+            token = create_access_token("bench", expires_minutes=60)
+
+            # Prime the ETag the conditional scenario sends back
+            conn = http.client.HTTPConnection("127.0.0.1", port)
+            conn.request("GET", "/invoices?status=Pending&limit=50", headers={"Authorization": f"Bearer {token}"})
+            response = conn.getresponse()
+            response.read()
+            etags = {"/invoices?status=Pending&limit=50": response.getheader("ETag")}
+            conn.close()
+
+            results = {}
+            print(f"{'scenario':26} {'requests':>9} {'errors':>7} {'req/s':>8} {'p50 ms':>8} {'p99 ms':>8}")
+            for name, make_request in scenarios(token, n_jobs, n_cleaners).items():
+                result = run_scenario(port, make_request, args.concurrency, args.duration, etags)
+                results[name] = result
+                print(f"{name:26} {result['requests']:>9} {result['errors']:>7} {result['rps']:>8.1f} "
+                      f"{result['p50_ms']:>8.1f} {result['p99_ms']:>8.1f}")
+        finally:
+            server.terminate()
+            server.wait(timeout=30)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"scale": args.scale, "concurrency": args.concurrency, "workers": args.workers,
+                       "results": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""Time the booking index and the conflict audit over a quarter of jobs.
+
+    python benchmarks/bench_bookings.py --cleaners 500 --jobs 150000
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import date, datetime, timedelta
+
+bench_dir = os.path.dirname(os.path.abspath(__file__))
+src_dir = os.path.join(os.path.dirname(bench_dir), "src")
+for path in (bench_dir, src_dir):
+    if path not in sys.path:
+        sys.path.append(path)
+
+
+def timed(run, repeat=1):
+    started = time.perf_counter()
+    for _ in range(repeat):
+        value = run()
+    return value, (time.perf_counter() - started) / repeat
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--clients", type=int, default=5000)
+    parser.add_argument("--cleaners", type=int, default=500)
+    parser.add_argument("--jobs", type=int, default=150_000, help="spread over the next 91 days")
+    parser.add_argument("--lookups", type=int, default=10_000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+        from sqlalchemy import select, update
+        from generate_data import generate
+        from models.base import SessionLocal, init_db
+        from models.models import Job
+        from utils.bookings import BookingIndex, audit_conflicts
+
+        init_db()
+        db = SessionLocal()
+        try:
+            print("Populating database...")
+            # Every job within the next quarter is rostered, at a random hour
+            generate(db, clients=args.clients, cleaners=args.cleaners, jobs=args.jobs, messages=0,
+                     history_days=0, horizon_days=91, rostered_days=91)
+            today = date.today()
+            start = datetime.combine(today, datetime.min.time())
+
+            index = BookingIndex(since=start)
+            _, elapsed = timed(lambda: index.refresh(db, force=True))
+            print(f"build index over {args.jobs} jobs:    {elapsed * 1000:8.1f} ms")
+
+            rng = random.Random(3)
+            slots = [(rng.randint(1, args.cleaners), start + timedelta(days=rng.randrange(91), hours=rng.randint(8, 16)))
+                     for _ in range(args.lookups)]
+            _, elapsed = timed(lambda: [index.is_free(c, s, s + timedelta(hours=2)) for c, s in slots])
+            print(f"is_free:                          {elapsed / args.lookups * 1e6:8.1f} us per lookup")
+            free, elapsed = timed(lambda: [index.free_cleaners(s, s + timedelta(hours=2)) for _, s in slots[:1000]])
+            print(f"free_cleaners ({args.cleaners} cleaners):     {elapsed:8.3f} ms per slot "
+                  f"(avg {sum(map(len, free)) / len(free):.0f} free)")
+
+            conflicts, elapsed = timed(lambda: audit_conflicts(db, today, today + timedelta(days=91)))
+            print(f"audit a quarter:                  {elapsed * 1000:8.1f} ms -> {len(conflicts)} conflicts")
+
+            # Move a week's jobs to another cleaner, as a roster edit would
+            moved = db.execute(select(Job.id).where(Job.start_at >= start + timedelta(days=7),
+                                                    Job.start_at < start + timedelta(days=14))).scalars().all()
+            db.execute(update(Job), [{"id": job_id, "cleaner_id": job_id % args.cleaners + 1} for job_id in moved])
+            db.commit()
+            _, elapsed = timed(lambda: index.refresh(db))
+            print(f"refresh after moving {len(moved)} jobs:   {elapsed * 1000:8.1f} ms")
+        finally:
+            db.close()
+
+
+if __name__ == "__main__":
+    main()
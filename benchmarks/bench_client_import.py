@@ -0,0 +1,67 @@
+"""Time a bulk client CSV import into a fresh SQLite database, then re-importing it as updates.
+
+    python benchmarks/bench_client_import.py --rows 50000
+"""
+import argparse
+import io
+import os
+import random
+import sys
+import tempfile
+import time
+
+bench_dir = os.path.dirname(os.path.abspath(__file__))
+src_dir = os.path.join(os.path.dirname(bench_dir), "src")
+if src_dir not in sys.path:
+    sys.path.append(src_dir)
+
+import pandas as pd
+
+
+def make_csv(rows, seed=5):
+    """Client CSV in the import format with ~2% invalid rows and ~1% repeated numbers"""
+    rng = random.Random(seed)
+    records = []
+    for i in range(rows):
+        phone = f"04{i:08d}" if rng.random() > 0.01 else f"04{rng.randrange(max(i, 1)):08d}"
+        if rng.random() < 0.02:
+            phone = rng.choice(["", "12345", "not a number"])
+        records.append({
+            "Client Name": f"Client {i}",
+            "Phone Number": phone,
+            "Address": f"{i} Example St",
+            "Frequency": rng.choice(["Weekly", "fortnightly", "Monthly", "3-Monthly"]),
+            "GST Type": rng.choice(["NDIS", "Aged Care", "RESIDENTIAL", "corporate"]),
+            "Payment Mode": rng.choice(["Cash", "Bank Transfer", "NDIS_PORTAL", "CARD_PAYMENT"]),
+            "Rate": f"{rng.randint(80, 250)}",
+        })
+    return pd.DataFrame(records).to_csv(index=False)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=50_000)
+    args = parser.parse_args()
+
+    csv = make_csv(args.rows)
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+        from models.base import SessionLocal, init_db
+        from utils.client_import import import_clients
+
+        init_db()
+        db = SessionLocal()
+        try:
+            for label in ("insert", "update"):
+                start = time.perf_counter()
+                result = import_clients(db, io.StringIO(csv))
+                elapsed = time.perf_counter() - start
+                print(f"{label}: {result.total_rows} rows in {elapsed:.2f}s -> {result.inserted} inserted, "
+                      f"{result.updated} updated, {len(result.errors)} rejected "
+                      f"({result.duplicates} duplicate numbers)")
+        finally:
+            db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""Compare the per-row send loop with BulkDispatcher against a fake Twilio server.
+
+    python benchmarks/bench_dispatch.py --messages 500 --latency 0.05 --rate 100
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+bench_dir = os.path.dirname(os.path.abspath(__file__))
+src_dir = os.path.join(os.path.dirname(bench_dir), "src")
+for path in (bench_dir, src_dir):
+    if path not in sys.path:
+        sys.path.append(path)
+
+from fake_twilio import FakeTwilioServer
+
+
+def configure(server_url, db_path):
+    os.environ["DATABASE_URL"] = f"sqlite:///{db_path}"
+    os.environ["TWILIO_API_BASE_URL"] = server_url
+    os.environ.setdefault("TWILIO_ACCOUNT_SID", "AC" + "0" * 32)
+    os.environ.setdefault("TWILIO_AUTH_TOKEN", "fake-token")
+    os.environ.setdefault("TWILIO_PHONE_NUMBER", "+61400000000")
+
+
+def make_messages(n):
+    from utils.dispatch import OutgoingMessage
+    return [OutgoingMessage(phone=f"+6141{i:07d}", body=f"Hi client {i}", client_name=f"Client {i}")
+            for i in range(n)]
+
+
+def run_sequential(service, db, messages):
+    from models.models import MessageHistory
+    from datetime import datetime
+    start = time.perf_counter()
+    for m in messages:
+        result = service.send_message(m.phone, m.body)
+        db.add(MessageHistory(
+            client_name=m.client_name, phone_number=m.phone, message=m.body,
+            status="success" if result["success"] else "failed",
+            error=result.get("error"),
+            sent_at=datetime.utcnow() if result["success"] else None,
+        ))
+        db.commit()
+    return time.perf_counter() - start
+
+
+def run_bulk(service, db, messages, rate, workers):
+    from utils.dispatch import BulkDispatcher, HistoryWriter
+    dispatcher = BulkDispatcher(service, rate=rate, workers=workers, backoff=0.05)
+    summary = dispatcher.dispatch(messages, on_batch=HistoryWriter(db))
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--messages", type=int, default=500)
+    parser.add_argument("--latency", type=float, default=0.05)
+    parser.add_argument("--error-rate", type=float, default=0.02)
+    parser.add_argument("--rate", type=float, default=100.0, help="token bucket msgs/sec")
+    parser.add_argument("--workers", type=int, default=16)
+    args = parser.parse_args()
+
+    with FakeTwilioServer(latency=args.latency, error_rate=args.error_rate) as server, \
+            tempfile.TemporaryDirectory() as tmp:
+        configure(server.url, os.path.join(tmp, "bench.db"))
+        from models.base import SessionLocal, init_db
+        from utils.messaging import MessageService
+
+        init_db()
+
+        service = MessageService()
+        db = SessionLocal()
+        messages = make_messages(args.messages)
+        try:
+            seq = run_sequential(service, db, messages)
+            print(f"sequential: {args.messages} msgs in {seq:.2f}s ({args.messages / seq:.1f} msgs/sec)")
+            summary = run_bulk(service, db, messages, args.rate, args.workers)
+            print(f"bulk:       {summary.done} msgs in {summary.elapsed:.2f}s ({summary.rate:.1f} msgs/sec, "
+                  f"{summary.failed} failed after retries)")
+        finally:
+            db.close()
+
+
+if __name__ == "__main__":
+    main()
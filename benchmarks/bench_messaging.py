@@ -0,0 +1,83 @@
+"""Per-message Twilio API latency: cold clients vs the shared pooled MessageService.
+
+Sends the same messages against the fake Twilio server three ways:
+
+* ``cold``    - a new MessageService for every message (a fresh connection
+  and handshake each time, as when the app built one per rerun);
+* ``default`` - one service using the Twilio SDK's default HTTP client;
+* ``pooled``  - the process-wide service from get_message_service().
+
+The last two send from ``--workers`` threads, like BulkDispatcher does.
+The fake server's ``--handshake-latency`` stands in for the TLS handshake
+that the real API costs on every new connection.
+
+    python benchmarks/bench_messaging.py --messages 1000 --workers 16 --handshake-latency 0.03
+"""
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+bench_dir = os.path.dirname(os.path.abspath(__file__))
+src_dir = os.path.join(os.path.dirname(bench_dir), "src")
+for path in (bench_dir, src_dir):
+    if path not in sys.path:
+        sys.path.append(path)
+
+from fake_twilio import FakeTwilioServer
+from bench_dispatch import configure
+
+
+def send_all(service_for, n, workers):
+    def send(i):
+        service_for(i).send_message(f"+6141{i:07d}", f"Hi client {i}")
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        list(pool.map(send, range(n)))
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--messages", type=int, default=1000)
+    parser.add_argument("--workers", type=int, default=16)
+    parser.add_argument("--latency", type=float, default=0.02, help="server time per request")
+    parser.add_argument("--handshake-latency", type=float, default=0.03, help="server time per new connection")
+    args = parser.parse_args()
+
+    with FakeTwilioServer(latency=args.latency, handshake_latency=args.handshake_latency) as server:
+        configure(server.url, os.devnull)
+        from twilio.rest import Client
+        from utils.messaging import LatencyHistogram, MessageService, get_message_service
+
+        default = MessageService()
+        default.client = Client(default.account_sid, default.auth_token)
+        default.client.api.base_url = server.url
+        cold_latency = LatencyHistogram()
+
+        def cold(i):
+            service = MessageService()
+            service.latency = cold_latency
+            return service
+
+        runs = [
+            ("cold", cold, 1, cold_latency),
+            ("default", lambda i: default, args.workers, default.latency),
+            ("pooled", lambda i: get_message_service(), args.workers, get_message_service().latency),
+        ]
+        print(f"{'client':10} {'workers':>7} {'msgs/sec':>9} {'mean ms':>8} {'p50 ms':>7} {'p95 ms':>7} "
+              f"{'connections':>11}")
+        for name, service_for, workers, histogram in runs:
+            n = min(args.messages, 200) if name == "cold" else args.messages
+            connections = server.connections
+            elapsed = send_all(service_for, n, workers)
+            snap = histogram.snapshot()
+            print(f"{name:10} {workers:>7} {n / elapsed:>9.1f} {snap['sum'] / snap['count'] * 1000:>8.1f} "
+                  f"{histogram.percentile(50) * 1000:>7.1f} {histogram.percentile(95) * 1000:>7.1f} "
+                  f"{server.connections - connections:>11}")
+
+
+if __name__ == "__main__":
+    main()
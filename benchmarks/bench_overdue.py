@@ -0,0 +1,77 @@
+"""Time the overdue sweep against a large invoice table with few newly due invoices.
+
+Each round raises --per-day invoices a day for --days days, then sweeps. The
+sweep time should track the invoices that fell due, not the table size.
+
+    python benchmarks/bench_overdue.py --invoices 500000 --per-day 300 --days 5
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+bench_dir = os.path.dirname(os.path.abspath(__file__))
+src_dir = os.path.join(os.path.dirname(bench_dir), "src")
+if src_dir not in sys.path:
+    sys.path.append(src_dir)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--invoices", type=int, default=500_000, help="historical, already settled invoices")
+    parser.add_argument("--per-day", type=int, default=300)
+    parser.add_argument("--days", type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+        from sqlalchemy import func, insert, select
+        from models.base import SessionLocal, init_db
+        from models.models import Client, Invoice, Job, MessageHistory
+        from utils.overdue import PAYMENT_TERMS_DAYS, sweep_overdue
+
+        init_db()
+        db = SessionLocal()
+        try:
+            start = datetime.utcnow() - timedelta(days=3 * 365)
+            n_clients = 5000
+            db.execute(insert(Client), [{"name": f"Client {i}", "contact": f"04{i:08d}"}
+                                        for i in range(n_clients)])
+            total = args.invoices + args.per_day * (args.days + PAYMENT_TERMS_DAYS)
+            db.execute(insert(Job), [{"client_id": i % n_clients + 1, "status": "Completed"}
+                                     for i in range(total)])
+            db.execute(insert(Invoice), [{
+                "job_id": i + 1, "amount": 120.0, "gst": 12.0, "status": "Paid" if i % 10 else "Overdue",
+                "created_at": start + timedelta(seconds=i * 60),
+            } for i in range(args.invoices)])
+            db.commit()
+
+            # Raise invoices day by day from one payment term before the first sweep
+            today = datetime.utcnow()
+            first_day = today - timedelta(days=PAYMENT_TERMS_DAYS)
+            next_job = args.invoices + 1
+            for day in range(args.days + PAYMENT_TERMS_DAYS):
+                raised = first_day + timedelta(days=day)
+                db.execute(insert(Invoice), [{
+                    "job_id": next_job + i, "amount": 120.0, "gst": 12.0, "status": "Pending",
+                    "created_at": raised + timedelta(seconds=i),
+                } for i in range(args.per_day)])
+                next_job += args.per_day
+            db.commit()
+
+            print(f"{db.scalar(select(func.count()).select_from(Invoice))} invoices")
+            for day in range(args.days + 1):
+                started = time.perf_counter()
+                result = sweep_overdue(db, now=today + timedelta(days=day))
+                elapsed = time.perf_counter() - started
+                print(f"day {day}: {result.overdue:>5} newly overdue, {result.reminders:>5} reminders "
+                      f"in {elapsed * 1000:8.1f} ms")
+            print(f"{db.scalar(select(func.count()).select_from(MessageHistory))} reminders queued in total")
+        finally:
+            db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,222 @@
+"""Record EXPLAIN plans and latencies of each page's queries before and after the hot-query indexes.
+
+Builds a SQLite database (or uses --database-url), drops the indexes added
+by migration 2, measures every page's data path, recreates the indexes and
+measures again. Results are printed and written as JSON.
+
+A SQLite --database-url is copied first, and only the copy loses its
+indexes. Any other database is changed in place. While the indexes are gone
+it has no unique ix_invoices_job_id, so nothing stops a job being invoiced
+twice. It is therefore refused unless --i-know-this-drops-indexes is given.
+
+    python benchmarks/bench_queries.py --scale 1 --output bench_queries.json
+"""
+import argparse
+import json
+import os
+import random
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+bench_dir = os.path.dirname(os.path.abspath(__file__))
+src_dir = os.path.join(os.path.dirname(bench_dir), "src")
+if src_dir not in sys.path:
+    sys.path.append(src_dir)
+
+
+def populate(db, scale, seed=11):
+    from sqlalchemy import insert
+    from models.models import (Cleaner, Client, EmploymentType, GSTType, Invoice, Job,
+                               MessageHistory, Payment, PaymentMode)
+
+    rng = random.Random(seed)
+    now = datetime.now()
+    n_clients, n_cleaners = int(10_000 * scale), int(200 * scale) or 1
+    n_jobs, n_messages = int(200_000 * scale), int(300_000 * scale)
+
+    db.execute(insert(Client), [{
+        "name": f"Client {i}", "contact": f"+6141{i:07d}", "frequency": "Weekly", "rate": 120.0,
+        "gst_type": rng.choice(list(GSTType)), "payment_mode": rng.choice(list(PaymentMode)),
+    } for i in range(n_clients)])
+    db.execute(insert(Cleaner), [{
+        "name": f"Cleaner {i}", "cost_rate": 35.0, "employment_type": EmploymentType.EMPLOYEE,
+        "availability": "Monday,Tuesday,Wednesday,Thursday,Friday",
+    } for i in range(n_cleaners)])
+
+    jobs = []
+    for i in range(n_jobs):
+        day = now + timedelta(days=rng.randint(-700, 84), hours=rng.randint(8, 16))
+        jobs.append({
+            "client_id": rng.randint(1, n_clients), "cleaner_id": rng.randint(1, n_cleaners),
+            "date": day, "time": day.strftime("%H:%M"),
+            "status": "Completed" if day < now else "Scheduled",
+        })
+    db.execute(insert(Job), jobs)
+
+    invoices = [{
+        "job_id": i + 1, "amount": 120.0, "gst": 12.0,
+        "status": "Paid" if job["date"] < now - timedelta(days=30) else rng.choice(["Pending", "Overdue"]),
+        "created_at": job["date"],
+    } for i, job in enumerate(jobs) if job["status"] == "Completed" and rng.random() < 0.95]
+    db.execute(insert(Invoice), invoices)
+    db.execute(insert(Payment), [{
+        "invoice_id": i + 1, "mode": PaymentMode.BANK_TRANSFER, "amount": 132.0,
+        "payment_date": inv["created_at"] + timedelta(days=10),
+    } for i, inv in enumerate(invoices) if inv["status"] == "Paid"])
+
+    db.execute(insert(MessageHistory), [{
+        "client_name": f"Client {i % n_clients}", "phone_number": f"+6141{i % n_clients:07d}",
+        "message": "Reminder: your clean is tomorrow",
+        "status": rng.choices(["success", "failed", "scheduled"], weights=[90, 5, 5])[0],
+        "created_at": now - timedelta(minutes=i),
+        "scheduled_for": now + timedelta(minutes=i) if i % 20 == 0 else None,
+    } for i in range(n_messages)])
+    db.commit()
+
+
+def page_queries(db, session_factory):
+    from utils.dashboard import (active_clients, aggregates, jobs_this_week, outstanding_by_gst_type,
+                                 recent_invoices, team_size, upcoming_jobs)
+    from utils.invoicing import count_uninvoiced_jobs
+    from utils.queries import cleaner_page, client_page, invoice_page, message_history_page
+    from utils.roster import next_week_start, week_roster
+    from utils.scheduler import ScheduledMessageWorker
+
+    now = datetime.now()
+    worker = ScheduledMessageWorker(session_factory, None)
+
+    def dashboard():
+        aggregates.clear()
+        active_clients(db, now)
+        team_size(db)
+        jobs_this_week(db, now)
+        outstanding_by_gst_type(db)
+        upcoming_jobs(db, now)
+        recent_invoices(db)
+
+    return {
+        "dashboard": dashboard,
+        "clients": lambda: client_page(db),
+        "team": lambda: cleaner_page(db),
+        "invoices_pending": lambda: invoice_page(db, status="Pending"),
+        "message_history": lambda: message_history_page(db),
+        "message_history_failed_last_week": lambda: message_history_page(
+            db, status="failed", start=(now - timedelta(days=7)).date()),
+        "roster_next_week": lambda: week_roster(db, next_week_start()),
+        "uninvoiced_jobs": lambda: count_uninvoiced_jobs(db),
+        "scheduler_next_due": lambda: worker.next_due(db),
+    }
+
+
+def measure(engine, db, queries, repeat):
+    from sqlalchemy import event
+
+    captured = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        captured.append((statement, parameters))
+
+    explain = "EXPLAIN QUERY PLAN " if engine.dialect.name == "sqlite" else "EXPLAIN "
+    results = {}
+    for name, run in queries.items():
+        event.listen(engine, "before_cursor_execute", capture)
+        run()
+        event.remove(engine, "before_cursor_execute", capture)
+        statements, captured[:] = list(captured), []
+
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            run()
+            timings.append((time.perf_counter() - start) * 1000)
+
+        plans = []
+        with engine.connect() as conn:
+            for statement, parameters in statements:
+                rows = conn.exec_driver_sql(explain + statement, parameters).all()
+                plans.append({"sql": " ".join(statement.split()),
+                              "plan": [" | ".join(str(v) for v in row) for row in rows]})
+        results[name] = {"median_ms": round(statistics.median(timings), 3),
+                         "queries": len(statements), "plans": plans}
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--scale", type=float, default=1.0, help="1.0 = 10k clients, 200k jobs, 300k messages")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--database-url", help="Benchmark an existing, populated database instead")
+    parser.add_argument("--output", default="bench_queries.json")
+    parser.add_argument("--i-know-this-drops-indexes", action="store_true", dest="drop_in_place",
+                        help="allow a non-SQLite --database-url, whose indexes are dropped while measuring")
+    args = parser.parse_args()
+
+    from sqlalchemy.engine import make_url
+
+    tmp = tempfile.TemporaryDirectory()
+    generate = not args.database_url
+    if generate:
+        os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tmp.name, 'bench.db')}"
+    elif make_url(args.database_url).get_backend_name() == "sqlite":
+        source = make_url(args.database_url).database
+        if not source or source == ":memory:" or not os.path.exists(source):
+            parser.error(f"no SQLite database file at {args.database_url}")
+        copy = os.path.join(tmp.name, "bench.db")
+        print(f"Copying {source}; its indexes are left alone...")
+        with sqlite3.connect(source) as src, sqlite3.connect(copy) as dst:
+            src.backup(dst)
+        os.environ["DATABASE_URL"] = f"sqlite:///{copy}"
+    elif args.drop_in_place:
+        os.environ["DATABASE_URL"] = args.database_url
+    else:
+        parser.error("this drops the hot-query indexes, including the unique ix_invoices_job_id, of the "
+                     "database it is given; pass --i-know-this-drops-indexes to run on a copy you can spare")
+
+    from sqlalchemy import text
+    from models.base import SessionLocal, engine, init_db
+    from models.migrations import HOT_QUERY_INDEXES, create_indexes
+
+    if generate:
+        init_db()
+
+    db = SessionLocal()
+    try:
+        if generate:
+            print("Populating database...")
+            populate(db, args.scale)
+        queries = page_queries(db, SessionLocal)
+
+        with engine.begin() as conn:
+            for name in HOT_QUERY_INDEXES:
+                conn.execute(text(f"DROP INDEX IF EXISTS {name}"))
+            conn.execute(text("ANALYZE"))
+        try:
+            before = measure(engine, db, queries, args.repeat)
+        finally:
+            # Put the indexes back even if measuring failed
+            db.rollback()
+            with engine.begin() as conn:
+                create_indexes(conn, HOT_QUERY_INDEXES)
+                conn.execute(text("ANALYZE"))
+        after = measure(engine, db, queries, args.repeat)
+    finally:
+        db.close()
+        engine.dispose()
+        tmp.cleanup()
+
+    print(f"{'page':36} {'before ms':>10} {'after ms':>10}")
+    for name in queries:
+        print(f"{name:36} {before[name]['median_ms']:>10.2f} {after[name]['median_ms']:>10.2f}")
+
+    with open(args.output, "w") as f:
+        json.dump({"database": engine.dialect.name, "scale": args.scale,
+                   "before": before, "after": after}, f, indent=2, default=str)
+    print(f"Plans and timings written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""Time reconciling a month of bank statement lines against open invoices.
+
+    python benchmarks/bench_reconciliation.py --invoices 20000 --lines 12000
+"""
+import argparse
+import io
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+bench_dir = os.path.dirname(os.path.abspath(__file__))
+src_dir = os.path.join(os.path.dirname(bench_dir), "src")
+if src_dir not in sys.path:
+    sys.path.append(src_dir)
+
+import pandas as pd
+
+
+def make_statement(n_invoices, lines, seed=7):
+    """Statement CSV: ~80% transfers quoting an invoice, the rest wrong amounts,
+    missing references and debits"""
+    rng = random.Random(seed)
+    start = datetime(2025, 7, 1)
+    invoice_ids = rng.sample(range(1, n_invoices + 1), min(lines, n_invoices))
+    records = []
+    for i in range(lines):
+        day = (start + timedelta(days=rng.randrange(30))).strftime("%d/%m/%Y")
+        invoice_id = invoice_ids[i % len(invoice_ids)]
+        kind = rng.random()
+        if kind < 0.8:
+            reference, amount = rng.choice(["INV-{}", "inv {}", "Invoice #{}", "{} #{}"]), "132.00"
+            reference = reference.format(f"Client {invoice_id}", invoice_id) if "{} #" in reference \
+                else reference.format(invoice_id)
+        elif kind < 0.85:
+            reference, amount = f"INV-{invoice_id}", "120.00"
+        elif kind < 0.9:
+            reference, amount = f"Transfer from Client {invoice_id}", "132.00"
+        else:
+            reference, amount = "Card purchase", f"-{rng.randint(5, 300)}.00"
+        records.append({"Date": day, "Description": reference, "Amount": amount})
+    return pd.DataFrame(records).to_csv(index=False)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--invoices", type=int, default=20_000)
+    parser.add_argument("--lines", type=int, default=12_000)
+    args = parser.parse_args()
+
+    csv = make_statement(args.invoices, args.lines)
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+        from sqlalchemy import insert
+        from models.base import SessionLocal, init_db
+        from models.models import Invoice
+        from utils.reconciliation import reconcile_statement
+
+        init_db()
+        db = SessionLocal()
+        try:
+            db.execute(insert(Invoice), [{"job_id": i, "amount": 120.0, "gst": 12.0, "status": "Pending"}
+                                         for i in range(1, args.invoices + 1)])
+            db.commit()
+
+            for label in ("first upload", "re-upload"):
+                start = time.perf_counter()
+                result = reconcile_statement(db, io.StringIO(csv))
+                elapsed = time.perf_counter() - start
+                print(f"{label}: {result.total_lines} lines against {args.invoices} invoices in {elapsed:.2f}s "
+                      f"-> {result.matched} matched (${result.amount:,.2f}), {len(result.unmatched)} to review, "
+                      f"{result.debits} debits")
+        finally:
+            db.close()
+
+
+if __name__ == "__main__":
+    main()
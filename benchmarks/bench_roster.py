@@ -0,0 +1,109 @@
+"""Time next week's roster generation on a generated SQLite database.
+
+Every tenth cleaner already has a mid-morning job next week, on the first day
+they work. The roster is then audited with audit_conflicts, and the script
+exits with status 1 if any new job overlaps another job of its cleaner.
+
+    python benchmarks/bench_roster.py --clients 2000 --cleaners 200
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+bench_dir = os.path.dirname(os.path.abspath(__file__))
+src_dir = os.path.join(os.path.dirname(bench_dir), "src")
+if src_dir not in sys.path:
+    sys.path.append(src_dir)
+
+WEEKDAYS = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
+
+
+def populate(db, clients, cleaners, seed=7):
+    from sqlalchemy import insert
+    from models.models import Cleaner, Client, EmploymentType, GSTType, Job, PaymentMode
+
+    rng = random.Random(seed)
+    db.execute(insert(Cleaner), [{
+        "name": f"Cleaner {i}",
+        "cost_rate": round(rng.uniform(28, 45), 2),
+        "employment_type": rng.choice(list(EmploymentType)),
+        "availability": ",".join(rng.sample(WEEKDAYS[:6], rng.randint(3, 6))),
+    } for i in range(cleaners)])
+    client_ids = db.execute(insert(Client).returning(Client.id, sort_by_parameter_order=True), [{
+        "name": f"Client {i}",
+        "contact": f"+6141{i:07d}",
+        # Weekly clients are due every week, so most of the book needs a clean
+        "frequency": rng.choices(["Weekly", "Fortnightly", "Monthly"], weights=[70, 20, 10])[0],
+        "gst_type": rng.choice(list(GSTType)),
+        "payment_mode": rng.choice(list(PaymentMode)),
+    } for i in range(clients)]).scalars().all()
+    # Previous cleans set each client's usual weekday
+    last_week = datetime.now() - timedelta(days=7)
+    db.execute(insert(Job), [{
+        "client_id": cid,
+        "date": last_week + timedelta(days=rng.randrange(6)),
+        "status": "Completed",
+    } for cid in client_ids])
+    db.commit()
+
+
+def prebook(db, week_start, every=10):
+    """A 10:00 job on the first working day of every ``every``-th cleaner"""
+    from sqlalchemy import insert, select
+    from models.models import Cleaner, Job
+
+    cleaners = db.execute(select(Cleaner.id, Cleaner.availability).order_by(Cleaner.id)).all()[::every]
+    rows = []
+    for cleaner_id, availability in cleaners:
+        day = min(WEEKDAYS.index(d) for d in availability.split(","))
+        start = datetime.combine(week_start, datetime.min.time()) + timedelta(days=day, hours=10)
+        rows.append({"cleaner_id": cleaner_id, "date": start, "time": "10:00", "start_at": start,
+                     "end_at": start + timedelta(hours=2), "status": "Scheduled"})
+    db.execute(insert(Job), rows)
+    db.commit()
+    return len(rows)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--clients", type=int, default=2000)
+    parser.add_argument("--cleaners", type=int, default=200)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+        from models.base import SessionLocal, init_db
+        from utils.bookings import audit_conflicts
+        from utils.roster import generate_roster, next_week_start
+
+        init_db()
+
+        db = SessionLocal()
+        try:
+            populate(db, args.clients, args.cleaners)
+            week_start = next_week_start()
+            prebooked = prebook(db, week_start)
+            start = time.perf_counter()
+            result = generate_roster(db, week_start)
+            elapsed = time.perf_counter() - start
+            conflicts = audit_conflicts(db, week_start, week_start + timedelta(days=6))
+        finally:
+            db.close()
+
+    overlaps = conflicts[conflicts["Conflict"].str.contains("Overlaps")]
+    print(f"clients: {args.clients}, cleaners: {args.cleaners}, {prebooked} jobs already booked")
+    print(f"assigned {result.assigned} jobs ({result.created} new), "
+          f"{len(result.unassigned)} unassigned, cost ${result.total_cost:,.2f}")
+    print(f"generate_roster: {elapsed:.2f}s")
+    print(f"overlapping jobs: {len(overlaps)}")
+    if len(overlaps):
+        print(overlaps.head(10).to_string(index=False))
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""Time geocoding clients and sequencing a full week's roster to minimise travel.
+
+Generates two weeks of history so clients have a usual weekday, rosters
+next week with generate_roster, locates clients from a postcode centroid
+file, then sequences every cleaner's days, in one process and across a
+process pool.
+
+    python benchmarks/bench_sequencing.py --clients 4000 --cleaners 200
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+bench_dir = os.path.dirname(os.path.abspath(__file__))
+src_dir = os.path.join(os.path.dirname(bench_dir), "src")
+for path in (bench_dir, src_dir):
+    if path not in sys.path:
+        sys.path.append(path)
+
+from generate_data import SUBURBS
+
+
+def write_centroids(path):
+    with open(path, "w") as f:
+        f.write("postcode,locality,state,lat,long\n")
+        for suburb, postcode, latitude, longitude in SUBURBS:
+            f.write(f"{postcode},{suburb.upper()},NSW,{latitude},{longitude}\n")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--clients", type=int, default=4000)
+    parser.add_argument("--cleaners", type=int, default=200)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+        import pandas as pd
+        from sqlalchemy import select
+        from generate_data import generate
+        from models.base import SessionLocal, init_db
+        from models.models import Client, Job
+        from utils.geocoding import geocode_clients, read_centroids
+        from utils.roster import generate_roster, next_week_start
+        from utils.sequencing import sequence_routes, sequence_week
+
+        init_db()
+        db = SessionLocal()
+        try:
+            print("Populating database...")
+            generate(db, clients=args.clients, cleaners=args.cleaners, jobs=args.clients * 2, messages=0,
+                     history_days=14, horizon_days=0)
+            week_start = next_week_start()
+            roster = generate_roster(db, week_start)
+            print(f"clients: {args.clients}, cleaners: {args.cleaners}, next week: {roster.assigned} jobs")
+
+            centroids_path = os.path.join(tmp, "postcodes.csv")
+            write_centroids(centroids_path)
+            started = time.perf_counter()
+            located = geocode_clients(db, read_centroids(centroids_path))
+            print(f"geocode: {located.located} of {located.clients} clients located "
+                  f"in {time.perf_counter() - started:.2f}s")
+
+            # The sequencing alone, without the database, in one process and in a pool
+            result = db.execute(
+                select(Job.cleaner_id, Job.start_at, Client.latitude, Client.longitude).join(Job.client)
+                .where(Job.start_at >= week_start, Job.cleaner_id.is_not(None))
+            )
+            jobs = pd.DataFrame(result.all(), columns=list(result.keys())).sort_values(["cleaner_id", "start_at"])
+            routes = [(day["latitude"].to_numpy(), day["longitude"].to_numpy())
+                      for _, day in jobs.groupby(["cleaner_id", jobs["start_at"].dt.date]) if len(day) >= 3]
+            for workers in sorted({1, args.workers}):
+                started = time.perf_counter()
+                sequence_routes(routes, workers=workers)
+                print(f"sequence {len(routes)} cleaner-days, {workers} process(es): "
+                      f"{time.perf_counter() - started:.2f}s")
+
+            started = time.perf_counter()
+            result = sequence_week(db, week_start, workers=args.workers)
+            print(f"sequence_week: {time.perf_counter() - started:.2f}s, {result.jobs_moved} jobs moved, "
+                  f"{result.km_before:,.0f} km -> {result.km_after:,.0f} km")
+        finally:
+            db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""Measure application startup: import cost and wall-clock time to first render.
+
+Runs each measurement in a fresh interpreter against a freshly bootstrapped
+SQLite database:
+
+* ``python -X importtime`` of ``app`` (what a Streamlit worker pays before
+  rendering), summarised as total import time and the slowest top-level
+  packages;
+* the time for Streamlit's AppTest to execute the script once and render
+  the default (Dashboard) page.
+
+Pass ``--max-import-ms`` / ``--max-render-ms`` to exit non-zero on regressions.
+
+    python benchmarks/bench_startup.py --runs 3 --max-render-ms 3000
+"""
+import argparse
+import os
+import re
+import statistics
+import subprocess
+import sys
+import tempfile
+from collections import defaultdict
+
+bench_dir = os.path.dirname(os.path.abspath(__file__))
+src_dir = os.path.join(os.path.dirname(bench_dir), "src")
+
+IMPORT_APP = f"import sys; sys.path.insert(0, {src_dir!r}); import app"
+
+FIRST_RENDER = f"""
+import time
+from streamlit.testing.v1 import AppTest
+at = AppTest.from_file({os.path.join(src_dir, 'app.py')!r}, default_timeout=60)
+start = time.perf_counter()
+at.run()
+elapsed = time.perf_counter() - start
+assert not at.exception, [e.value for e in at.exception]
+print(elapsed * 1000)
+"""
+
+IMPORTTIME_LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|(\s*)(\S+)")
+
+
+def run(code, env, importtime=False):
+    cmd = [sys.executable] + (["-X", "importtime"] if importtime else []) + ["-c", code]
+    return subprocess.run(cmd, env=env, capture_output=True, text=True, check=True)
+
+
+def import_profile(env):
+    """Total import time, and import time per top-level package (summed self
+    time of all its modules), in ms"""
+    stderr = run(IMPORT_APP, env, importtime=True).stderr
+    packages = defaultdict(int)
+    total = 0
+    for self_us, cumulative_us, indent, module in IMPORTTIME_LINE.findall(stderr):
+        packages[module.split(".")[0]] += int(self_us)
+        if module == "app":
+            total = int(cumulative_us)
+    return total / 1000, {name: us / 1000 for name, us in packages.items()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--top", type=int, default=10)
+    parser.add_argument("--max-import-ms", type=float)
+    parser.add_argument("--max-render-ms", type=float)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        env = dict(os.environ, DATABASE_URL=f"sqlite:///{os.path.join(tmp, 'startup.db')}")
+        run(f"import sys; sys.path.insert(0, {src_dir!r}); from models.base import init_db; init_db()", env)
+
+        imports, renders, profile = [], [], {}
+        for _ in range(args.runs):
+            total, profile = import_profile(env)
+            imports.append(total)
+            renders.append(float(run(FIRST_RENDER, env).stdout.strip().splitlines()[-1]))
+
+    import_ms = statistics.median(imports)
+    render_ms = statistics.median(renders)
+    print(f"{'import app':26} {import_ms:8.1f} ms (median of {args.runs})")
+    print(f"{'first render (Dashboard)':26} {render_ms:8.1f} ms (median of {args.runs})")
+    print("slowest packages imported by app:")
+    for name, ms in sorted(profile.items(), key=lambda item: -item[1])[:args.top]:
+        print(f"  {name:24} {ms:8.1f} ms")
+
+    failed = False
+    if args.max_import_ms is not None and import_ms > args.max_import_ms:
+        print(f"FAIL: import time {import_ms:.1f} ms exceeds {args.max_import_ms} ms")
+        failed = True
+    if args.max_render_ms is not None and render_ms > args.max_render_ms:
+        print(f"FAIL: first render {render_ms:.1f} ms exceeds {args.max_render_ms} ms")
+        failed = True
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
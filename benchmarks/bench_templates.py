@@ -0,0 +1,83 @@
+"""Time personalizing and costing a campaign: per-row loop vs compiled templates.
+
+    python benchmarks/bench_templates.py --rows 50000
+"""
+import argparse
+import math
+import os
+import random
+import sys
+import time
+
+bench_dir = os.path.dirname(os.path.abspath(__file__))
+src_dir = os.path.join(os.path.dirname(bench_dir), "src")
+if src_dir not in sys.path:
+    sys.path.append(src_dir)
+
+import pandas as pd
+
+from utils.templates import GSM_BASIC, GSM_EXTENDED, compile_template, estimate_campaign
+
+TEMPLATE = ("Hi {Client Name}, your {Service} clean is booked for {Day} at {Time}. "
+            "Reply STOP to opt out.")
+NAMES = ["Olivia", "Jack", "Zoë", "Ngọc", "Liam", "Chloé", "Noah", "Amelia", "李娜", "Mia"]
+
+
+def make_recipients(rows, seed=3):
+    rng = random.Random(seed)
+    return pd.DataFrame({
+        "Client Name": [f"{rng.choice(NAMES)} {i}" for i in range(rows)],
+        "Phone Number": [f"+6141{i:07d}" for i in range(rows)],
+        "Service": [rng.choice(["regular", "deep", "end of lease"]) for _ in range(rows)],
+        "Day": [rng.choice(["Monday", "Tuesday", "Friday"]) for _ in range(rows)],
+        "Time": [f"{rng.randint(8, 16)}:00" for _ in range(rows)],
+    })
+
+
+def per_row(recipients):
+    """The old approach: replace each placeholder and measure message by message"""
+    gsm_chars = set(GSM_BASIC + GSM_EXTENDED)
+    segments = 0
+    for row in recipients.to_dict("records"):
+        body = TEMPLATE
+        for column, value in row.items():
+            body = body.replace("{" + column + "}", value)
+        if set(body) <= gsm_chars:
+            length = len(body) + sum(c in GSM_EXTENDED for c in body)
+            segments += 1 if length <= 160 else math.ceil(length / 153)
+        else:
+            length = len(body.encode("utf-16-le")) // 2
+            segments += 1 if length <= 70 else math.ceil(length / 67)
+    return segments
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=50_000)
+    args = parser.parse_args()
+
+    recipients = make_recipients(args.rows)
+
+    start = time.perf_counter()
+    loop_segments = per_row(recipients)
+    loop = time.perf_counter() - start
+
+    start = time.perf_counter()
+    compiled = compile_template(TEMPLATE)
+    estimate = estimate_campaign(compiled, recipients)
+    estimated = time.perf_counter() - start
+
+    start = time.perf_counter()
+    compiled.render_frame(recipients)
+    rendered = time.perf_counter() - start
+
+    assert estimate.segments == loop_segments, (estimate.segments, loop_segments)
+    print(f"rows: {args.rows}, segments: {estimate.segments} ({estimate.unicode_messages} Unicode messages), "
+          f"estimated cost ${estimate.cost:,.2f}")
+    print(f"per-row render + count: {loop:.3f}s")
+    print(f"estimate_campaign:      {estimated:.3f}s")
+    print(f"render_frame:           {rendered:.3f}s")
+
+
+if __name__ == "__main__":
+    main()
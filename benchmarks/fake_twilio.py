@@ -0,0 +1,130 @@
+"""Local stand-in for the Twilio Messages API.
+
+Accepts ``POST /2010-04-01/Accounts/<sid>/Messages.json`` and answers like
+Twilio does, with optional latency and injected 429/500 responses so the
+dispatch code can be exercised without a real account. ``handshake_latency``
+delays each new connection, standing in for the TLS handshake with the real
+API, and ``connections`` counts how many were opened.
+
+Point MessageService at it with ``TWILIO_API_BASE_URL=http://127.0.0.1:<port>``.
+
+    python benchmarks/fake_twilio.py --port 8765 --latency 0.05 --error-rate 0.02
+"""
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs
+import argparse
+import itertools
+import json
+import random
+import threading
+import time
+
+
+class FakeTwilioServer:
+    def __init__(self, host="127.0.0.1", port=0, latency=0.0, error_rate=0.0, error_status=429,
+                 handshake_latency=0.0):
+        self.latency = latency
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.handshake_latency = handshake_latency
+        self.received = 0
+        self.connections = 0
+        self._counter = itertools.count(1)
+        self._lock = threading.Lock()
+        self._thread = None
+        self.httpd = ThreadingHTTPServer((host, port), self._handler())
+        self.httpd.daemon_threads = True
+
+    @property
+    def url(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            # Headers and body go out in separate writes; without this,
+            # Nagle plus delayed ACKs adds ~40ms to every keep-alive response
+            disable_nagle_algorithm = True
+
+            def log_message(self, *args):
+                pass
+
+            def setup(self):
+                super().setup()
+                with server._lock:
+                    server.connections += 1
+                if server.handshake_latency:
+                    time.sleep(server.handshake_latency)
+
+            def _reply(self, status, payload):
+                body = json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length", 0))
+                form = parse_qs(self.rfile.read(length).decode())
+                if server.latency:
+                    time.sleep(server.latency)
+                with server._lock:
+                    server.received += 1
+                if not self.path.endswith("/Messages.json"):
+                    self._reply(404, {"code": 20404, "message": "Not found", "status": 404})
+                    return
+                if server.error_rate and random.random() < server.error_rate:
+                    self._reply(server.error_status, {
+                        "code": 20429 if server.error_status == 429 else 20500,
+                        "message": "Injected failure",
+                        "status": server.error_status,
+                    })
+                    return
+                sid = "SM%032x" % next(server._counter)
+                self._reply(201, {
+                    "sid": sid,
+                    "status": "queued",
+                    "to": form.get("To", [""])[0],
+                    "from": form.get("From", [""])[0],
+                    "body": form.get("Body", [""])[0],
+                    "num_segments": "1",
+                })
+
+        return Handler
+
+    def start(self):
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.05, help="seconds per request")
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--error-status", type=int, default=429)
+    parser.add_argument("--handshake-latency", type=float, default=0.0, help="seconds per new connection")
+    args = parser.parse_args()
+    server = FakeTwilioServer(port=args.port, latency=args.latency,
+                              error_rate=args.error_rate, error_status=args.error_status,
+                              handshake_latency=args.handshake_latency)
+    print(f"Fake Twilio listening on {server.url}")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        server.stop()
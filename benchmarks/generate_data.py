@@ -0,0 +1,310 @@
+"""Fill a database with realistic synthetic clients, cleaners, jobs, invoices and messages.
+
+Works against whatever DATABASE_URL points at (or --database-url), creating
+the tables first if needed. Rows are generated with numpy and written with
+chunked bulk inserts. The history runs from --history-days ago to
+--horizon-days ahead, and it is left the way the workers would leave it:
+
+- past jobs are completed, rostered and invoiced, except the last week's,
+  which are still to be invoiced;
+- invoices are paid some days after they were raised, or are overdue or
+  pending;
+- jobs more than two weeks out are not yet rostered.
+
+    python benchmarks/generate_data.py --database-url sqlite:///big.db
+    python benchmarks/generate_data.py --scale 0.1   # 1k clients, 100k jobs, 200k messages
+"""
+import argparse
+import os
+import sys
+import time
+from datetime import datetime
+
+bench_dir = os.path.dirname(os.path.abspath(__file__))
+src_dir = os.path.join(os.path.dirname(bench_dir), "src")
+if src_dir not in sys.path:
+    sys.path.append(src_dir)
+
+import numpy as np
+
+DEFAULT_COUNTS = {"clients": 10_000, "cleaners": 500, "jobs": 1_000_000, "messages": 2_000_000}
+
+FIRST_NAMES = ["Olivia", "Jack", "Charlotte", "William", "Amelia", "Noah", "Isla", "Oliver", "Mia", "Leo",
+               "Grace", "Henry", "Ava", "Lucas", "Chloe", "Thomas", "Ruby", "James", "Zoe", "Ethan"]
+LAST_NAMES = ["Smith", "Jones", "Williams", "Brown", "Wilson", "Taylor", "Nguyen", "Johnson", "Martin",
+              "White", "Anderson", "Walker", "Thompson", "Harris", "Lee", "Ryan", "Robinson", "Kelly"]
+STREETS = ["George St", "King St", "Victoria Rd", "Church St", "High St", "Park Ave", "Station St",
+           "Beach Rd", "Railway Pde", "Queen St"]
+# Suburb, postcode and the postcode's approximate centroid
+SUBURBS = [("Parramatta", "2150", -33.815, 151.001), ("Bondi", "2026", -33.891, 151.274),
+           ("Newtown", "2042", -33.898, 151.179), ("Chatswood", "2067", -33.797, 151.181),
+           ("Manly", "2095", -33.797, 151.285), ("Penrith", "2750", -33.751, 150.694),
+           ("Hornsby", "2077", -33.703, 151.099), ("Cronulla", "2230", -34.058, 151.152),
+           ("Liverpool", "2170", -33.920, 150.924), ("Ryde", "2112", -33.815, 151.105)]
+PREFERENCES = ["", "", "", "Key under the mat", "Eco products only", "Has a dog", "Skip the study",
+               "Call before arriving"]
+MESSAGES = ["Hi {}, a reminder that your clean is booked for tomorrow.",
+            "Hi {}, thanks for your payment!",
+            "Hi {}, your cleaner is running 15 minutes late, sorry for the wait.",
+            "Hi {}, we have a spot free this Friday if you would like an extra clean."]
+
+# Relative number of jobs per client for each frequency
+FREQUENCY_WEIGHTS = {"Weekly": 4.0, "Fortnightly": 2.0, "Monthly": 1.0, "3-Monthly": 1 / 3}
+FREQUENCY_SHARE = {"Weekly": 0.45, "Fortnightly": 0.35, "Monthly": 0.15, "3-Monthly": 0.05}
+
+CHUNK_SIZE = 50_000
+
+
+def _chunks(n, size):
+    for start in range(0, n, size):
+        yield slice(start, min(start + size, n))
+
+
+def _to_datetimes(values):
+    return values.astype("datetime64[us]").tolist()
+
+
+def _insert(db, model, rows, returning=False, chunk_size=CHUNK_SIZE):
+    """Bulk insert a list of dicts in chunks, optionally returning the new ids in order.
+
+    Goes through the Core table rather than the ORM: ORM bulk inserts drop
+    None values and split the batch wherever the set of keys changes. The
+    new ids are read back afterwards instead of with RETURNING, which SQLite
+    can only keep in parameter order by inserting one row at a time; this
+    assumes nothing else writes to the table meanwhile.
+    """
+    from sqlalchemy import func, insert, select
+
+    table = model.__table__
+    before = db.scalar(select(func.coalesce(func.max(table.c.id), 0)))
+    for part in _chunks(len(rows), chunk_size):
+        db.execute(insert(table), rows[part])
+    if not returning:
+        return None
+    ids = db.execute(select(table.c.id).where(table.c.id > before).order_by(table.c.id)).scalars().all()
+    if len(ids) != len(rows):
+        raise RuntimeError(f"{table.name} was written to while generating data")
+    return np.array(ids, dtype=np.int64)
+
+
+def _clients(db, rng, n):
+    from sqlalchemy import func, select
+    from models.models import Client, GSTType, PaymentMode
+
+    # Continue numbering after existing clients, so phone numbers stay unique
+    offset = db.scalar(select(func.coalesce(func.max(Client.id), 0)))
+    frequencies = rng.choice(list(FREQUENCY_SHARE), n, p=list(FREQUENCY_SHARE.values()))
+    gst_types = rng.choice(list(GSTType), n, p=[0.15, 0.1, 0.6, 0.15])
+    modes = rng.choice(list(PaymentMode), n, p=[0.1, 0.6, 0.1, 0.2])
+    rates = np.round(rng.uniform(90, 220, n) / 5) * 5
+    first, last = rng.integers(len(FIRST_NAMES), size=n), rng.integers(len(LAST_NAMES), size=n)
+    suburbs, streets = rng.integers(len(SUBURBS), size=n), rng.integers(len(STREETS), size=n)
+    numbers, preferences = rng.integers(1, 300, n), rng.integers(len(PREFERENCES), size=n)
+
+    rows = []
+    for i in range(n):
+        phone = f"+614{(offset + i) % 100_000_000:08d}"
+        suburb, postcode = SUBURBS[suburbs[i]][:2]
+        rows.append({
+            "name": f"{FIRST_NAMES[first[i]]} {LAST_NAMES[last[i]]} {offset + i + 1}",
+            "contact": "0" + phone[3:], "phone_key": phone,
+            "address": f"{numbers[i]} {STREETS[streets[i]]}, {suburb} NSW {postcode}",
+            "frequency": frequencies[i], "preferences": PREFERENCES[preferences[i]] or None,
+            "rate": float(rates[i]), "gst_type": gst_types[i], "payment_mode": modes[i],
+        })
+    ids = _insert(db, Client, rows, returning=True)
+    weights = np.array([FREQUENCY_WEIGHTS[f] for f in frequencies])
+    return {"id": ids, "name": [r["name"] for r in rows], "phone": [r["phone_key"] for r in rows],
+            "rate": rates, "gst_type": np.array([g.name for g in gst_types], dtype=object),
+            "payment_mode": modes, "weight": weights / weights.sum()}
+
+
+def _cleaners(db, rng, n):
+    from models.models import Cleaner, EmploymentType
+    from utils.roster import WEEKDAYS
+
+    cost_rates = np.round(rng.uniform(28, 45, n), 2)
+    first, last = rng.integers(len(FIRST_NAMES), size=n), rng.integers(len(LAST_NAMES), size=n)
+    rows, masks = [], np.zeros((n, 7), dtype=bool)
+    for i in range(n):
+        # Most cleaners work weekdays; some take Saturdays too
+        days = sorted(rng.choice(6, rng.integers(3, 7), replace=False, p=[0.19] * 5 + [0.05]))
+        masks[i, days] = True
+        rows.append({
+            "name": f"{FIRST_NAMES[first[i]]} {LAST_NAMES[last[i]]}",
+            "cost_rate": float(cost_rates[i]),
+            "employment_type": EmploymentType.EMPLOYEE if rng.random() < 0.7 else EmploymentType.CONTRACTOR,
+            "availability": ",".join(WEEKDAYS[d] for d in days),
+        })
+    return {"id": _insert(db, Cleaner, rows, returning=True), "cost_rate": cost_rates, "available": masks}
+
+
+def _jobs(db, rng, n, clients, cleaners, today, history_days, horizon_days, rostered_days):
+    """Jobs in date order; returns their ids, dates and who they were for"""
+    from models.models import Job, Roster
+    from utils.roster import JOB_HOURS
+
+    days = rng.integers(-history_days, horizon_days, n)
+    days -= (days + today.weekday()) % 7 == 6  # no cleans on Sundays
+    days.sort()
+    dates = (np.datetime64(today, "m") + days.astype("timedelta64[D]")
+             + rng.integers(8, 17, n).astype("timedelta64[h]"))
+    weekday = (days + today.weekday()) % 7
+    client_idx = rng.choice(len(clients["id"]), n, p=clients["weight"])
+
+    past = days < 0
+    status = np.where(past, "Completed", "Scheduled").astype(object)
+    status[past & (rng.random(n) < 0.03)] = "Cancelled"
+
+    # A cleaner available on the day, for jobs already through the roster
+    cleaner_idx = np.full(n, -1)
+    rostered = days < rostered_days
+    for day in range(7):
+        available = np.flatnonzero(cleaners["available"][:, day])
+        on_day = rostered & (weekday == day)
+        if len(available):
+            cleaner_idx[on_day] = rng.choice(available, on_day.sum())
+        else:
+            rostered &= ~on_day
+
+    assigned = cleaner_idx >= 0
+    ends = _to_datetimes(dates + np.timedelta64(int(JOB_HOURS * 60), "m"))
+    # Last touched when completed, or for future jobs at some point in the last week
+    set_up = np.datetime64(today, "m") - rng.integers(1, 7 * 24 * 60, n).astype("timedelta64[m]")
+    touched = _to_datetimes(np.where(past, dates, set_up))
+    rows = [{
+        "client_id": int(client_id), "cleaner_id": int(cleaners["id"][c]) if c >= 0 else None,
+        "date": when, "time": when.strftime("%H:%M"), "start_at": when, "end_at": end, "status": s,
+        "created_at": changed, "updated_at": changed,
+    } for client_id, c, when, end, s, changed in zip(clients["id"][client_idx], cleaner_idx,
+                                                     _to_datetimes(dates), ends, status, touched)]
+    job_ids = _insert(db, Job, rows, returning=True)
+
+    on_roster = assigned & (status != "Cancelled")
+    costs = cleaners["cost_rate"][cleaner_idx[on_roster]] * JOB_HOURS
+    _insert(db, Roster, [{"job_id": int(j), "cost": float(c)}
+                         for j, c in zip(job_ids[on_roster], costs)])
+    return {"id": job_ids, "date": dates, "client_idx": client_idx, "status": status,
+            "rostered": int(on_roster.sum())}
+
+
+def _invoices(db, rng, jobs, clients, now, uninvoiced_days):
+    """Invoice completed jobs, then pay most of them some days later"""
+    from models.models import Invoice, Payment
+    from utils.invoicing import GST_RATES, GST_RATE
+    from utils.overdue import PAYMENT_TERMS_DAYS
+
+    now64 = np.datetime64(now, "m")
+    invoiced = (jobs["status"] == "Completed") & (jobs["date"] < now64 - np.timedelta64(uninvoiced_days, "D"))
+    client_idx = jobs["client_idx"][invoiced]
+    amounts = clients["rate"][client_idx]
+    rates = np.array([GST_RATES.get(g, GST_RATE) for g in clients["gst_type"][client_idx]])
+    gst = np.round(amounts * rates, 2)
+    raised = jobs["date"][invoiced] + np.timedelta64(1, "D")
+    age = (now64 - raised) / np.timedelta64(1, "D")
+
+    # Days each client takes to pay; a few never do
+    delay = rng.gamma(2.0, 5.0, len(raised))
+    delay[rng.random(len(raised)) < 0.02] = np.inf
+    paid = delay <= age
+    status = np.where(paid, "Paid", np.where(age > PAYMENT_TERMS_DAYS, "Overdue", "Pending")).astype(object)
+
+    raised_at = _to_datetimes(raised)
+    invoice_ids = _insert(db, Invoice, [{
+        "job_id": int(job_id), "amount": float(amount), "gst": float(tax), "status": s,
+        "created_at": when, "updated_at": when,
+    } for job_id, amount, tax, s, when in zip(jobs["id"][invoiced], amounts, gst, status, raised_at)],
+        returning=True)
+
+    paid_on = _to_datetimes(raised[paid] + (delay[paid] * 24 * 60).astype("timedelta64[m]"))
+    modes = clients["payment_mode"][client_idx[paid]]
+    totals = amounts[paid] + gst[paid]
+    _insert(db, Payment, [{
+        "invoice_id": int(invoice_id), "mode": mode, "amount": float(total),
+        "payment_date": when, "created_at": when, "updated_at": when,
+    } for invoice_id, mode, total, when in zip(invoice_ids[paid], modes, totals, paid_on)])
+    return {"invoices": len(invoice_ids), "payments": int(paid.sum())}
+
+
+def _messages(db, rng, n, clients, now, history_days, chunk_size=CHUNK_SIZE):
+    """Message history, generated and inserted a chunk at a time to bound memory"""
+    from sqlalchemy import insert
+    from models.models import MessageHistory
+
+    now64 = np.datetime64(now, "s")
+    for part in _chunks(n, chunk_size):
+        size = part.stop - part.start
+        client_idx = rng.integers(len(clients["id"]), size=size)
+        texts = rng.integers(len(MESSAGES), size=size)
+        created = now64 - rng.integers(0, history_days * 86400, size).astype("timedelta64[s]")
+        status = rng.choice(["success", "failed", "scheduled"], size, p=[0.93, 0.05, 0.02])
+        # Scheduled messages are due within the next fortnight
+        scheduled = now64 + rng.integers(3600, 14 * 86400, size).astype("timedelta64[s]")
+        rows = []
+        for c, t, when, s, due in zip(client_idx, texts, _to_datetimes(created), status,
+                                      _to_datetimes(scheduled)):
+            name = clients["name"][c]
+            rows.append({
+                "client_name": name, "phone_number": clients["phone"][c],
+                "message": MESSAGES[t].format(name.split()[0]), "status": s,
+                "error": "Twilio error: 21610 unsubscribed recipient" if s == "failed" else None,
+                "scheduled_for": due if s == "scheduled" else None,
+                "sent_at": when if s == "success" else None,
+                "created_at": now if s == "scheduled" else when,
+            })
+        db.execute(insert(MessageHistory.__table__), rows)
+
+
+def generate(db, clients=DEFAULT_COUNTS["clients"], cleaners=DEFAULT_COUNTS["cleaners"],
+             jobs=DEFAULT_COUNTS["jobs"], messages=DEFAULT_COUNTS["messages"],
+             history_days=730, horizon_days=84, rostered_days=14, uninvoiced_days=7, seed=42, now=None):
+    """Insert the synthetic data and commit; returns the rows written per table"""
+    rng = np.random.default_rng(seed)
+    now = now or datetime.now()
+    today = datetime.combine(now.date(), datetime.min.time())
+
+    client_rows = _clients(db, rng, clients)
+    cleaner_rows = _cleaners(db, rng, max(cleaners, 1))
+    job_rows = _jobs(db, rng, jobs, client_rows, cleaner_rows, today, history_days, horizon_days,
+                     rostered_days)
+    billing = _invoices(db, rng, job_rows, client_rows, now, uninvoiced_days)
+    _messages(db, rng, messages, client_rows, now, history_days)
+    db.commit()
+    return {"clients": clients, "cleaners": max(cleaners, 1), "jobs": jobs, "rosters": job_rows["rostered"],
+            **billing, "messages": messages}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--database-url", help="defaults to DATABASE_URL")
+    parser.add_argument("--scale", type=float, default=1.0,
+                        help="multiplies the default counts: 10k clients, 500 cleaners, 1M jobs, 2M messages")
+    for name in DEFAULT_COUNTS:
+        parser.add_argument(f"--{name}", type=int, help="overrides --scale")
+    parser.add_argument("--history-days", type=int, default=730)
+    parser.add_argument("--horizon-days", type=int, default=84)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    if args.database_url:
+        os.environ["DATABASE_URL"] = args.database_url
+    from models.base import SessionLocal, engine, init_db
+
+    counts = {name: getattr(args, name) if getattr(args, name) is not None else int(default * args.scale)
+              for name, default in DEFAULT_COUNTS.items()}
+    init_db()
+    db = SessionLocal()
+    try:
+        print(f"Generating {counts['clients']} clients, {counts['cleaners']} cleaners, {counts['jobs']} jobs "
+              f"and {counts['messages']} messages into {engine.url.render_as_string(hide_password=True)}...")
+        started = time.perf_counter()
+        written = generate(db, **counts, history_days=args.history_days, horizon_days=args.horizon_days,
+                           seed=args.seed)
+    finally:
+        db.close()
+    print(", ".join(f"{rows} {table}" for table, rows in written.items())
+          + f" in {time.perf_counter() - started:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,226 @@
+"""Run every page's data path and the messaging, invoicing and rostering operations, and compare against a baseline.
+
+Generates a database with generate_data.py, then times each page's queries
+(median of --repeat runs) and runs the background operations once each, in
+the order the workers would: materialize recurring jobs, roster next week,
+invoice completed jobs, sweep overdue invoices, reconcile a bank statement,
+deliver the queued reminders and send a bulk campaign, both against a fake
+Twilio server. SQL statements are counted for each step.
+
+The database is a temporary SQLite file unless --database-url names one,
+e.g. PostgreSQL; it must be empty, since the suite generates its own data
+and its operations change it.
+
+Results go to --output. If --baseline exists and was recorded at the same
+scale on the same database, any step that got slower by more than
+--tolerance (and --min-ms), or runs more SQL statements than before, is
+reported and the script exits with status 1. --update-baseline records the
+current results as the new baseline.
+
+    python benchmarks/run_suite.py --scale 0.05
+    python benchmarks/run_suite.py --scale 0.05 --update-baseline
+    python benchmarks/run_suite.py --database-url postgresql://localhost/cleaning_suite
+"""
+import argparse
+import io
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+from datetime import date, datetime, timedelta
+
+bench_dir = os.path.dirname(os.path.abspath(__file__))
+src_dir = os.path.join(os.path.dirname(bench_dir), "src")
+for path in (bench_dir, src_dir):
+    if path not in sys.path:
+        sys.path.append(path)
+
+from bench_dispatch import configure, make_messages
+from fake_twilio import FakeTwilioServer
+from generate_data import DEFAULT_COUNTS
+
+DEFAULT_BASELINE = os.path.join(bench_dir, "baseline.json")
+
+
+def page_steps(db, session_factory):
+    """Each page's data path, safe to run repeatedly"""
+    from bench_queries import page_queries
+    from utils.analytics import cleaner_utilization, days_to_pay, margins, reports, revenue_by_month
+
+    end = date.today()
+    start = end - timedelta(days=365)
+
+    def reports_page():
+        reports.clear()
+        margins(db, start, end, "Client")
+        revenue_by_month(db, start, end)
+        cleaner_utilization(db, start, end)
+        days_to_pay(db, start, end)
+
+    return {**page_queries(db, session_factory), "reports": reports_page}
+
+
+def statement_csv(db, share=0.8):
+    """A bank statement paying ``share`` of the open invoices, plus some lines that need review"""
+    from sqlalchemy import select
+    from models.models import Invoice
+    from utils.reconciliation import OPEN_STATUSES
+
+    invoices = db.execute(select(Invoice.id, Invoice.amount, Invoice.gst)
+                          .where(Invoice.status.in_(OPEN_STATUSES)).order_by(Invoice.id)).all()
+    lines = ["Date,Description,Amount"]
+    day = date.today().strftime("%d/%m/%Y")
+    for i, (invoice_id, amount, gst) in enumerate(invoices[:int(len(invoices) * share)]):
+        total = (amount or 0) + (gst or 0)
+        if i % 10 == 9:
+            lines.append(f"{day},Transfer from a client,{total:.2f}")
+        else:
+            lines.append(f"{day},INV-{invoice_id},{total:.2f}")
+    return "\n".join(lines) + "\n"
+
+
+def operation_steps(db, session_factory, messages, rate, workers):
+    """The background operations; each changes the data, so runs once, in this order"""
+    from utils.dispatch import BulkDispatcher, HistoryWriter
+    from utils.invoicing import generate_invoices
+    from utils.materializer import materialize_jobs
+    from utils.messaging import MessageService
+    from utils.overdue import sweep_overdue
+    from utils.reconciliation import reconcile_statement
+    from utils.roster import generate_roster, next_week_start
+    from utils.scheduler import ScheduledMessageWorker
+
+    service = MessageService()
+    dispatcher = BulkDispatcher(service, rate=rate, workers=workers, backoff=0.05)
+    scheduler = ScheduledMessageWorker(session_factory, service, batch_size=max(messages, 1),
+                                       dispatcher=dispatcher)
+    # A week from now, the invoices raised over the last week have fallen due
+    sweep_at = datetime.utcnow() + timedelta(days=7)
+    statement = statement_csv(db)
+
+    return {
+        "materialize_jobs": lambda: materialize_jobs(db),
+        "generate_roster": lambda: generate_roster(db, next_week_start()),
+        "generate_invoices": lambda: generate_invoices(db),
+        "overdue_sweep": lambda: sweep_overdue(db, now=sweep_at),
+        "reconcile_statement": lambda: reconcile_statement(db, io.StringIO(statement)),
+        "send_scheduled": scheduler.run_once,
+        "bulk_dispatch": lambda: dispatcher.dispatch(make_messages(messages), on_batch=HistoryWriter(db)),
+    }
+
+
+def run_step(run, repeat):
+    """Median wall time in ms and SQL statements of the last run"""
+    from utils import metrics
+
+    timings = []
+    for _ in range(repeat):
+        with metrics.track("suite") as queries:
+            started = time.perf_counter()
+            run()
+            timings.append((time.perf_counter() - started) * 1000)
+    return {"ms": round(statistics.median(timings), 3), "statements": queries.statements}
+
+
+def compare(results, baseline, tolerance, min_ms):
+    """Steps that got slower than the baseline allows, or run more statements"""
+    regressions = []
+    for name, current in results.items():
+        before = baseline.get(name)
+        if before is None:
+            continue
+        if current["ms"] > before["ms"] * (1 + tolerance) and current["ms"] - before["ms"] > min_ms:
+            regressions.append(f"{name}: {current['ms']:.1f} ms, baseline {before['ms']:.1f} ms")
+        if current["statements"] > before["statements"]:
+            regressions.append(f"{name}: {current['statements']} SQL statements, "
+                               f"baseline {before['statements']}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--scale", type=float, default=0.05,
+                        help="of generate_data.py's defaults; 0.05 = 500 clients, 50k jobs, 100k messages")
+    parser.add_argument("--database-url", help="an empty database to run in; default: a temporary SQLite file")
+    parser.add_argument("--repeat", type=int, default=3, help="runs of each page, reporting the median")
+    parser.add_argument("--messages", type=int, default=500, help="bulk campaign size")
+    parser.add_argument("--latency", type=float, default=0.01, help="fake Twilio response time")
+    parser.add_argument("--rate", type=float, default=1000.0, help="token bucket msgs/sec")
+    parser.add_argument("--workers", type=int, default=16)
+    parser.add_argument("--output", default="bench_suite.json")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    parser.add_argument("--update-baseline", action="store_true")
+    parser.add_argument("--tolerance", type=float, default=0.5, help="allowed slowdown, 0.5 = 50%%")
+    parser.add_argument("--min-ms", type=float, default=20.0,
+                        help="ignore slowdowns smaller than this, which are within timing noise")
+    args = parser.parse_args()
+
+    # Count statements per step; must be set before the engine is created
+    os.environ["METRICS_ENABLED"] = "1"
+    os.environ["METRICS_FILE"] = ""
+    with FakeTwilioServer(latency=args.latency) as server, tempfile.TemporaryDirectory() as tmp:
+        configure(server.url, os.path.join(tmp, "suite.db"))
+        if args.database_url:
+            os.environ["DATABASE_URL"] = args.database_url
+        from sqlalchemy import func, select
+        from generate_data import generate
+        from models.base import SessionLocal, engine, init_db
+        from models.models import Client
+
+        init_db()
+        db = SessionLocal()
+        try:
+            if db.scalar(select(func.count(Client.id))):
+                sys.exit(f"{engine.url.render_as_string(hide_password=True)} already has data; "
+                         "the suite generates its own, so give it an empty database")
+            counts = {name: int(default * args.scale) for name, default in DEFAULT_COUNTS.items()}
+            print(f"Generating {counts['jobs']} jobs and {counts['messages']} messages...")
+            started = time.perf_counter()
+            generate(db, **counts)
+            print(f"Generated in {time.perf_counter() - started:.1f}s")
+
+            results = {}
+            for name, run in page_steps(db, SessionLocal).items():
+                results[name] = run_step(run, args.repeat)
+                print(f"{name:36} {results[name]['ms']:>10.2f} ms {results[name]['statements']:>5} statements")
+            operations = operation_steps(db, SessionLocal, args.messages, args.rate, args.workers)
+            for name, run in operations.items():
+                results[name] = run_step(run, 1)
+                print(f"{name:36} {results[name]['ms']:>10.2f} ms {results[name]['statements']:>5} statements")
+        finally:
+            db.close()
+
+    report = {"database": engine.dialect.name, "scale": args.scale, "python": platform.python_version(),
+              "recorded_at": datetime.utcnow().isoformat(timespec="seconds"), "results": results}
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"Results written to {args.output}")
+
+    if args.update_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Baseline updated: {args.baseline}")
+        return
+    if not os.path.exists(args.baseline):
+        print(f"No baseline at {args.baseline}; record one with --update-baseline")
+        return
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    if (baseline["database"], baseline["scale"]) != (report["database"], report["scale"]):
+        sys.exit(f"Baseline was recorded on {baseline['database']} at scale {baseline['scale']}; "
+                 f"rerun with --scale {baseline['scale']} or record a new one with --update-baseline")
+    regressions = compare(results, baseline["results"], args.tolerance, args.min_ms)
+    if regressions:
+        print(f"\n{len(regressions)} REGRESSIONS against {args.baseline}:")
+        for line in regressions:
+            print(f"  {line}")
+        sys.exit(1)
+    print(f"No regressions against {args.baseline}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,196 @@
+"""Simulate a campaign's worth of Twilio delivery status callbacks against the API.
+
+Writes --messages message history rows with Twilio sids to a temporary
+SQLite database, starts uvicorn on a free local port and posts one signed
+callback per message from --concurrency keep-alive connections: about 90%
+delivered, 7% undelivered (error 30003/30005) and 3% failed (30008).
+Reports callbacks/sec and latency, then how long the buffered statuses took
+to reach message_history.
+
+    python benchmarks/simulate_callbacks.py --messages 20000 --concurrency 16
+
+To drive a receiver that is already running, pass its URL, its database and
+the TWILIO_AUTH_TOKEN it validates with; the sids must already exist there:
+
+    TWILIO_AUTH_TOKEN=... python benchmarks/simulate_callbacks.py \\
+        --url http://localhost:8000/twilio/status --database-url postgresql://...
+"""
+import argparse
+import http.client
+import os
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+from urllib.parse import urlencode, urlsplit
+
+bench_dir = os.path.dirname(os.path.abspath(__file__))
+src_dir = os.path.join(os.path.dirname(bench_dir), "src")
+for path in (bench_dir, src_dir):
+    if path not in sys.path:
+        sys.path.append(path)
+
+from bench_api import free_port, wait_until_listening
+
+ACCOUNT_SID = "AC" + "0" * 32
+
+
+def message_sid(i):
+    return f"SM{i:032x}"
+
+
+def outcome(rng):
+    roll = rng.random()
+    if roll < 0.90:
+        return "delivered", None
+    if roll < 0.97:
+        return "undelivered", rng.choice(["30003", "30005"])
+    return "failed", "30008"
+
+
+def populate(db, n):
+    from sqlalchemy import insert
+    from models.models import MessageHistory
+
+    now = datetime.utcnow()
+    rows = [{"client_name": f"Client {i}", "phone_number": f"+6141{i:07d}", "message": "Reminder",
+             "status": "success", "message_sid": message_sid(i), "sent_at": now, "created_at": now}
+            for i in range(n)]
+    for start in range(0, n, 10_000):
+        db.execute(insert(MessageHistory), rows[start:start + 10_000])
+    db.commit()
+
+
+def post_callbacks(url, token, n, concurrency, seed):
+    from twilio.request_validator import RequestValidator
+
+    validator = RequestValidator(token)
+    target = urlsplit(url)
+    latencies, errors = [], []
+    lock = threading.Lock()
+
+    def client(worker):
+        rng = random.Random(seed + worker)
+        conn = http.client.HTTPConnection(target.hostname, target.port or 80)
+        local, failed = [], 0
+        for i in range(worker, n, concurrency):
+            status, error_code = outcome(rng)
+            params = {"AccountSid": ACCOUNT_SID, "MessageSid": message_sid(i), "MessageStatus": status,
+                      "SmsStatus": status, "To": f"+6141{i:07d}", "ApiVersion": "2010-04-01"}
+            if error_code:
+                params["ErrorCode"] = error_code
+            headers = {"Content-Type": "application/x-www-form-urlencoded",
+                       "X-Twilio-Signature": validator.compute_signature(url, params)}
+            start = time.perf_counter()
+            conn.request("POST", target.path, body=urlencode(params), headers=headers)
+            response = conn.getresponse()
+            response.read()
+            local.append(time.perf_counter() - start)
+            if response.status >= 400:
+                failed += 1
+        conn.close()
+        with lock:
+            latencies.extend(local)
+            errors.append(failed)
+
+    threads = [threading.Thread(target=client, args=(i,)) for i in range(concurrency)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    percentiles = statistics.quantiles(latencies, n=100) if len(latencies) > 1 else latencies * 99
+    print(f"posted {len(latencies)} callbacks in {elapsed:.2f}s: {len(latencies) / elapsed:.0f}/s, "
+          f"p50 {percentiles[49] * 1000:.1f} ms, p99 {percentiles[98] * 1000:.1f} ms, {sum(errors)} errors")
+    return sum(errors)
+
+
+def wait_for_statuses(n, timeout):
+    """Poll message_history until every callback has been applied"""
+    from sqlalchemy import func, select
+    from models.base import SessionLocal
+    from models.models import MessageHistory
+
+    started = time.perf_counter()
+    deadline = time.monotonic() + timeout
+    db = SessionLocal()
+    try:
+        while True:
+            counts = dict(db.execute(
+                select(MessageHistory.delivery_status, func.count())
+                .where(MessageHistory.delivery_status.is_not(None))
+                .group_by(MessageHistory.delivery_status)
+            ).all())
+            db.rollback()
+            if sum(counts.values()) >= n or time.monotonic() > deadline:
+                break
+            time.sleep(0.1)
+    finally:
+        db.close()
+    print(f"applied {sum(counts.values())} of {n} within {time.perf_counter() - started:.2f}s of the last callback: "
+          + ", ".join(f"{status} {count}" for status, count in sorted(counts.items())))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--messages", type=int, default=20_000)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn worker processes")
+    parser.add_argument("--url", help="an already running POST /twilio/status")
+    parser.add_argument("--database-url", help="the database behind --url, to watch the statuses land")
+    parser.add_argument("--timeout", type=float, default=60.0, help="seconds to wait for the statuses to land")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        if args.url:
+            token = os.environ.get("TWILIO_AUTH_TOKEN")
+            if not token:
+                parser.error("--url needs the receiver's TWILIO_AUTH_TOKEN in the environment")
+            if args.database_url:
+                os.environ["DATABASE_URL"] = args.database_url
+            post_callbacks(args.url, token, args.messages, args.concurrency, args.seed)
+            if args.database_url:
+                wait_for_statuses(args.messages, args.timeout)
+            return
+
+        port = free_port()
+        url = f"http://127.0.0.1:{port}/twilio/status"
+        token = "bench-auth-token"
+        os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+        os.environ["TWILIO_AUTH_TOKEN"] = token
+        os.environ["TWILIO_STATUS_CALLBACK_URL"] = url
+        os.environ.setdefault("JWT_SECRET_KEY", "bench-secret")
+
+        from models.base import SessionLocal, init_db
+
+        init_db()
+        db = SessionLocal()
+        try:
+            print(f"Writing {args.messages} sent messages...")
+            populate(db, args.messages)
+        finally:
+            db.close()
+
+        server = subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "api:app", "--app-dir", src_dir, "--port", str(port),
+             "--workers", str(args.workers), "--no-access-log", "--log-level", "warning"],
+            env=dict(os.environ),
+        )
+        try:
+            wait_until_listening(port, server)
+            post_callbacks(url, token, args.messages, args.concurrency, args.seed)
+            wait_for_statuses(args.messages, args.timeout)
+        finally:
+            server.terminate()
+            server.wait(timeout=30)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+"""REST API over the cleaning business data, for the cleaners' app and integrations.
+
+Run from the project root:
+
+    uvicorn api:app --app-dir src --workers 4
+
+Every endpoint except POST /token and Twilio's POST /twilio/status callback
+needs an ``Authorization: Bearer`` token signed with JWT_SECRET_KEY. List endpoints are keyset paginated (pass the
+returned ``next_after`` as ``after``) and GET responses carry an ETag for
+conditional requests.
+"""
+import os
+import sys
+
+# Add the src directory to Python path
+src_dir = os.path.dirname(os.path.abspath(__file__))
+if src_dir not in sys.path:
+    sys.path.append(src_dir)
+
+from contextlib import asynccontextmanager
+
+from dotenv import load_dotenv
+from fastapi import FastAPI, Request
+from fastapi.responses import PlainTextResponse
+
+# Before the routes, which read their settings when imported
+load_dotenv()
+
+from routes import auth, cleaners, clients, invoices, jobs, rosters, twilio
+from utils import metrics
+from utils.delivery import statuses
+
+
+@asynccontextmanager
+async def lifespan(app):
+    # Each worker process applies the status callbacks it received
+    statuses.start()
+    try:
+        yield
+    finally:
+        statuses.stop()
+
+
+app = FastAPI(title="Cleaning Business API", lifespan=lifespan)
+
+app.include_router(auth.router)
+for module in (clients, cleaners, jobs, rosters, invoices, twilio):
+    app.include_router(module.router)
+
+if metrics.ENABLED:
+    @app.middleware("http")
+    async def track_requests(request: Request, call_next):
+        def label():
+            # The route template ("/jobs/{job_id}"), not the raw path; known once routed
+            route = request.scope.get("route")
+            return f"{request.method} {route.path}" if route is not None else "unmatched"
+
+        with metrics.track(label):
+            return await call_next(request)
+
+    @app.get("/metrics", include_in_schema=False, response_class=PlainTextResponse)
+    def prometheus_metrics():
+        return PlainTextResponse(metrics.render_prometheus(), media_type="text/plain; version=0.0.4")
@@ -1,6 +1,5 @@
 import streamlit as st
-import pandas as pd
-from datetime import datetime, timedelta
+from datetime import datetime, time, timedelta
 import os
 import sys
 
@@ -9,11 +8,15 @@ src_dir = os.path.dirname(os.path.abspath(__file__))
 if src_dir not in sys.path:
     sys.path.append(src_dir)
 
-from models.base import SessionLocal, engine
-from models.models import (Client, Cleaner, Job, Roster, Invoice, Payment,
-    GSTType, PaymentMode, EmploymentType, MessageTemplate, MessageHistory)
-from utils.messaging import MessageService
-from datetime import datetime, timedelta
+from models.base import AppSession, app_session
+from utils import metrics
+from utils.cache import reads
+from models.models import (Client, Cleaner, GSTType, PaymentMode, EmploymentType,
+    MessageTemplate)
+
+# Page-specific modules (pandas, NumPy, Twilio and the services built on them)
+# are imported inside the page functions, so the first render only loads
+# what the selected page needs.
 
 st.set_page_config(
     page_title="Cleaning Business Management System",
@@ -22,74 +25,142 @@ st.set_page_config(
 )
 
 def get_db():
-    db = SessionLocal()
-    try:
-        return db
-    finally:
-        db.close()
+    """This script run's session; main() closes it when the run ends"""
+    return AppSession()
+
+def show_paginated(key, load_page, tables):
+    """Render one keyset-paginated page with Previous/Next controls.
+
+    ``key`` should include the active filters so changing them starts over
+    from the first page. ``load_page(cursor)`` returns a ``Page``, which is
+    served from the read cache until one of ``tables`` is written.
+    """
+    cursors = st.session_state.setdefault(f"pages:{key}", [None])
+    cursor = cursors[-1]
+    page = reads.get((key, cursor), tables, lambda: load_page(cursor))
+    if page.data.empty and len(cursors) == 1:
+        st.info("No records found")
+        return
+    st.dataframe(page.data, hide_index=True)
+    
+    col1, col2, col3 = st.columns([1, 1, 6])
+    with col1:
+        if st.button("Previous", key=f"{key}:prev", disabled=len(cursors) == 1):
+            cursors.pop()
+            st.rerun()
+    with col2:
+        if st.button("Next", key=f"{key}:next", disabled=not page.has_more):
+            cursors.append(page.next_cursor)
+            st.rerun()
+    with col3:
+        st.caption(f"Page {len(cursors)}")
 
 def main():
     st.title("Cleaning Business Management System")
     
-    menu = ["Dashboard", "Clients", "Team", "Roster", "Invoices", "Messaging"]
+    menu = ["Dashboard", "Clients", "Team", "Roster", "Invoices", "Reports", "Messaging"]
     choice = st.sidebar.selectbox("Menu", menu)
     
-    if choice == "Dashboard":
-        show_dashboard()
-    elif choice == "Clients":
-        show_clients()
-    elif choice == "Team":
-        show_team()
-    elif choice == "Roster":
-        show_roster()
-    elif choice == "Invoices":
-        show_invoices()
-    elif choice == "Messaging":
-        show_messaging()
+    # One session for the whole run, closed even when a widget stops the script early
+    with app_session():
+        if choice == "Dashboard":
+            show_dashboard()
+        elif choice == "Clients":
+            show_clients()
+        elif choice == "Team":
+            show_team()
+        elif choice == "Roster":
+            show_roster()
+        elif choice == "Invoices":
+            show_invoices()
+        elif choice == "Reports":
+            show_reports()
+        elif choice == "Messaging":
+            show_messaging()
+    
+    if metrics.ENABLED:
+        show_performance()
+
+def show_performance():
+    """Debug sidebar with each page's render time and SQL statements"""
+    if not st.sidebar.checkbox("Show performance", key="show_performance"):
+        return
+    with st.sidebar:
+        st.caption("Last render and running averages per page. SQL counts include "
+                   "only statements run while the page rendered.")
+        st.dataframe(metrics.page_summary(), hide_index=True)
 
+@metrics.page
 def show_dashboard():
+    from utils.dashboard import (active_clients, team_size, jobs_this_week,
+        outstanding_by_gst_type, upcoming_jobs, recent_invoices)
+    
     st.header("Dashboard")
     
-    col1, col2, col3 = st.columns(3)
+    db = get_db()
+    now = datetime.now()
+    outstanding = outstanding_by_gst_type(db)
+    
+    col1, col2, col3, col4 = st.columns(4)
     
     with col1:
-        st.metric("Active Clients", "25")
+        st.metric("Active Clients", active_clients(db, now))
     with col2:
-        st.metric("Team Members", "10")
+        st.metric("Team Members", team_size(db))
     with col3:
-        st.metric("Weekly Jobs", "45")
+        st.metric("Jobs This Week", jobs_this_week(db, now))
+    with col4:
+        st.metric("Outstanding", f"${outstanding['Outstanding'].sum():,.2f}")
+    
+    if not outstanding.empty:
+        st.subheader("Outstanding Invoices by GST Type")
+        st.dataframe(outstanding, hide_index=True)
     
     st.subheader("Upcoming Jobs")
-    # Add upcoming jobs table here
+    jobs = upcoming_jobs(db, now)
+    if jobs.empty:
+        st.info("No upcoming jobs")
+    else:
+        st.dataframe(jobs, hide_index=True)
     
     st.subheader("Recent Invoices")
-    # Add recent invoices table here
+    invoices = recent_invoices(db)
+    if invoices.empty:
+        st.info("No invoices yet")
+    else:
+        st.dataframe(invoices, hide_index=True)
 
+@metrics.page
 def show_clients():
+    import pandas as pd
+    from utils.client_import import IMPORT_COLUMNS, import_clients
+    from utils.queries import client_page
+    from utils.recipients import normalize_phone_numbers, valid_phone_numbers
+    
     st.header("Client Management")
     
-    tab1, tab2 = st.tabs(["Client List", "Add New Client"])
+    tab1, tab2, tab3 = st.tabs(["Client List", "Add New Client", "Import Clients"])
     
     with tab1:
         db = get_db()
-        clients = db.query(Client).all()
-        if clients:
-            client_data = []
-            for client in clients:
-                client_data.append({
-                    "Name": client.name,
-                    "Contact": client.contact,
-                    "Frequency": client.frequency,
-                    "GST Type": client.gst_type.value,
-                    "Payment Mode": client.payment_mode.value
-                })
-            st.dataframe(pd.DataFrame(client_data))
+        col1, col2 = st.columns([3, 1])
+        with col1:
+            search = st.text_input("Search clients", key="client_search")
+        with col2:
+            sort_by = st.selectbox("Sort by", ["Name", "Newest"], key="client_sort")
+        show_paginated(
+            f"clients:{search}:{sort_by}",
+            lambda cursor: client_page(db, search, sort_by, after=cursor),
+            ("clients",)
+        )
     
     with tab2:
         with st.form("new_client_form"):
             name = st.text_input("Client Name")
             contact = st.text_input("Contact Number")
             address = st.text_area("Address")
+            rate = st.number_input("Price per Clean ($, excl. GST)", min_value=0.0,
+                                   help="Leave at 0 if no price is agreed yet")
             frequency = st.selectbox(
                 "Cleaning Frequency",
                 ["Weekly", "Fortnightly", "Monthly", "3-Monthly"]
@@ -105,35 +176,67 @@ def show_clients():
             
             if st.form_submit_button("Add Client"):
                 db = get_db()
-                new_client = Client(
-                    name=name,
-                    contact=contact,
-                    address=address,
-                    frequency=frequency,
-                    gst_type=GSTType(gst_type),
-                    payment_mode=PaymentMode(payment_mode)
-                )
-                db.add(new_client)
-                db.commit()
-                st.success("Client added successfully!")
+                phone = normalize_phone_numbers(pd.Series([contact.strip()]))
+                phone_key = phone.iloc[0] if valid_phone_numbers(phone).iloc[0] else None
+                if phone_key and db.query(Client.id).filter(Client.phone_key == phone_key).first():
+                    st.error(f"A client with phone number {phone_key} already exists")
+                else:
+                    new_client = Client(
+                        name=name,
+                        contact=phone_key or contact,
+                        phone_key=phone_key,
+                        address=address,
+                        # 0 means no price yet: invoicing skips and reports the client
+                        rate=rate or None,
+                        frequency=frequency,
+                        gst_type=GSTType(gst_type),
+                        payment_mode=PaymentMode(payment_mode)
+                    )
+                    db.add(new_client)
+                    db.commit()
+                    st.success("Client added successfully!")
+    
+    with tab3:
+        st.write("Upload a CSV with the columns: " + ", ".join(IMPORT_COLUMNS) +
+                 ". Only Client Name and Phone Number are required. Clients are matched on "
+                 "phone number: existing clients are updated, new ones are added.")
+        import_file = st.file_uploader("Client CSV", type=["csv"], key="client_import")
+        if import_file is not None and st.button("Import Clients"):
+            db = get_db()
+            try:
+                with st.spinner("Importing clients..."):
+                    result = import_clients(db, import_file)
+            except ValueError as e:
+                st.error(str(e))
+            else:
+                st.success(f"Added {result.inserted} and updated {result.updated} of "
+                           f"{result.total_rows} clients")
+                if not result.errors.empty:
+                    st.warning(f"{len(result.errors)} rows were not imported")
+                    st.dataframe(result.errors, hide_index=True)
+                    st.download_button("Download error report", result.errors.to_csv(index=False),
+                                       file_name="client_import_errors.csv", mime="text/csv")
 
+@metrics.page
 def show_team():
+    from utils.queries import cleaner_page
+    
     st.header("Team Management")
     
     tab1, tab2 = st.tabs(["Team List", "Add Team Member"])
     
     with tab1:
         db = get_db()
-        cleaners = db.query(Cleaner).all()
-        if cleaners:
-            cleaner_data = []
-            for cleaner in cleaners:
-                cleaner_data.append({
-                    "Name": cleaner.name,
-                    "Cost Rate": f"${cleaner.cost_rate:.2f}",
-                    "Type": cleaner.employment_type.value
-                })
-            st.dataframe(pd.DataFrame(cleaner_data))
+        col1, col2 = st.columns([3, 1])
+        with col1:
+            search = st.text_input("Search team", key="team_search")
+        with col2:
+            sort_by = st.selectbox("Sort by", ["Name", "Cost Rate"], key="team_sort")
+        show_paginated(
+            f"team:{search}:{sort_by}",
+            lambda cursor: cleaner_page(db, search, sort_by, after=cursor),
+            ("cleaners",)
+        )
     
     with tab2:
         with st.form("new_team_member_form"):
@@ -160,52 +263,211 @@ def show_team():
                 db.commit()
                 st.success("Team member added successfully!")
 
+@metrics.page
 def show_roster():
+    from utils.roster import JOB_HOURS, generate_roster, next_week_start, week_roster
+    from utils.materializer import materialize_jobs
+    from utils.bookings import audit_conflicts, bookings
+    from utils.geocoding import CENTROIDS_FILE, geocode_clients, load_centroids
+    from utils.sequencing import sequence_week
+    from sqlalchemy import select
+    
     st.header("Roster Management")
     
-    col1, col2 = st.columns([2, 1])
+    db = get_db()
+    week_start = st.date_input("Week starting", value=next_week_start(), key="roster_week")
+    week_start -= timedelta(days=week_start.weekday())
     
-    with col1:
-        st.subheader("Weekly Roster")
-        # Add calendar view here
+    col1, col2 = st.columns([2, 1])
     
     with col2:
         st.subheader("Quick Actions")
         if st.button("Generate Next Week's Roster"):
-            st.info("Generating roster...")
-            # Add roster generation logic here
+            with st.spinner("Generating roster..."):
+                result = generate_roster(db, next_week_start())
+            st.success(f"Assigned {result.assigned} jobs ({result.created} new) "
+                       f"at a total cost of ${result.total_cost:,.2f}")
+            if result.unassigned:
+                st.warning(f"{len(result.unassigned)} jobs could not be assigned. "
+                           "Check team availability and capacity.")
+        if st.button("Update Recurring Jobs"):
+            result = materialize_jobs(db)
+            st.success(f"Created {result.created} recurring jobs for {result.clients} clients")
+        if st.button("Optimise Travel", help="Reorder each cleaner's jobs in the selected week, day by day, "
+                                              "to cut driving between clients"):
+            with st.spinner("Sequencing jobs..."):
+                if CENTROIDS_FILE:
+                    # Locate clients added since the last run
+                    geocode_clients(db, load_centroids())
+                result = sequence_week(db, week_start)
+            st.success(f"Reordered {result.jobs_moved} jobs: {result.km_before:,.0f} km "
+                       f"of travel down to {result.km_after:,.0f} km")
+            if result.unlocated:
+                st.warning(f"{result.unlocated} jobs were left as they were because the client has no "
+                           "coordinates. Check their addresses end in a postcode.")
+        check_conflicts = st.button("Check Conflicts")
 
+        st.subheader("Who's Free")
+        day = st.selectbox("Day", [week_start + timedelta(days=d) for d in range(7)],
+                           format_func=lambda d: d.strftime("%A %d %b"), key="free_day")
+        slot_start = datetime.combine(day, st.time_input("Start time", value=time(9, 0), key="free_time"))
+        bookings.refresh(db)
+        free = bookings.free_cleaners(slot_start, slot_start + timedelta(hours=JOB_HOURS))
+        names = reads.get("cleaner_names", ("cleaners",),
+                          lambda: dict(db.execute(select(Cleaner.id, Cleaner.name)).all()))
+        st.write(", ".join(sorted(names[c] for c in free if c in names)) or "Nobody is free then")
+    
+    with col1:
+        st.subheader("Weekly Roster")
+        roster = reads.get(("week_roster", week_start), ("jobs", "clients", "cleaners"),
+                           lambda: week_roster(db, week_start))
+        if roster.empty:
+            st.info("No jobs rostered for this week")
+        else:
+            st.dataframe(roster, hide_index=True)
+
+    if check_conflicts:
+        quarter_end = week_start + timedelta(weeks=13, days=-1)
+        with st.spinner("Checking the schedule..."):
+            conflicts = audit_conflicts(db, week_start, quarter_end)
+        if conflicts.empty:
+            st.success(f"No double bookings or availability conflicts up to {quarter_end:%d %b %Y}")
+        else:
+            st.warning(f"{len(conflicts)} jobs up to {quarter_end:%d %b %Y} have conflicts")
+            st.dataframe(conflicts, hide_index=True)
+
+@metrics.page
 def show_invoices():
+    from utils.queries import invoice_page
+    from utils.invoicing import count_uninvoiced_jobs, generate_invoices
+    from utils.reconciliation import reconcile_statement
+    
     st.header("Invoice Management")
     
-    tab1, tab2 = st.tabs(["Invoice List", "Generate Invoice"])
+    tab1, tab2, tab3 = st.tabs(["Invoice List", "Generate Invoice", "Reconcile Payments"])
     
     with tab1:
         db = get_db()
-        invoices = db.query(Invoice).all()
-        if invoices:
-            invoice_data = []
-            for invoice in invoices:
-                invoice_data.append({
-                    "Invoice #": invoice.id,
-                    "Client": invoice.job.client.name,
-                    "Amount": f"${invoice.amount:.2f}",
-                    "GST": f"${invoice.gst:.2f}",
-                    "Status": invoice.status
-                })
-            st.dataframe(pd.DataFrame(invoice_data))
+        status = st.selectbox("Status", ["All", "Pending", "Paid", "Overdue"], key="invoice_status")
+        status = "" if status == "All" else status
+        show_paginated(
+            f"invoices:{status}",
+            lambda cursor: invoice_page(db, status, after=cursor),
+            ("invoices", "jobs", "clients")
+        )
     
     with tab2:
-        st.info("Select a completed job to generate an invoice")
-        # Add invoice generation form here
+        pending_jobs = reads.get("uninvoiced_jobs", ("jobs", "invoices", "clients"),
+                                 lambda: count_uninvoiced_jobs(db))
+        st.info(f"{pending_jobs} completed jobs have not been invoiced yet")
+        if st.button("Generate Invoices for Completed Jobs", disabled=pending_jobs == 0):
+            with st.spinner("Generating invoices..."):
+                result = generate_invoices(db)
+            st.success(f"Created {result.created} invoices totalling ${result.amount:,.2f} "
+                       f"plus ${result.gst:,.2f} GST")
+            if result.skipped:
+                st.warning(f"{result.skipped} jobs were skipped because the client has no price per clean")
+    
+    with tab3:
+        st.write("Upload a bank statement CSV with Date, Amount and Reference or Description "
+                 "columns. Deposits quoting an open invoice number (e.g. INV-123) for the invoice "
+                 "total are recorded as bank transfer payments and the invoices marked Paid.")
+        statement_file = st.file_uploader("Bank statement CSV", type=["csv"], key="bank_statement")
+        if statement_file is not None and st.button("Reconcile Payments"):
+            db = get_db()
+            try:
+                with st.spinner("Matching transactions..."):
+                    result = reconcile_statement(db, statement_file)
+            except ValueError as e:
+                st.error(str(e))
+            else:
+                st.success(f"Matched {result.matched} of {result.total_lines - result.debits} deposits "
+                           f"totalling ${result.amount:,.2f}")
+                if not result.unmatched.empty:
+                    st.warning(f"{len(result.unmatched)} deposits need review")
+                    st.dataframe(result.unmatched, hide_index=True)
+                    st.download_button("Download review list", result.unmatched.to_csv(index=False),
+                                       file_name="unmatched_transactions.csv", mime="text/csv")
+
+@metrics.page
+def show_reports():
+    from utils.analytics import MARGIN_DIMENSIONS, cleaner_utilization, days_to_pay, margins, revenue_by_month
+    
+    st.header("Reports")
+    
+    db = get_db()
+    today = datetime.now().date()
+    period = st.date_input("Period", value=(today - timedelta(days=365), today), key="report_period")
+    if len(period) != 2:
+        st.info("Select a start and end date")
+        return
+    start, end = period
+    
+    tab1, tab2, tab3, tab4 = st.tabs(["Margins", "Revenue by Month", "Cleaner Utilization", "Days to Pay"])
+    
+    with tab1:
+        by = st.selectbox("Group by", list(MARGIN_DIMENSIONS), key="margin_by")
+        report = margins(db, start, end, by)
+        if report.empty:
+            st.info("No invoiced jobs in this period")
+        else:
+            col1, col2, col3 = st.columns(3)
+            revenue, cost = report["Revenue"].sum(), report["Cost"].sum()
+            with col1:
+                st.metric("Revenue", f"${revenue:,.2f}")
+            with col2:
+                st.metric("Cost", f"${cost:,.2f}")
+            with col3:
+                st.metric("Margin", f"${revenue - cost:,.2f}",
+                          f"{100 * (revenue - cost) / revenue:.1f}%" if revenue else None)
+            st.dataframe(report.round(2), hide_index=True)
+    
+    with tab2:
+        report = revenue_by_month(db, start, end)
+        if report.empty:
+            st.info("No invoices in this period")
+        else:
+            st.bar_chart(report, x="Month", y=["Revenue", "Paid"])
+            st.dataframe(report.round(2), hide_index=True)
+    
+    with tab3:
+        report = cleaner_utilization(db, start, end)
+        if report.empty:
+            st.info("No team members yet")
+        else:
+            st.dataframe(report.round(1), hide_index=True)
+    
+    with tab4:
+        report = days_to_pay(db, start, end)
+        if report.empty:
+            st.info("No payments received in this period")
+        else:
+            st.dataframe(report, hide_index=True)
 
+@metrics.page
 def show_messaging():
+    import pandas as pd
+    from sqlalchemy import select
+    from utils.messaging import get_message_service
+    from utils.dispatch import BulkDispatcher, HistoryWriter, OutgoingMessage, schedule_messages
+    from utils.recipients import load_recipients
+    from utils.templates import compile_template, estimate_campaign, templates as compiled_templates
+    from utils.queries import message_history_page
+    from utils.retention import archived_history_page
+    
     st.header("Messaging")
     
-    # Initialize message service
-    msg_service = MessageService()
+    # Shared per process so its keep-alive connections survive reruns
+    msg_service = get_message_service()
     db = get_db()
     
+    def load_templates():
+        # Plain rows rather than instances, so cached ones outlive the session
+        return reads.get("message_templates", ("message_templates",), lambda: db.execute(
+            select(MessageTemplate.id, MessageTemplate.name, MessageTemplate.content,
+                   MessageTemplate.updated_at).order_by(MessageTemplate.id)
+        ).all())
+    
     # Create tabs for different messaging functions
     tab1, tab2, tab3 = st.tabs(["Send Messages", "Message Templates", "Message History"])
     
@@ -215,12 +477,22 @@ def show_messaging():
         
         if uploaded_file is not None:
             try:
-                df = pd.read_csv(uploaded_file)
+                recipient_set = load_recipients(uploaded_file)
+                df = recipient_set.recipients
+                
+                # Display a sample of the data
+                st.write(f"Preview of uploaded data (first {len(recipient_set.preview)} "
+                         f"of {recipient_set.total_rows} rows):")
+                st.dataframe(recipient_set.preview)
+                st.info(f"{len(df)} recipients found, {recipient_set.duplicates} duplicate phone numbers removed")
+                
+                if not recipient_set.invalid.empty:
+                    st.warning(f"{len(recipient_set.invalid)} rows have missing or invalid phone numbers and will be skipped")
+                    with st.expander("Show invalid rows"):
+                        st.dataframe(recipient_set.invalid)
                 
-                # Verify required columns
-                required_columns = ["Client Name", "Phone Number"]
-                if not all(col in df.columns for col in required_columns):
-                    st.error("CSV must contain columns: 'Client Name' and 'Phone Number'")
+                if df.empty:
+                    st.error("No valid entries found in the CSV file.")
                 else:
                     # Display trial account warning
                     st.warning("""
@@ -229,26 +501,36 @@ def show_messaging():
                     Or upgrade your Twilio account to remove this restriction.
                     """)
                     
-                    # Display the data
-                    st.write("Preview of uploaded data:")
-                    st.dataframe(df)
-                    
                     # Template selection
-                    templates = db.query(MessageTemplate).all()
-                    template_names = ["Custom Message"] + [t.name for t in templates]
+                    templates = load_templates()
+                    templates_by_name = {t.name: t for t in templates}
+                    template_names = ["Custom Message"] + list(templates_by_name)
                     selected_template = st.selectbox("Select Message Template", template_names)
                     
                     if selected_template == "Custom Message":
                         message = st.text_area("Enter your message:", 
-                            help="You can use {Client Name} as a placeholder that will be replaced with the actual client name")
+                            help="Use {Column Name} placeholders, e.g. {Client Name}, to fill in "
+                                 "any column from your CSV")
+                        compiled = compile_template(message)
                     else:
-                        template = db.query(MessageTemplate).filter(MessageTemplate.name == selected_template).first()
+                        template = templates_by_name[selected_template]
                         message = template.content
-                        
-                        # Show preview with sample data
-                        preview = message.replace("{Client Name}", "John Doe")
-                        st.text_area("Message Preview (with sample data):", preview, disabled=True)
-                        st.info("The actual message will use the client names from your CSV file.")
+                        compiled = compiled_templates.get(template)
+                    
+                    missing = compiled.missing_columns(df.columns)
+                    if message and missing:
+                        st.error(f"The message uses columns that are not in your CSV: {', '.join(missing)}")
+                        message = None
+                    elif message:
+                        # Preview with the first recipient's data, and what the whole send will cost
+                        st.text_area("Message Preview (first recipient):", compiled.render(df.iloc[0]), disabled=True)
+                        estimate = estimate_campaign(compiled, df)
+                        st.info(
+                            f"{estimate.messages} messages, {estimate.segments} SMS segments "
+                            f"(up to {estimate.max_segments} per message"
+                            + (f", {estimate.unicode_messages} need Unicode" if estimate.unicode_messages else "")
+                            + f"), estimated cost ${estimate.cost:,.2f}"
+                        )
                     
                     # Scheduling options
                     schedule_msg = st.checkbox("Schedule Message")
@@ -265,83 +547,53 @@ def show_messaging():
                         if not message:
                             st.error("Please enter a message or select a template")
                         else:
-                            # Prepare data and validate phone numbers
-                            valid_entries = []
-                            has_errors = False
-                            
-                            for index, row in df.iterrows():
-                                try:
-                                    phone = msg_service.format_phone_number(row["Phone Number"])
-                                    valid_entries.append({
-                                        "index": index,
-                                        "client_name": row["Client Name"],
-                                        "phone": phone
-                                    })
-                                except Exception as e:
-                                    st.error(f"Invalid phone number for {row['Client Name']}: {str(e)}")
-                                    has_errors = True
-                            
-                            if has_errors:
-                                st.warning("Please fix the errors above and try again.")
-                                return
-                            
+                            # Personalize messages for each recipient
+                            bodies = compiled.render_frame(df)
+                            valid_entries = [
+                                OutgoingMessage(phone=phone, body=body, client_name=name)
+                                for name, phone, body in zip(df["Client Name"], df["Phone Number"], bodies)
+                            ]
                             total_messages = len(valid_entries)
-                            if total_messages == 0:
-                                st.error("No valid entries found in the CSV file.")
+                            
+                            if scheduled_time:
+                                scheduled = schedule_messages(db, valid_entries, scheduled_time)
+                                st.success(f"Successfully scheduled {scheduled} out of {total_messages} messages for {scheduled_time}")
                                 return
                             
                             progress_bar = st.progress(0.0)
-                            success_count = 0
+                            status_text = st.empty()
+                            failures = []
                             
-                            for i, entry in enumerate(valid_entries):
-                                try:
-                                    # Create message history record
-                                    history = MessageHistory(
-                                        client_name=entry["client_name"],
-                                        phone_number=entry["phone"],
-                                        message=message,
-                                        scheduled_for=scheduled_time
-                                    )
-                                    
-                                    if not scheduled_time:
-                                        # Replace template variables
-                                        personalized_message = message.replace("{Client Name}", entry["client_name"])
-                                        
-                                        # Send message immediately
-                                        result = msg_service.send_message(entry["phone"], personalized_message)
-                                        history.status = "success" if result["success"] else "failed"
-                                        history.error = result.get("error")
-                                        history.sent_at = datetime.utcnow() if result["success"] else None
-                                        
-                                        if result["success"]:
-                                            success_count += 1
-                                            st.success(f"Message sent to {entry['client_name']} ({entry['phone']})")
-                                        else:
-                                            st.error(f"Failed to send message to {entry['client_name']} ({entry['phone']}): {result.get('error')}")
-                                    else:
-                                        history.status = "scheduled"
-                                        success_count += 1
-                                    
-                                    db.add(history)
-                                    db.commit()
-                                    
-                                    # Update progress bar
-                                    current_progress = float(i + 1) / float(total_messages)
-                                    progress_bar.progress(current_progress)
-                                except Exception as e:
-                                    st.error(f"Error sending message to {entry['client_name']}: {str(e)}")
-                                    continue
+                            def on_batch(results):
+                                HistoryWriter(db)(results)
+                                failures.extend(r for r in results if not r.success)
                             
-                            # Show final status
-                            if scheduled_time:
-                                st.success(f"Successfully scheduled {success_count} out of {total_messages} messages for {scheduled_time}")
-                            else:
-                                st.success(f"Successfully sent {success_count} out of {total_messages} messages")
+                            def on_progress(progress):
+                                progress_bar.progress(progress.fraction)
+                                status_text.text(
+                                    f"Sent {progress.done}/{progress.total} "
+                                    f"({progress.failed} failed) at {progress.rate:.1f} msgs/sec"
+                                )
                             
-                            if scheduled_time:
-                                st.success(f"Messages scheduled for {scheduled_time}")
-                            else:
-                                st.success("Messages sent successfully!")
+                            dispatcher = BulkDispatcher(msg_service)
+                            summary = dispatcher.dispatch(valid_entries, on_batch=on_batch, on_progress=on_progress)
+                            
+                            # Show final status
+                            st.success(
+                                f"Successfully sent {summary.succeeded} out of {total_messages} messages "
+                                f"in {summary.elapsed:.1f}s ({summary.rate:.1f} msgs/sec)"
+                            )
+                            st.caption(
+                                f"Twilio API latency: p50 {msg_service.latency.percentile(50) * 1000:.0f} ms, "
+                                f"p95 {msg_service.latency.percentile(95) * 1000:.0f} ms"
+                            )
+                            if failures:
+                                st.error(f"{len(failures)} messages failed")
+                                st.dataframe(pd.DataFrame([{
+                                    "Client": r.message.client_name,
+                                    "Phone": r.message.phone,
+                                    "Error": r.error
+                                } for r in failures]))
             except Exception as e:
                 st.error(f"Error: {str(e)}")
     
@@ -351,7 +603,8 @@ def show_messaging():
         # Add new template form
         with st.form("new_template"):
             template_name = st.text_input("Template Name")
-            template_content = st.text_area("Template Content")
+            template_content = st.text_area("Template Content",
+                help="Use {Column Name} placeholders, e.g. {Client Name}, to fill in columns from the CSV")
             
             if st.form_submit_button("Add Template"):
                 if template_name and template_content:
@@ -363,13 +616,13 @@ def show_messaging():
                     st.error("Please fill in all fields")
         
         # Display existing templates
-        templates = db.query(MessageTemplate).all()
+        templates = load_templates()
         if templates:
             for template in templates:
                 with st.expander(f"Template: {template.name}"):
                     st.text_area("Content", template.content, disabled=True)
                     if st.button(f"Delete {template.name}"):
-                        db.delete(template)
+                        db.delete(db.get(MessageTemplate, template.id))
                         db.commit()
                         st.success("Template deleted!")
                         st.rerun()
@@ -377,20 +630,31 @@ def show_messaging():
     with tab3:
         st.subheader("Message History")
         
+        archived = st.checkbox("Search archived messages", key="history_archived",
+                               help="Messages older than the retention period are moved to archive files")
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            status = st.selectbox("Status", ["All", "success", "failed", "scheduled", "sending"],
+                                  key="history_status")
+            status = "" if status == "All" else status
+        with col2:
+            start = st.date_input("From", value=None, key="history_start")
+        with col3:
+            end = st.date_input("To", value=None, key="history_end")
+        
         # Display message history
-        history = db.query(MessageHistory).order_by(MessageHistory.created_at.desc()).all()
-        if history:
-            history_data = []
-            for h in history:
-                history_data.append({
-                    "Client": h.client_name,
-                    "Phone": h.phone_number,
-                    "Status": h.status,
-                    "Scheduled For": h.scheduled_for,
-                    "Sent At": h.sent_at,
-                    "Error": h.error or ""
-                })
-            st.dataframe(pd.DataFrame(history_data))
+        if archived:
+            show_paginated(
+                f"history-archive:{status}:{start}:{end}",
+                lambda cursor: archived_history_page(status, start, end, after=cursor),
+                ("message_history",)
+            )
+        else:
+            show_paginated(
+                f"history:{status}:{start}:{end}",
+                lambda cursor: message_history_page(db, status, start, end, after=cursor),
+                ("message_history",)
+            )
 
 if __name__ == "__main__":
     main()
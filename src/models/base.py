@@ -1,6 +1,8 @@
-from sqlalchemy import create_engine
+from contextlib import contextmanager
+from time import monotonic
+from sqlalchemy import Select, create_engine, event
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import Session, scoped_session, sessionmaker
 from dotenv import load_dotenv
 import os
 import sys
@@ -13,22 +15,111 @@ if src_path not in sys.path:
 load_dotenv()
 
 DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./cleaning_business.db")
+# Optional read replica for pages, lists and reports; unset reads from DATABASE_URL
+DATABASE_READ_URL = os.getenv("DATABASE_READ_URL", "")
 
-# Handle special case for SQLite
-if DATABASE_URL.startswith("sqlite"):
-    engine = create_engine(
-        DATABASE_URL, connect_args={"check_same_thread": False}
-    )
-else:
-    # For PostgreSQL with SSL support
-    engine = create_engine(
-        DATABASE_URL,
-        connect_args={
-            "sslmode": "require"
-        }
+# Negative values are in KiB, as SQLite expects for PRAGMA cache_size
+SQLITE_CACHE_SIZE = int(os.getenv("SQLITE_CACHE_SIZE", "-64000"))
+
+# Seconds after a write committed by this process during which reads stay on
+# the primary, so a page shows its own change before the replica catches up
+REPLICA_LAG_SECONDS = float(os.getenv("DB_REPLICA_LAG_SECONDS", "5"))
+
+
+def _sqlite_pragmas(dbapi_connection, connection_record):
+    # WAL lets the app read while the worker writes; NORMAL sync is
+    # durable across application crashes in WAL mode
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.execute(f"PRAGMA cache_size={SQLITE_CACHE_SIZE}")
+    cursor.execute("PRAGMA temp_store=MEMORY")
+    cursor.execute("PRAGMA busy_timeout=5000")
+    cursor.close()
+
+
+def make_engine(url: str):
+    # Handle special case for SQLite
+    if url.startswith("sqlite"):
+        sqlite_engine = create_engine(url, connect_args={"check_same_thread": False})
+        event.listen(sqlite_engine, "connect", _sqlite_pragmas)
+        return sqlite_engine
+    # PostgreSQL; DB_SSLMODE=disable for a local container without SSL
+    return create_engine(
+        url,
+        connect_args={"sslmode": os.getenv("DB_SSLMODE", "require")},
+        pool_size=int(os.getenv("DB_POOL_SIZE", "5")),
+        max_overflow=int(os.getenv("DB_MAX_OVERFLOW", "10")),
+        pool_timeout=float(os.getenv("DB_POOL_TIMEOUT", "30")),
+        # Test each connection as it is checked out, and replace connections
+        # before a server or proxy idle timeout closes them under us
+        pool_pre_ping=True,
+        pool_recycle=int(os.getenv("DB_POOL_RECYCLE", "1800")),
     )
 
+
+engine = make_engine(DATABASE_URL)
+read_engine = make_engine(DATABASE_READ_URL) if DATABASE_READ_URL else engine
+
+from utils import metrics  # noqa: E402 - needs src on sys.path, set above
+
+if metrics.ENABLED:
+    # Per-page statement counts and timings; no listeners at all when disabled
+    metrics.instrument_engine(engine)
+    if read_engine is not engine:
+        metrics.instrument_engine(read_engine)
+
+_WROTE = "_routing_wrote"
+_last_write = 0.0  # monotonic time of the last commit that wrote anything
+
+
+class RoutingSession(Session):
+    """Sends plain SELECTs to ``read_engine`` and everything else to ``engine``.
+
+    Once the session has written in its transaction, or a write was
+    committed by this process in the last REPLICA_LAG_SECONDS, reads go to
+    the primary as well, so nothing reads around its own changes. SELECT
+    ... FOR UPDATE always goes to the primary.
+    """
+
+    def get_bind(self, mapper=None, clause=None, **kwargs):
+        if (read_engine is engine or not isinstance(clause, Select) or clause._for_update_arg is not None
+                or self._flushing or self.info.get(_WROTE)
+                or monotonic() - _last_write < REPLICA_LAG_SECONDS):
+            return engine
+        return read_engine
+
+
+@event.listens_for(RoutingSession, "after_flush")
+def _flushed(session, flush_context):
+    session.info[_WROTE] = True
+
+
+@event.listens_for(RoutingSession, "do_orm_execute")
+def _executed(orm_execute_state):
+    if not orm_execute_state.is_select:
+        orm_execute_state.session.info[_WROTE] = True
+
+
+@event.listens_for(RoutingSession, "after_commit")
+def _committed(session):
+    global _last_write
+    if session.info.pop(_WROTE, None):
+        _last_write = monotonic()
+
+
+@event.listens_for(RoutingSession, "after_rollback")
+def _rolled_back(session):
+    session.info.pop(_WROTE, None)
+
+
+# Workers and API writes: everything on the primary
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+# Read-only work, such as API lists and reports
+ReadSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=read_engine)
+# The Streamlit app: one session per script run, reads routed to the replica.
+# Call remove() when the run ends.
+AppSession = scoped_session(sessionmaker(class_=RoutingSession, autocommit=False, autoflush=False))
 
 Base = declarative_base()
 
@@ -39,21 +130,32 @@ def get_db():
     finally:
         db.close()
 
-# Import all models here
-from .models import Client, Cleaner, Job, Roster, Invoice, Payment, MessageTemplate, MessageHistory
+def get_read_db():
+    """Like get_db, for endpoints that only read; uses the replica when there is one"""
+    db = ReadSessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+@contextmanager
+def app_session():
+    """Scope AppSession to a block, e.g. one Streamlit script run"""
+    try:
+        yield AppSession()
+    finally:
+        AppSession.remove()
 
 def init_db():
-    """Initialize the database tables"""
+    """Initialize the database tables and apply pending migrations.
+
+    Run explicitly (python src/models/init_db.py) rather than on import, so
+    importing the models never issues DDL.
+    """
+    from . import models  # noqa: F401 - registers the tables on Base.metadata
+    from .migrations import migrate
+
     print("Creating database tables...")
     Base.metadata.create_all(bind=engine)
+    migrate(engine)
     print("Database tables created successfully!")
-
-# Initialize tables
-init_db()
-
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
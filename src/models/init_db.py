@@ -1,9 +1,12 @@
-from .base import Base, engine
-from .models import Client, Cleaner, Job, Roster, Invoice, Payment
+import os
+import sys
 
-def init_db():
-    Base.metadata.create_all(bind=engine)
-    print("Database tables created successfully!")
+# Put the src directory ahead of this script's own directory, so that
+# "models" resolves to the package rather than models/models.py
+src_path = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, src_path)
+
+from models.base import init_db
 
 if __name__ == "__main__":
     init_db()
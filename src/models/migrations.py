@@ -0,0 +1,160 @@
+"""Versioned schema migrations.
+
+``Base.metadata.create_all`` only creates missing tables, so columns and
+indexes added to existing tables are applied here. Each migration runs once,
+in order, and is recorded in the ``schema_migrations`` table. Migrations are
+written to be safe on a database that ``create_all`` has just built, where
+the columns and indexes already exist.
+"""
+from datetime import datetime
+
+from sqlalchemy import Column, DateTime, Integer, MetaData, String, Table, bindparam, inspect, select, text
+
+from .base import Base
+
+migration_metadata = MetaData()
+
+schema_migrations = Table(
+    "schema_migrations",
+    migration_metadata,
+    Column("version", Integer, primary_key=True),
+    Column("description", String),
+    Column("applied_at", DateTime),
+)
+
+# Indexes backing the list views, dashboard, roster, invoicing and scheduler queries
+HOT_QUERY_INDEXES = [
+    "ix_jobs_date",
+    "ix_jobs_status_date",
+    "ix_jobs_client_id_date",
+    "ix_jobs_cleaner_id_date",
+    "ix_rosters_job_id",
+    "ix_invoices_job_id",
+    "ix_invoices_status_created_at",
+    "ix_payments_invoice_id",
+    "ix_message_history_created_at",
+    "ix_message_history_status_scheduled_for",
+]
+
+
+def add_columns(conn, table_name, column_names):
+    """Add model columns that are missing from an existing table"""
+    table = Base.metadata.tables[table_name]
+    existing = {c["name"] for c in inspect(conn).get_columns(table_name)}
+    for name in column_names:
+        if name in existing:
+            continue
+        column = table.c[name]
+        column_type = column.type.compile(dialect=conn.dialect)
+        conn.execute(text(f'ALTER TABLE {table_name} ADD COLUMN {name} {column_type}'))
+
+
+def create_indexes(conn, index_names):
+    """Create model indexes by name if they do not exist yet"""
+    indexes = {index.name: index for table in Base.metadata.tables.values() for index in table.indexes}
+    for name in index_names:
+        indexes[name].create(conn, checkfirst=True)
+
+
+def _add_scheduling_and_billing_columns(conn):
+    add_columns(conn, "message_history", ["claimed_by", "claimed_at"])
+    add_columns(conn, "clients", ["jobs_materialized_until", "materialized_frequency", "rate"])
+
+
+def _add_hot_query_indexes(conn):
+    create_indexes(conn, HOT_QUERY_INDEXES)
+    if conn.dialect.name == "sqlite":
+        conn.execute(text("ANALYZE"))
+    else:
+        conn.execute(text("ANALYZE jobs, invoices, payments, message_history, rosters"))
+
+
+def _add_client_phone_key(conn):
+    import pandas as pd
+    from utils.recipients import normalize_phone_numbers, valid_phone_numbers
+
+    add_columns(conn, "clients", ["phone_key"])
+    clients = Base.metadata.tables["clients"]
+    rows = conn.execute(select(clients.c.id, clients.c.contact)
+                        .where(clients.c.phone_key.is_(None)).order_by(clients.c.id)).all()
+    if rows:
+        # Backfill from contact; where clients share a number the oldest keeps it
+        frame = pd.DataFrame(rows, columns=["id", "contact"])
+        frame["phone_key"] = normalize_phone_numbers(frame["contact"].fillna("").str.strip())
+        frame = frame[valid_phone_numbers(frame["phone_key"])].drop_duplicates("phone_key")
+        if not frame.empty:
+            conn.execute(
+                clients.update().where(clients.c.id == bindparam("_id")).values(phone_key=bindparam("_key")),
+                [{"_id": int(i), "_key": key} for i, key in zip(frame["id"], frame["phone_key"])],
+            )
+    create_indexes(conn, ["ix_clients_phone_key"])
+
+
+def _add_job_intervals(conn):
+    import pandas as pd
+    from utils.roster import JOB_HOURS
+
+    add_columns(conn, "jobs", ["start_at", "end_at"])
+    jobs = Base.metadata.tables["jobs"]
+    rows = conn.execute(select(jobs.c.id, jobs.c.date, jobs.c.time)
+                        .where(jobs.c.start_at.is_(None), jobs.c.date.is_not(None))).all()
+    if rows:
+        # Jobs dated at midnight take their start from the time column where it parses
+        frame = pd.DataFrame(rows, columns=["id", "date", "time"])
+        starts = pd.to_datetime(frame["date"])
+        clock = pd.to_timedelta(frame["time"].fillna("").str.strip() + ":00", errors="coerce")
+        at_midnight = starts == starts.dt.normalize()
+        starts = starts.where(~(at_midnight & clock.notna()), starts + clock)
+        ends = starts + pd.Timedelta(hours=JOB_HOURS)
+        conn.execute(
+            jobs.update().where(jobs.c.id == bindparam("_id")).values(start_at=bindparam("_start"),
+                                                                      end_at=bindparam("_end")),
+            [{"_id": int(i), "_start": start, "_end": end}
+             for i, start, end in zip(frame["id"], starts.dt.to_pydatetime(), ends.dt.to_pydatetime())],
+        )
+    # updated_at lets the booking index pick up only the jobs changed since it last looked
+    create_indexes(conn, ["ix_jobs_start_at", "ix_jobs_updated_at"])
+
+
+def _add_client_coordinates(conn):
+    add_columns(conn, "clients", ["latitude", "longitude"])
+
+
+def _add_message_delivery_status(conn):
+    add_columns(conn, "message_history", ["message_sid", "delivery_status", "delivery_updated_at"])
+    create_indexes(conn, ["ix_message_history_message_sid"])
+
+
+def _add_client_materialized_anchor(conn):
+    add_columns(conn, "clients", ["materialized_anchor"])
+
+
+MIGRATIONS = [
+    (1, "Add scheduler claim, job materialization and client rate columns", _add_scheduling_and_billing_columns),
+    (2, "Add indexes for hot queries", _add_hot_query_indexes),
+    (3, "Add unique normalized phone key to clients", _add_client_phone_key),
+    (4, "Add job start and end times and their indexes", _add_job_intervals),
+    (5, "Add client latitude and longitude", _add_client_coordinates),
+    (6, "Add Twilio message sid and delivery status to message history", _add_message_delivery_status),
+    (7, "Add recurring job anchor to clients", _add_client_materialized_anchor),
+]
+
+
+def migrate(engine) -> list:
+    """Apply pending migrations and return the versions applied"""
+    migration_metadata.create_all(bind=engine)
+    with engine.connect() as conn:
+        applied = set(conn.execute(schema_migrations.select().with_only_columns(
+            schema_migrations.c.version)).scalars())
+
+    newly_applied = []
+    for version, description, upgrade in MIGRATIONS:
+        if version in applied:
+            continue
+        print(f"Applying migration {version}: {description}")
+        with engine.begin() as conn:
+            upgrade(conn)
+            conn.execute(schema_migrations.insert().values(
+                version=version, description=description, applied_at=datetime.utcnow()))
+        newly_applied.append(version)
+    return newly_applied
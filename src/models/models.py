@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey, Boolean, Enum
+from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey, Boolean, Enum, Index
 from sqlalchemy.orm import relationship
 from .base import Base
 import enum
@@ -26,16 +26,31 @@ class Client(Base):
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String, index=True)
     contact = Column(String)
+    # contact normalized to E.164; the unique key bulk imports upsert on
+    phone_key = Column(String, nullable=True)
     address = Column(String)
+    # Centroid of the address's postcode, for sequencing a cleaner's day
+    latitude = Column(Float, nullable=True)
+    longitude = Column(Float, nullable=True)
     frequency = Column(String)  # Weekly, Fortnightly, Monthly, 3-Monthly
     preferences = Column(String)
+    rate = Column(Float, nullable=True)  # Price per clean, excluding GST
     gst_type = Column(Enum(GSTType))
     payment_mode = Column(Enum(PaymentMode))
+    # Date of the last recurring job generated, and the frequency it was generated for
+    jobs_materialized_until = Column(DateTime, nullable=True)
+    materialized_frequency = Column(String, nullable=True)
+    # Date the recurring jobs count their intervals from, so monthly jobs keep their day
+    materialized_anchor = Column(DateTime, nullable=True)
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
     jobs = relationship("Job", back_populates="client")
 
+    __table_args__ = (
+        Index("ix_clients_phone_key", "phone_key", unique=True),
+    )
+
 class Cleaner(Base):
     __tablename__ = "cleaners"
 
@@ -57,6 +72,9 @@ class Job(Base):
     cleaner_id = Column(Integer, ForeignKey("cleaners.id"))
     date = Column(DateTime)
     time = Column(String)
+    # When the clean starts and ends; date and time are kept for display
+    start_at = Column(DateTime, nullable=True)
+    end_at = Column(DateTime, nullable=True)
     status = Column(String)  # Scheduled, Completed, Cancelled
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
@@ -66,11 +84,20 @@ class Job(Base):
     roster = relationship("Roster", back_populates="job", uselist=False)
     invoice = relationship("Invoice", back_populates="job", uselist=False)
 
+    __table_args__ = (
+        Index("ix_jobs_date", "date"),
+        Index("ix_jobs_status_date", "status", "date"),
+        Index("ix_jobs_client_id_date", "client_id", "date"),
+        Index("ix_jobs_cleaner_id_date", "cleaner_id", "date"),
+        Index("ix_jobs_start_at", "start_at"),
+        Index("ix_jobs_updated_at", "updated_at"),
+    )
+
 class Roster(Base):
     __tablename__ = "rosters"
 
     id = Column(Integer, primary_key=True, index=True)
-    job_id = Column(Integer, ForeignKey("jobs.id"))
+    job_id = Column(Integer, ForeignKey("jobs.id"), index=True)
     cost = Column(Float)
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
@@ -91,6 +118,11 @@ class Invoice(Base):
     job = relationship("Job", back_populates="invoice")
     payment = relationship("Payment", back_populates="invoice", uselist=False)
 
+    __table_args__ = (
+        Index("ix_invoices_job_id", "job_id", unique=True),  # one invoice per job
+        Index("ix_invoices_status_created_at", "status", "created_at"),
+    )
+
 class MessageTemplate(Base):
     __tablename__ = "message_templates"
 
@@ -107,17 +139,28 @@ class MessageHistory(Base):
     client_name = Column(String)
     phone_number = Column(String)
     message = Column(String)
-    status = Column(String)  # success/failed
+    status = Column(String)  # scheduled/sending/success/failed
     error = Column(String, nullable=True)
     scheduled_for = Column(DateTime, nullable=True)
     sent_at = Column(DateTime, nullable=True)
-    created_at = Column(DateTime, default=datetime.utcnow)
+    claimed_by = Column(String, nullable=True)  # worker claim token while sending
+    claimed_at = Column(DateTime, nullable=True)
+    # Twilio's id for the sent message, and the final state its status callback reported
+    message_sid = Column(String, nullable=True)
+    delivery_status = Column(String, nullable=True)  # delivered/undelivered/failed
+    delivery_updated_at = Column(DateTime, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow, index=True)
+
+    __table_args__ = (
+        Index("ix_message_history_status_scheduled_for", "status", "scheduled_for"),
+        Index("ix_message_history_message_sid", "message_sid"),
+    )
 
 class Payment(Base):
     __tablename__ = "payments"
 
     id = Column(Integer, primary_key=True, index=True)
-    invoice_id = Column(Integer, ForeignKey("invoices.id"))
+    invoice_id = Column(Integer, ForeignKey("invoices.id"), index=True)
     mode = Column(Enum(PaymentMode))
     amount = Column(Float)
     payment_date = Column(DateTime)
@@ -125,3 +168,10 @@ class Payment(Base):
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
     invoice = relationship("Invoice", back_populates="payment")
+
+class WorkerCheckpoint(Base):
+    __tablename__ = "worker_checkpoints"
+
+    name = Column(String, primary_key=True)  # e.g. "overdue_sweep"
+    watermark = Column(DateTime)  # how far the worker has processed
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
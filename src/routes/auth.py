@@ -0,0 +1,61 @@
+import hmac
+import os
+from datetime import datetime, timedelta
+
+from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
+from jose import JWTError, jwt
+
+JWT_SECRET_KEY = os.getenv("JWT_SECRET_KEY")
+JWT_ALGORITHM = os.getenv("JWT_ALGORITHM", "HS256")
+ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", "30"))
+
+# The single API account that can exchange credentials for a token
+API_USERNAME = os.getenv("API_USERNAME")
+API_PASSWORD = os.getenv("API_PASSWORD")
+
+oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
+
+router = APIRouter(tags=["auth"])
+
+
+def _secret() -> str:
+    if not JWT_SECRET_KEY:
+        raise HTTPException(status.HTTP_503_SERVICE_UNAVAILABLE, "JWT_SECRET_KEY is not configured")
+    return JWT_SECRET_KEY
+
+
+def create_access_token(subject: str, expires_minutes: int = ACCESS_TOKEN_EXPIRE_MINUTES) -> str:
+    expires = datetime.utcnow() + timedelta(minutes=expires_minutes)
+    return jwt.encode({"sub": subject, "exp": expires}, _secret(), algorithm=JWT_ALGORITHM)
+
+
+def current_user(token: str = Depends(oauth2_scheme)) -> str:
+    """The subject of a valid bearer token; 401 otherwise"""
+    try:
+        claims = jwt.decode(token, _secret(), algorithms=[JWT_ALGORITHM])
+    except JWTError:
+        claims = {}
+    if not claims.get("sub"):
+        raise HTTPException(
+            status.HTTP_401_UNAUTHORIZED,
+            "Invalid or expired token",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    return claims["sub"]
+
+
+@router.post("/token")
+def issue_token(form: OAuth2PasswordRequestForm = Depends()):
+    valid = (
+        API_USERNAME and API_PASSWORD
+        and hmac.compare_digest(form.username.encode(), API_USERNAME.encode())
+        and hmac.compare_digest(form.password.encode(), API_PASSWORD.encode())
+    )
+    if not valid:
+        raise HTTPException(
+            status.HTTP_401_UNAUTHORIZED,
+            "Incorrect username or password",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    return {"access_token": create_access_token(form.username), "token_type": "bearer"}
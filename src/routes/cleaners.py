@@ -0,0 +1,31 @@
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from sqlalchemy import select
+
+from models.base import get_read_db
+from models.models import Cleaner
+from routes.auth import current_user
+from routes.common import DEFAULT_LIMIT, MAX_LIMIT, PageOut, fetch_after, item_response, page_response
+from routes.schemas import CleanerOut
+
+router = APIRouter(prefix="/cleaners", tags=["cleaners"], dependencies=[Depends(current_user)])
+
+
+@router.get("", response_model=PageOut[CleanerOut])
+def list_cleaners(request: Request, response: Response, search: Optional[str] = None,
+                  after: Optional[int] = None, limit: int = Query(DEFAULT_LIMIT, ge=1, le=MAX_LIMIT),
+                  db=Depends(get_read_db)):
+    stmt = select(Cleaner)
+    if search:
+        stmt = stmt.where(Cleaner.name.ilike(f"%{search}%"))
+    rows, next_after = fetch_after(db, stmt, Cleaner.id, after, limit)
+    return page_response(request, response, rows, next_after, CleanerOut)
+
+
+@router.get("/{cleaner_id}", response_model=CleanerOut)
+def get_cleaner(cleaner_id: int, request: Request, response: Response, db=Depends(get_read_db)):
+    cleaner = db.get(Cleaner, cleaner_id)
+    if cleaner is None:
+        raise HTTPException(404, "Cleaner not found")
+    return item_response(request, response, cleaner, CleanerOut)
@@ -0,0 +1,31 @@
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from sqlalchemy import select
+
+from models.base import get_read_db
+from models.models import Client
+from routes.auth import current_user
+from routes.common import DEFAULT_LIMIT, MAX_LIMIT, PageOut, fetch_after, item_response, page_response
+from routes.schemas import ClientOut
+
+router = APIRouter(prefix="/clients", tags=["clients"], dependencies=[Depends(current_user)])
+
+
+@router.get("", response_model=PageOut[ClientOut])
+def list_clients(request: Request, response: Response, search: Optional[str] = None,
+                 after: Optional[int] = None, limit: int = Query(DEFAULT_LIMIT, ge=1, le=MAX_LIMIT),
+                 db=Depends(get_read_db)):
+    stmt = select(Client)
+    if search:
+        stmt = stmt.where(Client.name.ilike(f"%{search}%"))
+    rows, next_after = fetch_after(db, stmt, Client.id, after, limit)
+    return page_response(request, response, rows, next_after, ClientOut)
+
+
+@router.get("/{client_id}", response_model=ClientOut)
+def get_client(client_id: int, request: Request, response: Response, db=Depends(get_read_db)):
+    client = db.get(Client, client_id)
+    if client is None:
+        raise HTTPException(404, "Client not found")
+    return item_response(request, response, client, ClientOut)
@@ -0,0 +1,67 @@
+import hashlib
+from typing import Generic, List, Optional, TypeVar
+
+from fastapi import Request, Response
+from pydantic import BaseModel
+
+DEFAULT_LIMIT = 50
+MAX_LIMIT = 500
+
+T = TypeVar("T")
+
+
+class PageOut(BaseModel, Generic[T]):
+    items: List[T]
+    # Pass as ``after`` to get the next page; null on the last page
+    next_after: Optional[int] = None
+
+
+def fetch_after(db, stmt, key, after: Optional[int], limit: int):
+    """One keyset page of ORM rows ordered by key (the primary key), plus the next cursor"""
+    if after is not None:
+        stmt = stmt.where(key > after)
+    rows = db.execute(stmt.order_by(key).limit(limit + 1)).scalars().all()
+    if len(rows) > limit:
+        return rows[:limit], rows[limit - 1].id
+    return rows, None
+
+
+def version_etag(*versions) -> str:
+    """Weak ETag over (id, updated_at) pairs; changes whenever any row does"""
+    digest = hashlib.blake2b(digest_size=12)
+    for version in versions:
+        digest.update(repr(version).encode())
+    return f'W/"{digest.hexdigest()}"'
+
+
+def not_modified(request: Request, response: Response, etag: str) -> Optional[Response]:
+    """Set the ETag and return a 304 response if the client already has this version"""
+    response.headers["ETag"] = etag
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match and (if_none_match.strip() == "*" or
+                          etag in (tag.strip() for tag in if_none_match.split(","))):
+        return Response(status_code=304, headers={"ETag": etag})
+    return None
+
+
+def page_response(request: Request, response: Response, rows, next_after: Optional[int], schema, versions=None):
+    """PageOut of rows, or 304 if the client's ETag still matches.
+
+    ``versions`` defaults to each row's (id, updated_at); pass it when the
+    response also includes related rows.
+    """
+    if versions is None:
+        versions = [(row.id, row.updated_at) for row in rows]
+    cached = not_modified(request, response, version_etag(next_after, *versions))
+    if cached is not None:
+        return cached
+    return PageOut[schema](items=[schema.model_validate(row) for row in rows], next_after=next_after)
+
+
+def item_response(request: Request, response: Response, row, schema, versions=None):
+    if versions is None:
+        versions = [(row.id, row.updated_at)]
+    cached = not_modified(request, response, version_etag(*versions))
+    if cached is not None:
+        return cached
+    return schema.model_validate(row)
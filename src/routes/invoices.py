@@ -0,0 +1,33 @@
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from sqlalchemy import select
+
+from models.base import get_read_db
+from models.models import Invoice
+from routes.auth import current_user
+from routes.common import DEFAULT_LIMIT, MAX_LIMIT, PageOut, fetch_after, item_response, page_response
+from routes.schemas import InvoiceOut
+
+router = APIRouter(prefix="/invoices", tags=["invoices"], dependencies=[Depends(current_user)])
+
+
+@router.get("", response_model=PageOut[InvoiceOut])
+def list_invoices(request: Request, response: Response, status: Optional[str] = None,
+                  job_id: Optional[int] = None, after: Optional[int] = None,
+                  limit: int = Query(DEFAULT_LIMIT, ge=1, le=MAX_LIMIT), db=Depends(get_read_db)):
+    stmt = select(Invoice)
+    if status:
+        stmt = stmt.where(Invoice.status == status)
+    if job_id is not None:
+        stmt = stmt.where(Invoice.job_id == job_id)
+    rows, next_after = fetch_after(db, stmt, Invoice.id, after, limit)
+    return page_response(request, response, rows, next_after, InvoiceOut)
+
+
+@router.get("/{invoice_id}", response_model=InvoiceOut)
+def get_invoice(invoice_id: int, request: Request, response: Response, db=Depends(get_read_db)):
+    invoice = db.get(Invoice, invoice_id)
+    if invoice is None:
+        raise HTTPException(404, "Invoice not found")
+    return item_response(request, response, invoice, InvoiceOut)
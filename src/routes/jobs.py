@@ -0,0 +1,63 @@
+from datetime import date, datetime, time
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from sqlalchemy import select, update
+
+from models.base import get_db, get_read_db
+from models.models import Job
+from routes.auth import current_user
+from routes.common import DEFAULT_LIMIT, MAX_LIMIT, PageOut, fetch_after, item_response, page_response
+from routes.schemas import JobOut, JobStatus, JobStatusBulkResult, JobStatusBulkUpdate
+
+router = APIRouter(prefix="/jobs", tags=["jobs"], dependencies=[Depends(current_user)])
+
+
+@router.get("", response_model=PageOut[JobOut])
+def list_jobs(request: Request, response: Response, status: Optional[JobStatus] = None,
+              cleaner_id: Optional[int] = None, client_id: Optional[int] = None,
+              date_from: Optional[date] = None, date_to: Optional[date] = None,
+              after: Optional[int] = None, limit: int = Query(DEFAULT_LIMIT, ge=1, le=MAX_LIMIT),
+              db=Depends(get_read_db)):
+    stmt = select(Job)
+    if status:
+        stmt = stmt.where(Job.status == status)
+    if cleaner_id is not None:
+        stmt = stmt.where(Job.cleaner_id == cleaner_id)
+    if client_id is not None:
+        stmt = stmt.where(Job.client_id == client_id)
+    if date_from:
+        stmt = stmt.where(Job.date >= datetime.combine(date_from, time.min))
+    if date_to:
+        stmt = stmt.where(Job.date <= datetime.combine(date_to, time.max))
+    rows, next_after = fetch_after(db, stmt, Job.id, after, limit)
+    return page_response(request, response, rows, next_after, JobOut)
+
+
+@router.get("/{job_id}", response_model=JobOut)
+def get_job(job_id: int, request: Request, response: Response, db=Depends(get_read_db)):
+    job = db.get(Job, job_id)
+    if job is None:
+        raise HTTPException(404, "Job not found")
+    return item_response(request, response, job, JobOut)
+
+
+@router.post("/status", response_model=JobStatusBulkResult)
+def update_job_statuses(body: JobStatusBulkUpdate, db=Depends(get_db)):
+    """Set the status of many jobs in one transaction.
+
+    Later entries for the same job win. Ids that don't exist are reported
+    back rather than failing the whole request.
+    """
+    statuses = {item.id: item.status for item in body.updates}
+    existing = set(db.execute(select(Job.id).where(Job.id.in_(statuses))).scalars())
+    now = datetime.utcnow()
+    if existing:
+        db.execute(update(Job), [
+            {"id": job_id, "status": statuses[job_id], "updated_at": now} for job_id in existing
+        ])
+        db.commit()
+    return JobStatusBulkResult(
+        updated=len(existing),
+        not_found=sorted(set(statuses) - existing),
+    )
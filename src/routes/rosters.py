@@ -0,0 +1,42 @@
+from datetime import date, datetime, time, timedelta
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from sqlalchemy import select
+from sqlalchemy.orm import contains_eager
+
+from models.base import get_read_db
+from models.models import Job, Roster
+from routes.auth import current_user
+from routes.common import DEFAULT_LIMIT, MAX_LIMIT, PageOut, fetch_after, item_response, page_response
+from routes.schemas import RosterOut
+
+router = APIRouter(prefix="/rosters", tags=["rosters"], dependencies=[Depends(current_user)])
+
+
+def _versions(rosters):
+    # A roster entry's response includes its job, so either changing invalidates it
+    return [(r.id, r.updated_at, r.job and r.job.updated_at) for r in rosters]
+
+
+@router.get("", response_model=PageOut[RosterOut])
+def list_rosters(request: Request, response: Response, week_start: Optional[date] = None,
+                 cleaner_id: Optional[int] = None, after: Optional[int] = None,
+                 limit: int = Query(DEFAULT_LIMIT, ge=1, le=MAX_LIMIT), db=Depends(get_read_db)):
+    # Each entry's job is loaded by the same query rather than one query per entry
+    stmt = select(Roster).outerjoin(Roster.job).options(contains_eager(Roster.job))
+    if week_start:
+        start = datetime.combine(week_start, time.min)
+        stmt = stmt.where(Job.date >= start, Job.date < start + timedelta(days=7))
+    if cleaner_id is not None:
+        stmt = stmt.where(Job.cleaner_id == cleaner_id)
+    rows, next_after = fetch_after(db, stmt, Roster.id, after, limit)
+    return page_response(request, response, rows, next_after, RosterOut, versions=_versions(rows))
+
+
+@router.get("/{roster_id}", response_model=RosterOut)
+def get_roster(roster_id: int, request: Request, response: Response, db=Depends(get_read_db)):
+    roster = db.get(Roster, roster_id)
+    if roster is None:
+        raise HTTPException(404, "Roster entry not found")
+    return item_response(request, response, roster, RosterOut, versions=_versions([roster]))
@@ -0,0 +1,84 @@
+from datetime import datetime
+from typing import List, Literal, Optional
+
+from pydantic import BaseModel, ConfigDict, Field
+
+from models.models import EmploymentType, GSTType, PaymentMode
+
+JobStatus = Literal["Scheduled", "Completed", "Cancelled"]
+
+
+class ORMModel(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+
+class ClientOut(ORMModel):
+    id: int
+    name: Optional[str] = None
+    contact: Optional[str] = None
+    address: Optional[str] = None
+    latitude: Optional[float] = None
+    longitude: Optional[float] = None
+    frequency: Optional[str] = None
+    preferences: Optional[str] = None
+    rate: Optional[float] = None
+    gst_type: Optional[GSTType] = None
+    payment_mode: Optional[PaymentMode] = None
+    created_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
+
+
+class CleanerOut(ORMModel):
+    id: int
+    name: Optional[str] = None
+    cost_rate: Optional[float] = None
+    employment_type: Optional[EmploymentType] = None
+    availability: Optional[str] = None
+    created_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
+
+
+class JobOut(ORMModel):
+    id: int
+    client_id: Optional[int] = None
+    cleaner_id: Optional[int] = None
+    date: Optional[datetime] = None
+    time: Optional[str] = None
+    start_at: Optional[datetime] = None
+    end_at: Optional[datetime] = None
+    status: Optional[str] = None
+    created_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
+
+
+class RosterOut(ORMModel):
+    id: int
+    job_id: Optional[int] = None
+    cost: Optional[float] = None
+    created_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
+    job: Optional[JobOut] = None
+
+
+class InvoiceOut(ORMModel):
+    id: int
+    job_id: Optional[int] = None
+    amount: Optional[float] = None
+    gst: Optional[float] = None
+    status: Optional[str] = None
+    created_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
+
+
+class JobStatusUpdate(BaseModel):
+    id: int
+    status: JobStatus
+
+
+class JobStatusBulkUpdate(BaseModel):
+    updates: List[JobStatusUpdate] = Field(min_length=1, max_length=1000)
+
+
+class JobStatusBulkResult(BaseModel):
+    updated: int
+    not_found: List[int] = []
@@ -0,0 +1,40 @@
+import os
+from urllib.parse import parse_qsl
+
+from fastapi import APIRouter, HTTPException, Request, Response, status
+
+from utils.delivery import STATUS_CALLBACK_URL, statuses
+
+TWILIO_AUTH_TOKEN = os.getenv("TWILIO_AUTH_TOKEN")
+
+router = APIRouter(prefix="/twilio", tags=["twilio"])
+
+_validator = None
+
+
+def _valid_signature(url: str, params: dict, signature: str) -> bool:
+    """Twilio signs each webhook with the account's auth token over the URL it posted to and the form"""
+    global _validator
+    if not TWILIO_AUTH_TOKEN:
+        raise HTTPException(status.HTTP_503_SERVICE_UNAVAILABLE, "TWILIO_AUTH_TOKEN is not configured")
+    if _validator is None:
+        from twilio.request_validator import RequestValidator
+        _validator = RequestValidator(TWILIO_AUTH_TOKEN)
+    return _validator.validate(url, params, signature)
+
+
+@router.post("/status", status_code=status.HTTP_204_NO_CONTENT, response_class=Response)
+async def status_callback(request: Request):
+    """Twilio's delivery status callback for a sent message.
+
+    Only buffers the final status; it reaches message_history with the
+    next bulk flush. The form is parsed directly rather than through
+    Form() parameters, which keeps each request cheap during a campaign.
+    """
+    params = dict(parse_qsl((await request.body()).decode()))
+    # Behind a proxy the URL Twilio signed is the public one, not request.url
+    url = STATUS_CALLBACK_URL or str(request.url)
+    if not _valid_signature(url, params, request.headers.get("X-Twilio-Signature", "")):
+        raise HTTPException(status.HTTP_403_FORBIDDEN, "Invalid Twilio signature")
+    statuses.add(params.get("MessageSid"), params.get("MessageStatus"), params.get("ErrorCode"))
+    return Response(status_code=status.HTTP_204_NO_CONTENT)
@@ -0,0 +1,200 @@
+from datetime import date, datetime, time, timedelta
+import os
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import String, func, select, type_coerce
+
+from models.models import Cleaner, Client, Invoice, Job, Payment, Roster
+from utils.cache import AggregateCache
+from utils.roster import JOB_HOURS, JOBS_PER_DAY, WEEKDAYS, availability_mask
+
+# Reports are recomputed when invoices, payments or the jobs behind them
+# change in this process, and at most this often otherwise
+reports = AggregateCache(ttl=float(os.getenv("ANALYTICS_CACHE_TTL", "300")), maxsize=64)
+
+# What each job cost: its roster entry, or its cleaner's rate for a standard job
+# when it was never rostered
+JOB_COST = func.coalesce(Roster.cost, Cleaner.cost_rate * JOB_HOURS, 0.0)
+
+# Group by -> (what rows are grouped on, what each row is labelled with);
+# clients and cleaners are grouped by id, as names need not be unique
+MARGIN_DIMENSIONS = {
+    "Client": (Client.id, Client.name),
+    "Cleaner": (Cleaner.id, Cleaner.name),
+    "GST Type": (type_coerce(Client.gst_type, String),) * 2,
+}
+
+
+def _bounds(start: date, end: date):
+    """Datetime range covering the whole of start..end inclusive"""
+    return datetime.combine(start, time.min), datetime.combine(end + timedelta(days=1), time.min)
+
+
+def _jobs_between(since: datetime, until: datetime):
+    """Jobs in the period, as an id IN (...) semi-join.
+
+    The subquery reads only ix_jobs_date and the outer query then visits
+    jobs, invoices and rosters in id order. Filtering on jobs.date directly
+    lets SQLite walk the whole date index and look up every job's invoice
+    and roster at random, which is several times slower over a multi-year
+    period.
+    """
+    return Job.id.in_(select(Job.id).where(Job.date >= since, Job.date < until))
+
+
+def _frame(result) -> pd.DataFrame:
+    return pd.DataFrame(result.all(), columns=list(result.keys()))
+
+
+def _month(db, column):
+    if db.get_bind().dialect.name == "postgresql":
+        return func.to_char(column, "YYYY-MM")
+    return func.strftime("%Y-%m", column)
+
+
+def _days_between(db, later, earlier):
+    if db.get_bind().dialect.name == "postgresql":
+        return func.extract("epoch", later - earlier) / 86400
+    return func.julianday(later) - func.julianday(earlier)
+
+
+def margins(db, start: date, end: date, by: str = "Client") -> pd.DataFrame:
+    """Revenue (excl. GST), cost and margin of invoiced jobs done in the period, grouped by ``by``"""
+    def compute():
+        since, until = _bounds(start, end)
+        key, label = MARGIN_DIMENSIONS[by]
+        result = db.execute(
+            select(
+                label.label(by),
+                func.count(Job.id).label("Jobs"),
+                func.sum(Invoice.amount).label("Revenue"),
+                func.sum(JOB_COST).label("Cost"),
+            )
+            .select_from(Job)
+            .join(Invoice, Invoice.job_id == Job.id)
+            .outerjoin(Roster, Roster.job_id == Job.id)
+            .outerjoin(Job.cleaner)
+            .join(Job.client)
+            .where(_jobs_between(since, until))
+            .group_by(key, label)
+        )
+        frame = _frame(result)
+        frame[by] = frame[by].fillna("(unassigned)")
+        frame["Margin"] = frame["Revenue"] - frame["Cost"]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            frame["Margin %"] = np.where(frame["Revenue"] > 0, 100 * frame["Margin"] / frame["Revenue"], np.nan)
+        return frame.sort_values("Margin", ascending=False, ignore_index=True)
+
+    return reports.get(("margins", by, start, end), ("invoices", "jobs", "rosters", "clients", "cleaners"), compute)
+
+
+def revenue_by_month(db, start: date, end: date) -> pd.DataFrame:
+    """Invoiced revenue, GST and the amount paid so far, by the month invoices were raised"""
+    def compute():
+        since, until = _bounds(start, end)
+        month = _month(db, Invoice.created_at)
+        # An invoice has at most one payment (Invoice.payment is one-to-one)
+        result = db.execute(
+            select(
+                month.label("Month"),
+                func.count(Invoice.id).label("Invoices"),
+                func.sum(Invoice.amount).label("Revenue"),
+                func.sum(Invoice.gst).label("GST"),
+                func.sum(Payment.amount).label("Paid"),
+            )
+            .select_from(Invoice)
+            .outerjoin(Invoice.payment)
+            .where(Invoice.created_at >= since, Invoice.created_at < until)
+            .group_by(month)
+            .order_by(month)
+        )
+        frame = _frame(result)
+        frame["Paid"] = frame["Paid"].fillna(0.0)
+        return frame
+
+    return reports.get(("revenue_by_month", start, end), ("invoices", "payments"), compute)
+
+
+def cleaner_utilization(db, start: date, end: date) -> pd.DataFrame:
+    """Booked hours against the hours each cleaner was available in the period.
+
+    Available hours follow the roster's capacity model: JOBS_PER_DAY jobs of
+    JOB_HOURS on each weekday in the cleaner's availability.
+    """
+    def compute():
+        since, until = _bounds(start, end)
+        booked = (
+            select(Job.cleaner_id, func.count(Job.id).label("jobs"))
+            .where(Job.date >= since, Job.date < until, Job.status != "Cancelled")
+            .group_by(Job.cleaner_id)
+            .subquery()
+        )
+        result = db.execute(
+            select(
+                Cleaner.name.label("Cleaner"),
+                Cleaner.availability.label("availability"),
+                func.coalesce(booked.c.jobs, 0).label("Jobs"),
+            ).outerjoin(booked, booked.c.cleaner_id == Cleaner.id)
+        )
+        frame = _frame(result)
+        if frame.empty:
+            return frame.assign(**{"Booked Hours": [], "Available Hours": [], "Utilization %": []})
+
+        # Days in the period for each distinct availability, via NumPy's weekday counting
+        weekmasks = {
+            availability: "".join(str(availability_mask(availability) >> i & 1) for i in range(len(WEEKDAYS)))
+            for availability in frame["availability"].unique()
+        }
+        days = {
+            availability: int(np.busday_count(start, end + timedelta(days=1), weekmask=mask))
+            if "1" in mask else 0
+            for availability, mask in weekmasks.items()
+        }
+        frame["Booked Hours"] = frame["Jobs"] * JOB_HOURS
+        frame["Available Hours"] = frame["availability"].map(days) * JOBS_PER_DAY * JOB_HOURS
+        with np.errstate(divide="ignore", invalid="ignore"):
+            frame["Utilization %"] = np.where(frame["Available Hours"] > 0,
+                                              100 * frame["Booked Hours"] / frame["Available Hours"], np.nan)
+        return (frame.drop(columns="availability")
+                .sort_values("Utilization %", ascending=False, ignore_index=True))
+
+    return reports.get(("cleaner_utilization", start, end), ("jobs", "cleaners"), compute)
+
+
+def days_to_pay(db, start: date, end: date) -> pd.DataFrame:
+    """Days from invoice to payment for payments received in the period, by GST type and overall"""
+    def compute():
+        since, until = _bounds(start, end)
+        result = db.execute(
+            select(
+                type_coerce(Client.gst_type, String).label("GST Type"),
+                _days_between(db, Payment.payment_date, Invoice.created_at).label("days"),
+            )
+            .select_from(Payment)
+            .join(Payment.invoice)
+            .join(Invoice.job)
+            .join(Job.client)
+            .where(Payment.payment_date >= since, Payment.payment_date < until)
+        )
+        payments = _frame(result)
+        columns = ["GST Type", "Payments", "Mean Days", "Median Days", "90th Percentile Days"]
+        if payments.empty:
+            return pd.DataFrame(columns=columns)
+
+        payments["days"] = payments["days"].astype(float)
+        payments["GST Type"] = payments["GST Type"].fillna("(none)")
+        def summary(days):
+            return pd.DataFrame({
+                "Payments": days.size(),
+                "Mean Days": days.mean(),
+                "Median Days": days.median(),
+                "90th Percentile Days": days.quantile(0.9),
+            })
+
+        # Each GST type, then all payments together
+        overall = summary(payments.assign(**{"GST Type": "All"}).groupby("GST Type")["days"])
+        frame = pd.concat([summary(payments.groupby("GST Type")["days"]), overall]).reset_index()
+        return frame[columns].round(1)
+
+    return reports.get(("days_to_pay", start, end), ("payments", "invoices", "jobs", "clients"), compute)
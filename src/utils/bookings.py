@@ -0,0 +1,232 @@
+from bisect import bisect_left
+from datetime import date, datetime, time, timedelta
+from time import monotonic
+from typing import Dict, List, Optional
+import os
+import threading
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import String, func, select, type_coerce
+
+from models.models import Cleaner, Job
+from utils.cache import table_versions
+from utils.roster import WEEKDAYS, availability_mask
+
+# Jobs that occupy their cleaner
+BOOKED_STATUSES = ("Scheduled", "Completed")
+
+# No clean runs longer than this, so only jobs starting up to this long before
+# a time can still be running then; lets the start_at index bound the scans
+MAX_JOB_LENGTH = timedelta(days=1)
+
+# Rows changed this long before the last refresh are read again, so a
+# transaction that committed after it with an earlier updated_at is not missed
+REFRESH_OVERLAP = timedelta(minutes=5)
+
+AUDIT_COLUMNS = ["Job", "Cleaner", "Start", "End", "Conflict"]
+
+
+class CleanerBookings:
+    """One cleaner's booked intervals, sorted by start.
+
+    ``reach[i]`` is the latest end among the first i + 1 intervals, so
+    whether [start, end) overlaps anything is one bisect on the starts and
+    one lookup, even if the bookings overlap each other. Changes only mark
+    where ``reach`` stops being valid; it is brought up to date at the next
+    lookup, so a batch of changes costs one pass.
+    """
+
+    def __init__(self):
+        self.starts: List[datetime] = []
+        self.keys: List[tuple] = []  # (start, job id), parallel to starts
+        self.ends: List[datetime] = []
+        self.reach: List[datetime] = []
+        self._valid = 0  # reach[:_valid] is up to date
+
+    def __len__(self):
+        return len(self.keys)
+
+    def add(self, job_id: int, start: datetime, end: datetime):
+        position = bisect_left(self.keys, (start, job_id))
+        self.keys.insert(position, (start, job_id))
+        self.starts.insert(position, start)
+        self.ends.insert(position, end)
+        self._valid = min(self._valid, position)
+
+    def remove(self, job_id: int, start: datetime):
+        position = bisect_left(self.keys, (start, job_id))
+        if position < len(self.keys) and self.keys[position] == (start, job_id):
+            del self.keys[position], self.starts[position], self.ends[position]
+            self._valid = min(self._valid, position)
+
+    def _update_reach(self):
+        del self.reach[self._valid:]
+        latest = self.reach[-1] if self.reach else None
+        for end in self.ends[self._valid:]:
+            latest = end if latest is None or end > latest else latest
+            self.reach.append(latest)
+        self._valid = len(self.reach)
+
+    def is_free(self, start: datetime, end: datetime) -> bool:
+        if self._valid < len(self.keys):
+            self._update_reach()
+        # Intervals starting before `end` overlap unless they all finish by `start`
+        before = bisect_left(self.starts, end)
+        return before == 0 or self.reach[before - 1] <= start
+
+
+class BookingIndex:
+    """In-memory per-cleaner index of booked jobs that end on or after ``since``.
+
+    ``refresh`` brings it up to date with the jobs table: it does nothing
+    unless a job or cleaner has been written through a Session in this
+    process, ``ttl`` seconds have passed (for writes by other processes,
+    such as the worker) or ``force`` is set, and otherwise reads only the
+    jobs whose updated_at moved since the last refresh. Deleted jobs cannot be found
+    that way, so if the index then differs from the table in its count or
+    sum of job ids it is rebuilt. Lookups are a bisect per cleaner.
+    """
+
+    def __init__(self, since: Optional[datetime] = None, ttl: float = 60):
+        self.since = since or datetime.combine(date.today(), time.min)
+        self.ttl = ttl
+        self._cleaners: Dict[int, CleanerBookings] = {}
+        self._jobs: Dict[int, tuple] = {}  # job id -> (cleaner id, start, end)
+        self._masks: Dict[int, int] = {}  # cleaner id -> availability_mask
+        self._versions = None
+        self._refreshed = 0.0
+        self._watermark: Optional[datetime] = None
+        self._lock = threading.RLock()
+
+    def _booked(self):
+        return (Job.cleaner_id.is_not(None), Job.start_at >= self.since - MAX_JOB_LENGTH,
+                Job.end_at >= self.since, Job.status.in_(BOOKED_STATUSES))
+
+    def _place(self, job_id, cleaner_id, start, end, booked):
+        previous = self._jobs.get(job_id)
+        if booked and previous == (cleaner_id, start, end):
+            return
+        if previous is not None:
+            del self._jobs[job_id]
+            self._cleaners[previous[0]].remove(job_id, previous[1])
+        if booked:
+            self._cleaners.setdefault(cleaner_id, CleanerBookings()).add(job_id, start, end)
+            self._jobs[job_id] = (cleaner_id, start, end)
+
+    def rebuild(self, db):
+        with self._lock:
+            self._cleaners, self._jobs = {}, {}
+            self._watermark = None
+            self._apply_changes(db)
+
+    def _apply_changes(self, db):
+        # Taken first, so changes committed while the jobs are read are seen next time
+        watermark = db.scalar(select(func.max(Job.updated_at))) or datetime.min
+        stmt = select(Job.id, Job.cleaner_id, Job.start_at, Job.end_at, Job.status)
+        if self._watermark is None:
+            stmt = stmt.where(*self._booked())
+        else:
+            stmt = stmt.where(Job.updated_at >= self._watermark - REFRESH_OVERLAP)
+        for job_id, cleaner_id, start, end, status in db.execute(stmt):
+            booked = (cleaner_id is not None and start is not None and end is not None
+                      and end >= self.since and status in BOOKED_STATUSES)
+            self._place(job_id, cleaner_id, start, end, booked)
+        self._watermark = watermark
+        self._masks = {cleaner_id: availability_mask(availability) for cleaner_id, availability
+                       in db.execute(select(Cleaner.id, Cleaner.availability)).all()}
+
+    def refresh(self, db, force: bool = False):
+        versions = table_versions(("jobs", "cleaners"))
+        with self._lock:
+            if not force and versions == self._versions and monotonic() - self._refreshed < self.ttl:
+                return
+            if self._watermark is None:
+                self.rebuild(db)
+            else:
+                self._apply_changes(db)
+                # Job ids only grow, so a deleted job replaced by a new one changes the sum
+                count, id_sum = db.execute(
+                    select(func.count(Job.id), func.coalesce(func.sum(Job.id), 0)).where(*self._booked())
+                ).one()
+                if (len(self._jobs), sum(self._jobs)) != (count, id_sum):
+                    self.rebuild(db)
+            self._versions = versions
+            self._refreshed = monotonic()
+
+    def is_free(self, cleaner_id: int, start: datetime, end: datetime, check_availability: bool = True) -> bool:
+        """Whether the cleaner works that weekday and has no booking overlapping [start, end)"""
+        with self._lock:
+            if check_availability and not self._masks.get(cleaner_id, 0) >> start.weekday() & 1:
+                return False
+            bookings = self._cleaners.get(cleaner_id)
+            return bookings is None or bookings.is_free(start, end)
+
+    def free_cleaners(self, start: datetime, end: datetime) -> List[int]:
+        """Cleaners who work that weekday and are free for the whole of [start, end)"""
+        day = 1 << start.weekday()
+        with self._lock:
+            return [cleaner_id for cleaner_id, mask in self._masks.items()
+                    if mask & day and (cleaner_id not in self._cleaners
+                                       or self._cleaners[cleaner_id].is_free(start, end))]
+
+
+# Shared by all sessions of the app process
+bookings = BookingIndex(ttl=float(os.getenv("QUERY_CACHE_TTL", "60")))
+
+
+def audit_conflicts(db, start: date, end: date) -> pd.DataFrame:
+    """Booked jobs starting in [start, end] that overlap another job of the same
+    cleaner, or fall on a day the cleaner does not work.
+
+    Jobs are sorted by cleaner and start; a job overlaps an earlier one when
+    it starts before the latest end so far in its cleaner's run, which is a
+    grouped cumulative max rather than a comparison of every pair.
+    """
+    # Run on the Session's connection and fetched straight from the DBAPI
+    # cursor: ORM row loading would cost more than the query itself here.
+    # Times are read as text where the driver returns text (SQLite) and
+    # parsed by numpy a column at a time, much faster than per value
+    result = db.connection().execute(
+        select(Job.id.label("Job"), Job.cleaner_id, type_coerce(Job.start_at, String).label("Start"),
+               type_coerce(Job.end_at, String).label("End"))
+        .where(Job.start_at >= datetime.combine(start, time.min),
+               Job.start_at <= datetime.combine(end, time.max),
+               Job.cleaner_id.is_not(None), Job.end_at.is_not(None), Job.status.in_(BOOKED_STATUSES))
+    )
+    rows = result.cursor.fetchall()
+    result.close()
+    if not rows:
+        return pd.DataFrame(columns=AUDIT_COLUMNS)
+    # A comprehension per column: zip(*rows) unpacks every row as an argument, several times slower
+    ids, cleaner_ids, starts, ends = ([row[k] for row in rows] for k in range(4))
+    jobs = pd.DataFrame({"Job": np.array(ids, dtype=np.int64), "cleaner_id": np.array(cleaner_ids, dtype=np.int64),
+                         "Start": np.array(starts, dtype="datetime64[us]"),
+                         "End": np.array(ends, dtype="datetime64[us]")})
+    jobs = jobs.sort_values(["cleaner_id", "Start", "Job"], ignore_index=True)
+
+    cleaners = pd.DataFrame(db.execute(select(Cleaner.id, Cleaner.name, Cleaner.availability)).all(),
+                            columns=["id", "name", "availability"]).set_index("id")
+
+    # Latest end, and the job it belongs to, among earlier jobs of the same cleaner
+    cleaner_id = jobs["cleaner_id"].to_numpy()
+    same_cleaner = np.r_[False, cleaner_id[1:] == cleaner_id[:-1]]
+    reach = jobs.groupby("cleaner_id", sort=False)["End"].cummax()
+    reach_job = jobs["Job"].where(jobs["End"].eq(reach)).groupby(jobs["cleaner_id"], sort=False).ffill()
+    overlaps = same_cleaner & (jobs["Start"].to_numpy() < reach.shift().to_numpy())
+
+    masks = jobs["cleaner_id"].map(cleaners["availability"].map(availability_mask)).fillna(0).to_numpy("int64")
+    weekday = jobs["Start"].dt.weekday.to_numpy()
+    unavailable = (masks >> weekday) & 1 == 0
+
+    # Messages are only built for the jobs that have a conflict
+    flagged = overlaps | unavailable
+    found = jobs[flagged].reset_index(drop=True)
+    overlap_text = np.where(overlaps[flagged], "Overlaps job " + reach_job.shift()[flagged]
+                            .fillna(0).astype("int64").astype(str).to_numpy(), "")
+    day_text = np.where(unavailable[flagged], "Not available on " + pd.Series(weekday[flagged])
+                        .map(dict(enumerate(WEEKDAYS))).to_numpy(), "")
+    both = overlaps[flagged] & unavailable[flagged]
+    found["Conflict"] = np.where(both, overlap_text + "; " + day_text, overlap_text + day_text)
+    found["Cleaner"] = found["cleaner_id"].map(cleaners["name"])
+    return found[AUDIT_COLUMNS]
@@ -0,0 +1,107 @@
+from collections import OrderedDict, defaultdict
+from itertools import chain
+from typing import Callable, Hashable, Iterable, Tuple
+import os
+import threading
+import time
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+# Per-table write counters. Any committed insert, update or delete through a
+# Session bumps the counter of the table it touched, which invalidates every
+# cached result computed from that table in this process.
+_versions = defaultdict(int)
+_versions_lock = threading.Lock()
+
+_WRITTEN = "_written_tables"
+
+
+def table_versions(tables: Iterable[str]) -> Tuple[int, ...]:
+    with _versions_lock:
+        return tuple(_versions[t] for t in tables)
+
+
+def bump(*tables: str):
+    with _versions_lock:
+        for table in tables:
+            _versions[table] += 1
+
+
+@event.listens_for(Session, "after_flush")
+def _track_flushed(session, flush_context):
+    written = session.info.setdefault(_WRITTEN, set())
+    for obj in chain(session.new, session.dirty, session.deleted):
+        table = getattr(obj, "__tablename__", None)
+        if table:
+            written.add(table)
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _track_statements(orm_execute_state):
+    # Bulk insert()/update()/delete() statements bypass the unit of work
+    if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+        table = getattr(orm_execute_state.statement, "table", None)
+        if table is not None:
+            orm_execute_state.session.info.setdefault(_WRITTEN, set()).add(table.name)
+
+
+@event.listens_for(Session, "after_commit")
+def _bump_committed(session):
+    written = session.info.pop(_WRITTEN, None)
+    if written:
+        bump(*written)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_rolled_back(session):
+    session.info.pop(_WRITTEN, None)
+
+
+class AggregateCache:
+    """Cache of computed values that expire after ``ttl`` seconds or as soon as
+    one of the tables they were computed from is written in this process.
+
+    Each entry keeps the write versions of its tables, so a lookup after a
+    write through any Session in this process recomputes the value and
+    replaces the entry. The TTL covers writes made by other processes, such
+    as the worker. At most ``maxsize`` values are kept, least recently used
+    evicted first, as keys such as dates keep changing in a long-running
+    process.
+    """
+
+    def __init__(self, ttl: float = 60.0, maxsize: int = 256):
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, tables: Tuple[str, ...], compute: Callable):
+        versions = table_versions(tables)
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and entry[0] == versions and now - entry[1] < self.ttl:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[2]
+            self.misses += 1
+        value = compute()
+        with self._lock:
+            self._entries[key] = (versions, now, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+# Read queries of the Streamlit pages, shared by all sessions in the process
+# so a rerun that changed no data does not touch the database
+reads = AggregateCache(ttl=float(os.getenv("QUERY_CACHE_TTL", "60")),
+                       maxsize=int(os.getenv("QUERY_CACHE_SIZE", "512")))
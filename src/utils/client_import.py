@@ -0,0 +1,177 @@
+from dataclasses import dataclass, field
+from datetime import datetime
+
+import pandas as pd
+from sqlalchemy import and_, case, func, select
+
+from models.models import Client, GSTType, PaymentMode
+from utils.recipients import normalize_phone_numbers, valid_phone_numbers
+from utils.roster import FREQUENCIES
+
+# CSV column -> Client attribute. Only the first two are required; optional
+# columns that are absent leave existing clients' values untouched.
+IMPORT_COLUMNS = {
+    "Client Name": "name",
+    "Phone Number": "contact",
+    "Address": "address",
+    "Frequency": "frequency",
+    "GST Type": "gst_type",
+    "Payment Mode": "payment_mode",
+    "Rate": "rate",
+    "Preferences": "preferences",
+}
+REQUIRED_COLUMNS = ["Client Name", "Phone Number"]
+
+# Rows per INSERT ... ON CONFLICT execution
+CHUNK_SIZE = 1000
+
+
+@dataclass
+class ImportResult:
+    total_rows: int = 0
+    inserted: int = 0
+    updated: int = 0
+    duplicates: int = 0
+    # One row per rejected CSV row: Row, Client Name, Phone Number, Reason
+    errors: pd.DataFrame = field(default_factory=lambda: pd.DataFrame(
+        columns=["Row", "Client Name", "Phone Number", "Reason"]))
+
+
+def _spelling(text: pd.Series) -> pd.Series:
+    # Case, spaces, underscores and hyphens don't matter: "Aged care" is AGED_CARE
+    return text.str.strip().str.lower().str.replace(r"[_\-\s]+", " ", regex=True)
+
+
+def _choices(pairs) -> dict:
+    """Lookup from each accepted spelling to its canonical value"""
+    spellings, values = zip(*pairs)
+    return dict(zip(_spelling(pd.Series(spellings, dtype=str)), values))
+
+
+CHOICES = {
+    "Frequency": ("frequency", _choices((f, f) for f in FREQUENCIES)),
+    "GST Type": ("gst_type", _choices([(t.name, t) for t in GSTType] + [(t.value, t) for t in GSTType])),
+    "Payment Mode": ("payment_mode", _choices([(m.name, m) for m in PaymentMode] +
+                                              [(m.value, m) for m in PaymentMode])),
+}
+
+
+def validate_clients(frame: pd.DataFrame):
+    """Normalize an imported client CSV and split it into valid rows and an error report.
+
+    Returns (rows, errors, duplicates). ``rows`` has one column per Client
+    attribute plus phone_key, indexed by 1-based CSV row number. Where a
+    phone number repeats the last row wins and the others are reported.
+    """
+    missing = [col for col in REQUIRED_COLUMNS if col not in frame.columns]
+    if missing:
+        raise ValueError(f"CSV must contain columns: {', '.join(repr(c) for c in REQUIRED_COLUMNS)}")
+
+    frame = frame.copy()
+    frame.index = pd.RangeIndex(1, len(frame) + 1, name="Row")
+    reasons = pd.Series("", index=frame.index)
+
+    def reject(mask, reason):
+        if isinstance(reason, pd.Series):
+            reason = reason[mask]
+        reasons[mask] = reasons[mask] + "; " + reason
+
+    rows = pd.DataFrame(index=frame.index)
+    rows["name"] = frame["Client Name"].str.strip()
+    reject(rows["name"] == "", "Missing client name")
+
+    raw_phone = frame["Phone Number"].str.strip()
+    rows["phone_key"] = normalize_phone_numbers(raw_phone)
+    rows["contact"] = rows["phone_key"]
+    reject(raw_phone == "", "Missing phone number")
+    reject((raw_phone != "") & ~valid_phone_numbers(rows["phone_key"]), "Invalid phone number")
+
+    for column, (attribute, choices) in CHOICES.items():
+        if column not in frame.columns:
+            continue
+        rows[attribute] = _spelling(frame[column]).map(choices)
+        reject((frame[column].str.strip() != "") & rows[attribute].isna(),
+               f"Unknown {column} '" + frame[column] + "'")
+
+    if "Rate" in frame.columns:
+        given = frame["Rate"].str.strip() != ""
+        rows["rate"] = pd.to_numeric(frame["Rate"].str.replace(r"[$,\s]", "", regex=True), errors="coerce")
+        reject(given & ~(rows["rate"] >= 0), "Rate must be a non-negative number")
+
+    for column in ("Address", "Preferences"):
+        if column in frame.columns:
+            text = frame[column].str.strip()
+            rows[IMPORT_COLUMNS[column]] = text.where(text != "")
+
+    invalid = reasons != ""
+    rows = rows[~invalid]
+
+    # Where a number repeats the last row wins; earlier ones are reported
+    duplicate = rows["phone_key"].duplicated(keep="last")
+    if duplicate.any():
+        used = pd.Series(rows.index, index=rows.index).groupby(rows["phone_key"]).transform("last")
+        reasons[duplicate[duplicate].index] = "; Duplicate phone number, row " + used[duplicate].astype(str) + " used"
+        invalid = reasons != ""
+        rows = rows[~duplicate]
+
+    errors = frame.loc[invalid, REQUIRED_COLUMNS].copy()
+    errors["Reason"] = reasons[invalid].str.removeprefix("; ")
+    return rows, errors.reset_index(), int(duplicate.sum())
+
+
+def _upsert_statement(db, columns):
+    if db.get_bind().dialect.name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert
+
+    # A Core statement executed with a list of rows: compiled once and run
+    # as a driver-level executemany (batched into multi-row VALUES on PostgreSQL)
+    stmt = insert(Client.__table__)
+    # Blank cells in optional columns keep the client's current value
+    updates = {column: func.coalesce(stmt.excluded[column], Client.__table__.c[column])
+               for column in columns if column not in ("phone_key", "name", "contact")}
+    updates["name"] = stmt.excluded.name
+    updates["contact"] = stmt.excluded.contact
+    updates["updated_at"] = stmt.excluded.updated_at
+    if "address" in columns:
+        # A new address makes the located postcode stale; geocoding fills it in again
+        table = Client.__table__
+        moved = and_(stmt.excluded.address.is_not(None), stmt.excluded.address.is_distinct_from(table.c.address))
+        updates["latitude"] = case((moved, None), else_=table.c.latitude)
+        updates["longitude"] = case((moved, None), else_=table.c.longitude)
+    return stmt.on_conflict_do_update(index_elements=[Client.phone_key], set_=updates)
+
+
+def import_clients(db, source, chunk_size: int = CHUNK_SIZE) -> ImportResult:
+    """Validate a client CSV and upsert it on normalized phone number.
+
+    Existing clients (same phone_key) are updated with the non-blank values
+    of the columns present in the CSV; new ones are inserted. Each chunk is a single
+    INSERT ... ON CONFLICT DO UPDATE, and the whole import is one
+    transaction. Rows that fail validation are skipped and reported.
+    """
+    frame = pd.read_csv(source, dtype=str, keep_default_na=False)
+    rows, errors, duplicates = validate_clients(frame)
+    result = ImportResult(total_rows=len(frame), duplicates=duplicates, errors=errors)
+    if rows.empty:
+        return result
+
+    now = datetime.utcnow()
+    rows = rows.astype(object).where(rows.notna(), None)
+    columns = list(rows.columns)
+    # Column-wise tolist() is much cheaper than DataFrame.to_dict("records")
+    rows["created_at"] = rows["updated_at"] = now
+    names = list(rows.columns)
+    records = [dict(zip(names, values)) for values in zip(*(rows[name].tolist() for name in names))]
+
+    upsert = _upsert_statement(db, columns)
+    for start in range(0, len(records), chunk_size):
+        chunk = records[start:start + chunk_size]
+        keys = [record["phone_key"] for record in chunk]
+        existing = db.scalar(select(func.count()).select_from(Client).where(Client.phone_key.in_(keys)))
+        db.execute(upsert, chunk)
+        result.updated += existing
+        result.inserted += len(chunk) - existing
+    db.commit()
+    return result
@@ -0,0 +1,95 @@
+from datetime import datetime, timedelta
+import os
+
+import pandas as pd
+from sqlalchemy import String, func, select, type_coerce
+
+from models.models import Cleaner, Client, Invoice, Job
+from utils.cache import AggregateCache
+from utils.queries import invoice_page
+
+# Clients with a job in this window (or any future job) count as active
+ACTIVE_CLIENT_DAYS = 90
+OUTSTANDING_STATUSES = ("Pending", "Overdue")
+
+aggregates = AggregateCache(ttl=float(os.getenv("DASHBOARD_CACHE_TTL", "60")))
+
+
+def _week_start(now: datetime) -> datetime:
+    return datetime.combine((now - timedelta(days=now.weekday())).date(), datetime.min.time())
+
+
+def active_clients(db, now: datetime) -> int:
+    since = now - timedelta(days=ACTIVE_CLIENT_DAYS)
+    return aggregates.get(
+        ("active_clients", since.date()), ("jobs",),
+        lambda: db.execute(
+            select(func.count(func.distinct(Job.client_id))).where(Job.date >= since)
+        ).scalar() or 0
+    )
+
+
+def team_size(db) -> int:
+    return aggregates.get(
+        "team_size", ("cleaners",),
+        lambda: db.execute(select(func.count(Cleaner.id))).scalar() or 0
+    )
+
+
+def jobs_this_week(db, now: datetime) -> int:
+    start = _week_start(now)
+    return aggregates.get(
+        ("jobs_this_week", start), ("jobs",),
+        lambda: db.execute(
+            select(func.count(Job.id))
+            .where(Job.date >= start, Job.date < start + timedelta(days=7))
+        ).scalar() or 0
+    )
+
+
+def outstanding_by_gst_type(db) -> pd.DataFrame:
+    def compute():
+        result = db.execute(
+            select(
+                type_coerce(Client.gst_type, String).label("GST Type"),
+                func.count(Invoice.id).label("Invoices"),
+                func.sum(Invoice.amount + Invoice.gst).label("Outstanding"),
+            )
+            .join(Invoice.job)
+            .join(Job.client)
+            .where(Invoice.status.in_(OUTSTANDING_STATUSES))
+            .group_by(Client.gst_type)
+        )
+        return pd.DataFrame(result.all(), columns=list(result.keys()))
+
+    return aggregates.get("outstanding_by_gst_type", ("invoices", "jobs", "clients"), compute)
+
+
+def upcoming_jobs(db, now: datetime, limit: int = 10) -> pd.DataFrame:
+    def compute():
+        result = db.execute(
+            select(
+                Job.date.label("Date"),
+                Job.time.label("Time"),
+                Client.name.label("Client"),
+                Cleaner.name.label("Cleaner"),
+                Job.status.label("Status"),
+            )
+            .outerjoin(Job.client)
+            .outerjoin(Job.cleaner)
+            .where(Job.date >= now, Job.status == "Scheduled")
+            .order_by(Job.date, Job.id)
+            .limit(limit)
+        )
+        return pd.DataFrame(result.all(), columns=list(result.keys()))
+
+    # Keyed by hour so jobs drop off the list as the day goes on
+    key = ("upcoming_jobs", now.replace(minute=0, second=0, microsecond=0), limit)
+    return aggregates.get(key, ("jobs", "clients", "cleaners"), compute)
+
+
+def recent_invoices(db, limit: int = 10) -> pd.DataFrame:
+    return aggregates.get(
+        ("recent_invoices", limit), ("invoices", "jobs", "clients"),
+        lambda: invoice_page(db, limit=limit).data
+    )
@@ -0,0 +1,176 @@
+from collections import defaultdict
+from dataclasses import dataclass
+from datetime import datetime
+from time import monotonic
+from typing import Dict, Optional
+import logging
+import os
+import threading
+
+from sqlalchemy import select, update
+
+from models.models import MessageHistory
+
+logger = logging.getLogger(__name__)
+
+# Public URL of the API's POST /twilio/status. When set, every message is sent
+# asking Twilio to report its delivery there; the URL is also what Twilio signs
+STATUS_CALLBACK_URL = os.getenv("TWILIO_STATUS_CALLBACK_URL", "")
+
+# Twilio's final message states; earlier ones (queued, sending, sent) are ignored
+FINAL_STATUSES = ("delivered", "undelivered", "failed")
+
+# Buffered callbacks are written every FLUSH_INTERVAL seconds, or as soon as
+# FLUSH_SIZE messages are waiting
+FLUSH_INTERVAL = float(os.getenv("DELIVERY_FLUSH_INTERVAL", "1"))
+FLUSH_SIZE = int(os.getenv("DELIVERY_FLUSH_SIZE", "5000"))
+# A callback can arrive before the dispatcher has written its message's row;
+# it is retried at each flush for this many seconds, then dropped
+UNMATCHED_TTL = float(os.getenv("DELIVERY_UNMATCHED_TTL", "600"))
+
+# Message sids per UPDATE ... WHERE message_sid IN (...)
+CHUNK_SIZE = 1000
+
+
+@dataclass
+class FlushResult:
+    applied: int = 0
+    pending: int = 0  # no message with that sid yet; kept for the next flush
+    dropped: int = 0  # unmatched for longer than the TTL
+
+
+class DeliveryStatusBuffer:
+    """Collects Twilio status callbacks in memory and applies them in bulk.
+
+    ``add`` only updates a dict keyed by message sid, so a webhook request
+    never waits on the database, and repeated callbacks for one message
+    collapse into the latest. ``flush`` groups the buffered messages by
+    (status, error) and sets each group with one UPDATE per CHUNK_SIZE sids,
+    all in one transaction. ``start`` runs it on a background thread.
+    """
+
+    def __init__(self, session_factory=None, interval: float = FLUSH_INTERVAL, max_size: int = FLUSH_SIZE,
+                 unmatched_ttl: float = UNMATCHED_TTL):
+        self.session_factory = session_factory
+        self.interval = interval
+        self.max_size = max_size
+        self.unmatched_ttl = unmatched_ttl
+        # sid -> (status, error, received at, monotonic time first seen)
+        self._pending: Dict[str, tuple] = {}
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.received = 0
+        self.applied = 0
+        self.dropped = 0
+
+    def __len__(self):
+        with self._lock:
+            return len(self._pending)
+
+    def add(self, sid: Optional[str], status: Optional[str], error_code: Optional[str] = None) -> bool:
+        """Buffer one callback; returns False for a status that is not final"""
+        if not sid or status not in FINAL_STATUSES:
+            return False
+        error = f"Twilio error {error_code}" if error_code and status != "delivered" else None
+        with self._lock:
+            previous = self._pending.get(sid)
+            first_seen = previous[3] if previous else monotonic()
+            self._pending[sid] = (status, error, datetime.utcnow(), first_seen)
+            self.received += 1
+            full = len(self._pending) >= self.max_size
+        if full:
+            self._wake.set()
+        return True
+
+    def _requeue(self, entries: Dict[str, tuple]):
+        with self._lock:
+            for sid, entry in entries.items():
+                # A callback that arrived during the flush is newer
+                self._pending.setdefault(sid, entry)
+
+    def flush(self, db) -> FlushResult:
+        with self._lock:
+            batch, self._pending = self._pending, {}
+        result = FlushResult()
+        if not batch:
+            return result
+
+        groups = defaultdict(list)
+        for sid, (status, error, _, _) in batch.items():
+            groups[status, error].append(sid)
+        unmatched = []
+        try:
+            for (status, error), sids in groups.items():
+                values = {"delivery_status": status,
+                          "delivery_updated_at": max(batch[sid][2] for sid in sids)}
+                if error:
+                    values["error"] = error
+                for start in range(0, len(sids), CHUNK_SIZE):
+                    chunk = sids[start:start + CHUNK_SIZE]
+                    updated = db.execute(
+                        update(MessageHistory).where(MessageHistory.message_sid.in_(chunk)).values(**values)
+                        .execution_options(synchronize_session=False)
+                    ).rowcount
+                    if updated < len(chunk):
+                        # Only then look up which sids have no row yet
+                        found = set(db.scalars(select(MessageHistory.message_sid)
+                                               .where(MessageHistory.message_sid.in_(chunk))))
+                        unmatched += [sid for sid in chunk if sid not in found]
+            db.commit()
+        except Exception:
+            db.rollback()
+            self._requeue(batch)
+            raise
+
+        now = monotonic()
+        retry = {sid: batch[sid] for sid in unmatched if now - batch[sid][3] < self.unmatched_ttl}
+        self._requeue(retry)
+        result.pending = len(retry)
+        result.dropped = len(unmatched) - len(retry)
+        result.applied = len(batch) - len(unmatched)
+        with self._lock:
+            self.applied += result.applied
+            self.dropped += result.dropped
+        if result.dropped:
+            logger.warning("dropped %d delivery callbacks with no matching message", result.dropped)
+        return result
+
+    def _flush_with_session(self):
+        db = self.session_factory()
+        try:
+            return self.flush(db)
+        except Exception:
+            logger.exception("failed to apply delivery callbacks; will retry")
+        finally:
+            db.close()
+
+    def _run(self):
+        while not self._stop.is_set():
+            self._wake.wait(self.interval)
+            self._wake.clear()
+            self._flush_with_session()
+        self._flush_with_session()
+
+    def start(self):
+        """Flush on a background thread until stop()"""
+        if self.session_factory is None:
+            from models.base import SessionLocal
+            self.session_factory = SessionLocal
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="delivery-status-flush", daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout: float = 30.0):
+        """Stop the thread after a last flush"""
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+
+# Shared by the API's status callback route and its lifespan
+statuses = DeliveryStatusBuffer()
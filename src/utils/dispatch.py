@@ -0,0 +1,195 @@
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Callable, Iterable, List, Optional
+import os
+import random
+import threading
+import time
+
+from sqlalchemy import insert
+
+from models.models import MessageHistory
+
+# Twilio throughput for the sending number/account, in messages per second
+DEFAULT_RATE = float(os.getenv('TWILIO_MAX_MPS', '10'))
+DEFAULT_WORKERS = int(os.getenv('SMS_DISPATCH_WORKERS', '8'))
+
+RETRYABLE_STATUSES = {429, 500, 502, 503, 504}
+
+
+class TokenBucket:
+    """Thread-safe token bucket limiting how many sends start per second"""
+
+    def __init__(self, rate: float, capacity: Optional[float] = None):
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+        self.rate = rate
+        self.capacity = capacity or max(1.0, rate)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Block until a token is available"""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait_for = (1 - self._tokens) / self.rate
+            time.sleep(wait_for)
+
+
+@dataclass
+class OutgoingMessage:
+    phone: str
+    body: str
+    client_name: str = ""
+    history_id: Optional[int] = None  # existing MessageHistory row, if any
+
+
+@dataclass
+class DispatchResult:
+    message: OutgoingMessage
+    success: bool
+    message_sid: Optional[str] = None
+    error: Optional[str] = None
+    attempts: int = 1
+    sent_at: Optional[datetime] = None
+
+
+@dataclass
+class DispatchProgress:
+    total: int
+    done: int = 0
+    succeeded: int = 0
+    failed: int = 0
+    elapsed: float = 0.0
+
+    @property
+    def rate(self) -> float:
+        """Completed messages per second"""
+        return self.done / self.elapsed if self.elapsed > 0 else 0.0
+
+    @property
+    def fraction(self) -> float:
+        return self.done / self.total if self.total else 1.0
+
+
+class BulkDispatcher:
+    """Send many messages through a MessageService using a bounded worker pool.
+
+    Sends are paced by a token bucket, and 429/5xx responses are retried with
+    exponential backoff. Results are handed to ``on_batch`` in groups of
+    ``batch_size`` so callers can persist them without a commit per message.
+    Both callbacks run in the calling thread, so they may touch Streamlit.
+    """
+
+    def __init__(self, service, rate: float = DEFAULT_RATE, workers: int = DEFAULT_WORKERS,
+                 max_retries: int = 3, backoff: float = 0.5, max_backoff: float = 8.0):
+        self.service = service
+        self.bucket = TokenBucket(rate)
+        self.workers = workers
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+
+    def _send(self, msg: OutgoingMessage) -> DispatchResult:
+        attempt = 0
+        while True:
+            attempt += 1
+            self.bucket.acquire()
+            result = self.service.send_message(msg.phone, msg.body)
+            if result["success"]:
+                return DispatchResult(msg, True, message_sid=result.get("message_sid"),
+                                      attempts=attempt, sent_at=datetime.utcnow())
+            if result.get("status") not in RETRYABLE_STATUSES or attempt > self.max_retries:
+                return DispatchResult(msg, False, error=result.get("error"), attempts=attempt)
+            delay = min(self.max_backoff, self.backoff * 2 ** (attempt - 1))
+            time.sleep(delay * random.uniform(0.5, 1.0))
+
+    def dispatch(self, messages: Iterable[OutgoingMessage],
+                 on_batch: Optional[Callable[[List[DispatchResult]], None]] = None,
+                 on_progress: Optional[Callable[[DispatchProgress], None]] = None,
+                 batch_size: int = 500) -> DispatchProgress:
+        """Send all messages and return the final progress summary"""
+        messages = list(messages)
+        progress = DispatchProgress(total=len(messages))
+        pending_results = []
+        start = time.monotonic()
+        # Keep a bounded number of sends in flight instead of queueing everything
+        max_in_flight = self.workers * 2
+        queue = iter(messages)
+
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            in_flight = set()
+            exhausted = False
+            while in_flight or not exhausted:
+                while not exhausted and len(in_flight) < max_in_flight:
+                    msg = next(queue, None)
+                    if msg is None:
+                        exhausted = True
+                    else:
+                        in_flight.add(pool.submit(self._send, msg))
+                if not in_flight:
+                    break
+                completed, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in completed:
+                    result = future.result()
+                    progress.done += 1
+                    if result.success:
+                        progress.succeeded += 1
+                    else:
+                        progress.failed += 1
+                    pending_results.append(result)
+                progress.elapsed = time.monotonic() - start
+                if on_batch and len(pending_results) >= batch_size:
+                    on_batch(pending_results)
+                    pending_results = []
+                if on_progress:
+                    on_progress(progress)
+
+        if on_batch and pending_results:
+            on_batch(pending_results)
+        progress.elapsed = time.monotonic() - start
+        return progress
+
+
+class HistoryWriter:
+    """Write dispatch results to MessageHistory with one INSERT per batch"""
+
+    def __init__(self, db):
+        self.db = db
+
+    def __call__(self, results: List[DispatchResult]):
+        rows = [{
+            "client_name": r.message.client_name,
+            "phone_number": r.message.phone,
+            "message": r.message.body,
+            "status": "success" if r.success else "failed",
+            "error": r.error,
+            "sent_at": r.sent_at,
+            "message_sid": r.message_sid,
+        } for r in results]
+        self.db.execute(insert(MessageHistory), rows)
+        self.db.commit()
+
+
+def schedule_messages(db, messages: List[OutgoingMessage], scheduled_for: datetime,
+                      batch_size: int = 1000) -> int:
+    """Store messages as scheduled MessageHistory rows in batched inserts"""
+    for i in range(0, len(messages), batch_size):
+        rows = [{
+            "client_name": m.client_name,
+            "phone_number": m.phone,
+            "message": m.body,
+            "status": "scheduled",
+            "scheduled_for": scheduled_for,
+        } for m in messages[i:i + batch_size]]
+        db.execute(insert(MessageHistory), rows)
+        db.commit()
+    return len(messages)
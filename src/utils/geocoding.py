@@ -0,0 +1,107 @@
+from dataclasses import dataclass
+from functools import lru_cache
+import os
+
+import pandas as pd
+from sqlalchemy import or_, select, update
+
+from models.models import Client
+
+# CSV of postcode centroids, e.g. a postcode/locality list with coordinates.
+# Read locally; addresses are never sent to a geocoding service.
+CENTROIDS_FILE = os.getenv("POSTCODE_CENTROIDS_FILE", "")
+
+POSTCODE_COLUMNS = ["postcode", "post_code", "postal_code", "poa_code"]
+LATITUDE_COLUMNS = ["latitude", "lat"]
+LONGITUDE_COLUMNS = ["longitude", "long", "lon", "lng"]
+
+# The last four-digit number in an address: "12 King St, Newtown NSW 2042"
+POSTCODE = r".*\b(\d{4})\b"
+
+
+@dataclass
+class GeocodeResult:
+    clients: int = 0
+    located: int = 0
+    no_postcode: int = 0  # no four-digit postcode in the address
+    unknown_postcode: int = 0  # postcode not in the centroid file
+
+
+def _first_column(frame: pd.DataFrame, names):
+    for name in names:
+        if name in frame.columns:
+            return name
+    return None
+
+
+def read_centroids(source) -> pd.DataFrame:
+    """Read a postcode centroid CSV into latitude and longitude indexed by postcode.
+
+    Column names are matched case-insensitively (postcode, lat/latitude,
+    lon/long/lng/longitude). A postcode listed once per locality is averaged
+    into one point. Raises ValueError if the columns are missing.
+    """
+    raw = pd.read_csv(source, dtype=str, keep_default_na=False)
+    raw.columns = raw.columns.str.strip().str.lower()
+    postcode = _first_column(raw, POSTCODE_COLUMNS)
+    latitude = _first_column(raw, LATITUDE_COLUMNS)
+    longitude = _first_column(raw, LONGITUDE_COLUMNS)
+    if postcode is None or latitude is None or longitude is None:
+        raise ValueError("Postcode centroid CSV must contain postcode, latitude and longitude columns")
+
+    centroids = pd.DataFrame({
+        "postcode": raw[postcode].str.strip().str.zfill(4),
+        "latitude": pd.to_numeric(raw[latitude], errors="coerce"),
+        "longitude": pd.to_numeric(raw[longitude], errors="coerce"),
+    }).dropna()
+    # Some lists carry 0,0 for PO boxes and other postcodes with no area
+    centroids = centroids[(centroids["latitude"] != 0) | (centroids["longitude"] != 0)]
+    return centroids.groupby("postcode")[["latitude", "longitude"]].mean()
+
+
+@lru_cache(maxsize=4)
+def _configured_centroids(path: str) -> pd.DataFrame:
+    return read_centroids(path)
+
+
+def load_centroids(path: str = "") -> pd.DataFrame:
+    """The centroids in ``path`` or POSTCODE_CENTROIDS_FILE, read once per process"""
+    path = path or CENTROIDS_FILE
+    if not path:
+        raise ValueError("Set POSTCODE_CENTROIDS_FILE to a CSV of postcode centroids")
+    if not os.path.exists(path):
+        raise ValueError(f"Postcode centroid file not found: {path}")
+    return _configured_centroids(os.path.abspath(path))
+
+
+def geocode_clients(db, centroids: pd.DataFrame, overwrite: bool = False) -> GeocodeResult:
+    """Set each client's latitude/longitude to the centroid of their address's postcode.
+
+    Only clients without coordinates are looked at unless ``overwrite`` is
+    set; the client import clears them when it changes an address. Clients whose postcode is
+    missing or unknown are left as they are. One bulk UPDATE, one commit.
+    """
+    stmt = select(Client.id, Client.address)
+    if not overwrite:
+        stmt = stmt.where(or_(Client.latitude.is_(None), Client.longitude.is_(None)))
+    result = db.execute(stmt)
+    clients = pd.DataFrame(result.all(), columns=list(result.keys()))
+    outcome = GeocodeResult(clients=len(clients))
+    if clients.empty:
+        return outcome
+
+    postcodes = clients["address"].fillna("").str.extract(POSTCODE, expand=False)
+    located = clients.assign(postcode=postcodes).join(centroids, on="postcode", how="inner")
+    outcome.no_postcode = int(postcodes.isna().sum())
+    outcome.unknown_postcode = len(clients) - outcome.no_postcode - len(located)
+    outcome.located = len(located)
+    if located.empty:
+        return outcome
+
+    db.execute(update(Client), [
+        {"id": client_id, "latitude": latitude, "longitude": longitude}
+        for client_id, latitude, longitude in zip(located["id"].tolist(), located["latitude"].tolist(),
+                                                  located["longitude"].tolist())
+    ])
+    db.commit()
+    return outcome
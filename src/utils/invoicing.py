@@ -0,0 +1,77 @@
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import String, func, insert, select, type_coerce
+
+from models.models import Client, GSTType, Invoice, Job
+
+GST_RATE = 0.10
+
+# NDIS and aged care services are GST-free; everything else attracts GST
+GST_RATES = {gst_type.name: GST_RATE for gst_type in GSTType}
+GST_RATES[GSTType.NDIS.name] = 0.0
+GST_RATES[GSTType.AGED_CARE.name] = 0.0
+
+
+@dataclass
+class InvoiceRunResult:
+    created: int = 0
+    amount: float = 0.0
+    gst: float = 0.0
+    skipped: int = 0  # completed jobs whose client has no price set
+
+
+def _uninvoiced_jobs():
+    return (
+        select(Job.id.label("job_id"), Client.rate.label("rate"),
+               type_coerce(Client.gst_type, String).label("gst_type"))
+        .select_from(Job)
+        .outerjoin(Invoice, Invoice.job_id == Job.id)
+        .join(Job.client)
+        .where(Job.status == "Completed", Invoice.id.is_(None))
+    )
+
+
+def count_uninvoiced_jobs(db) -> int:
+    return db.execute(select(func.count()).select_from(_uninvoiced_jobs().subquery())).scalar()
+
+
+def calculate_gst(amounts: np.ndarray, gst_types: pd.Series) -> np.ndarray:
+    """GST for each amount according to its client's GST type"""
+    rates = gst_types.map(GST_RATES).fillna(GST_RATE).to_numpy(dtype=float)
+    return np.round(amounts * rates, 2)
+
+
+def generate_invoices(db) -> InvoiceRunResult:
+    """Invoice every completed job that has no invoice yet.
+
+    Safe to re-run: jobs that already have an invoice are excluded by the
+    query, and Invoice.job_id is unique.
+    """
+    result = db.execute(_uninvoiced_jobs())
+    jobs = pd.DataFrame(result.all(), columns=list(result.keys()))
+    if jobs.empty:
+        return InvoiceRunResult()
+
+    priced = jobs["rate"].notna()
+    skipped = int((~priced).sum())
+    jobs = jobs[priced]
+    if jobs.empty:
+        return InvoiceRunResult(skipped=skipped)
+
+    amounts = np.round(jobs["rate"].to_numpy(dtype=float), 2)
+    gst = calculate_gst(amounts, jobs["gst_type"])
+
+    db.execute(insert(Invoice), [
+        {"job_id": job_id, "amount": amount, "gst": tax, "status": "Pending"}
+        for job_id, amount, tax in zip(jobs["job_id"].tolist(), amounts.tolist(), gst.tolist())
+    ])
+    db.commit()
+
+    return InvoiceRunResult(
+        created=len(jobs),
+        amount=float(amounts.sum()),
+        gst=float(gst.sum()),
+        skipped=skipped,
+    )
@@ -0,0 +1,127 @@
+from dataclasses import dataclass
+from datetime import date, datetime, time, timedelta
+from typing import Optional
+import os
+
+from sqlalchemy import delete, func, insert, or_, select, update
+
+from models.models import Client, Job, Roster
+from utils.roster import FREQUENCIES, JOB_HOURS
+
+HORIZON_WEEKS = int(os.getenv("JOB_HORIZON_WEEKS", "12"))
+
+
+@dataclass
+class MaterializeResult:
+    clients: int = 0
+    created: int = 0
+    removed: int = 0
+
+
+def _reset_changed_clients(db, today: datetime) -> int:
+    """Drop future, not yet rostered jobs of clients whose frequency changed
+    since they were last materialized, so they are regenerated from scratch."""
+    changed = db.execute(
+        select(Client.id)
+        .where(Client.jobs_materialized_until.is_not(None),
+               Client.materialized_frequency.is_distinct_from(Client.frequency))
+    ).scalars().all()
+    if not changed:
+        return 0
+
+    rostered = select(Roster.job_id).where(Roster.job_id.is_not(None))
+    removed = db.execute(
+        delete(Job)
+        .where(Job.client_id.in_(changed), Job.date >= today, Job.status == "Scheduled",
+               Job.id.not_in(rostered))
+        .execution_options(synchronize_session=False)
+    ).rowcount
+
+    # Continue from whatever future jobs are left (already rostered ones), or start afresh
+    remaining = dict(db.execute(
+        select(Job.client_id, func.max(Job.date))
+        .where(Job.client_id.in_(changed), Job.date >= today)
+        .group_by(Job.client_id)
+    ).all())
+    db.execute(update(Client), [
+        {"id": cid, "jobs_materialized_until": remaining.get(cid), "materialized_frequency": None,
+         "materialized_anchor": None}
+        for cid in changed
+    ])
+    return removed
+
+
+def _first_step(anchor: datetime, interval, start: datetime) -> int:
+    """The smallest k with anchor + k * interval on or after ``start``"""
+    # Jump close using an interval no shorter than the real one, then step
+    longest = timedelta(days=interval.months * 31 + interval.days)
+    k = max(0, (start - anchor) // longest)
+    while anchor + k * interval < start:
+        k += 1
+    return k
+
+
+def materialize_jobs(db, today: Optional[date] = None, horizon_weeks: int = HORIZON_WEEKS) -> MaterializeResult:
+    """Extend each client's recurring jobs out to ``horizon_weeks`` from today.
+
+    Only the tail past each client's ``jobs_materialized_until`` watermark is
+    generated, so repeated runs only insert the jobs that have newly come
+    into the horizon.
+    """
+    today = datetime.combine(today or date.today(), time.min)
+    horizon = today + timedelta(weeks=horizon_weeks)
+    result = MaterializeResult(removed=_reset_changed_clients(db, today))
+
+    # Weekly is the shortest frequency, so anyone materialized to within a
+    # week of the horizon has nothing new to add yet, unless they were just reset
+    clients = db.execute(
+        select(Client.id, Client.frequency, Client.jobs_materialized_until, Client.materialized_frequency,
+               Client.materialized_anchor)
+        .where(Client.frequency.in_(FREQUENCIES),
+               or_(Client.jobs_materialized_until.is_(None),
+                   Client.jobs_materialized_until < horizon - timedelta(weeks=1),
+                   Client.materialized_frequency.is_distinct_from(Client.frequency)))
+    ).all()
+
+    # New clients continue from their most recent job, if they have one
+    unanchored = [c.id for c in clients if c.jobs_materialized_until is None]
+    last_jobs = dict(db.execute(
+        select(Job.client_id, func.max(Job.date))
+        .where(Job.client_id.in_(unanchored), Job.status != "Cancelled")
+        .group_by(Job.client_id)
+    ).all()) if unanchored else {}
+
+    # Not rostered yet: the roster sets the time, so until then the job starts at midnight
+    job_length = timedelta(hours=JOB_HOURS)
+    jobs = []
+    watermarks = []
+    for client_id, frequency, watermark, materialized_frequency, stored_anchor in clients:
+        interval = FREQUENCIES[frequency]
+        # Dates are anchor + k * interval rather than repeated steps, which
+        # would slide a month-end anchor (Jan 31, Feb 28, Mar 28, ...)
+        after = watermark or last_jobs.get(client_id)
+        anchor = stored_anchor or after
+        anchor = datetime.combine(anchor.date(), time.min) if anchor else today
+        k = _first_step(anchor, interval, max(today, after + timedelta(days=1)) if after else today)
+        last = None
+        next_date = anchor + k * interval
+        while next_date < horizon:
+            jobs.append({"client_id": client_id, "date": next_date, "start_at": next_date,
+                         "end_at": next_date + job_length, "status": "Scheduled"})
+            last = next_date
+            k += 1
+            next_date = anchor + k * interval
+        # A reset client is recorded even with no new jobs, or every run would reset it again
+        if last is not None or watermark is None or materialized_frequency != frequency or stored_anchor is None:
+            watermarks.append({"id": client_id, "jobs_materialized_until": last or after,
+                               "materialized_frequency": frequency, "materialized_anchor": anchor})
+
+    if jobs:
+        db.execute(insert(Job), jobs)
+    if watermarks:
+        db.execute(update(Client), watermarks)
+    db.commit()
+
+    result.clients = len({job["client_id"] for job in jobs})
+    result.created = len(jobs)
+    return result
@@ -1,12 +1,50 @@
-from twilio.rest import Client
 from datetime import datetime
+import logging
 import os
+import threading
+import time
 from dotenv import load_dotenv
 import streamlit as st
 
+from utils import metrics
+from utils.delivery import STATUS_CALLBACK_URL
+from utils.metrics import LatencyHistogram
+
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+# The Twilio SDK logs every request and response at INFO; keep that out of
+# the hot path unless explicitly asked for
+logging.getLogger("twilio.http_client").setLevel(logging.WARNING)
+
+# Keep-alive connections held open to the Twilio API; should be at least the
+# number of dispatch workers sending concurrently
+HTTP_POOL_SIZE = int(os.getenv("TWILIO_HTTP_POOL_SIZE", "32"))
+HTTP_TIMEOUT = float(os.getenv("TWILIO_HTTP_TIMEOUT", "15"))
+
+
+def _pooled_http_client():
+    """A Twilio HTTP client whose requests Session keeps HTTP_POOL_SIZE
+    connections alive per host, shared by all sending threads"""
+    from requests.adapters import HTTPAdapter
+    from twilio.http.http_client import TwilioHttpClient
+
+    http_client = TwilioHttpClient(pool_connections=True, timeout=HTTP_TIMEOUT)
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=HTTP_POOL_SIZE)
+    http_client.session.mount("https://", adapter)
+    http_client.session.mount("http://", adapter)
+    return http_client
+
+
 class MessageService:
+    """Sends SMS through Twilio.
+
+    Use get_message_service() rather than constructing one per request: the
+    service holds a pool of keep-alive connections that is safe to share
+    between the dispatcher's threads, and records every send's latency in
+    ``latency``.
+    """
+
     def __init__(self):
         # Try to get credentials from Streamlit secrets first, then fall back to env vars
         try:
@@ -19,38 +57,62 @@ class MessageService:
             self.auth_token = os.getenv('TWILIO_AUTH_TOKEN')
             self.from_number = os.getenv('TWILIO_PHONE_NUMBER')
         
+        self.latency = LatencyHistogram()
+
         if not all([self.account_sid, self.auth_token, self.from_number]):
-            print(f"Missing Twilio credentials:")
-            print(f"TWILIO_ACCOUNT_SID: {'Set' if self.account_sid else 'Missing'}")
-            print(f"TWILIO_AUTH_TOKEN: {'Set' if self.auth_token else 'Missing'}")
-            print(f"TWILIO_PHONE_NUMBER: {'Set' if self.from_number else 'Missing'}")
+            logger.warning(
+                "Missing Twilio credentials: TWILIO_ACCOUNT_SID=%s TWILIO_AUTH_TOKEN=%s TWILIO_PHONE_NUMBER=%s",
+                "set" if self.account_sid else "missing",
+                "set" if self.auth_token else "missing",
+                "set" if self.from_number else "missing",
+            )
             self.client = None
         else:
             try:
-                self.client = Client(self.account_sid, self.auth_token)
-            except Exception as e:
-                print(f"Error initializing Twilio client: {str(e)}")
+                # Imported here so pages that never send SMS don't pay for loading Twilio
+                from twilio.rest import Client
+                self.client = Client(self.account_sid, self.auth_token,
+                                     http_client=_pooled_http_client())
+                # Allow pointing the API at another host, e.g. a local fake Twilio server
+                base_url = os.getenv('TWILIO_API_BASE_URL')
+                if base_url:
+                    self.client.api.base_url = base_url
+            except Exception:
+                logger.exception("Error initializing Twilio client")
                 self.client = None
 
     def send_message(self, to_number: str, message: str) -> dict:
         """Send a message using Twilio"""
         if not self.client:
             error_msg = "Twilio client not initialized. Check credentials."
-            print(error_msg)
+            logger.error(error_msg)
             return {"success": False, "error": error_msg}
         
+        from twilio.base.exceptions import TwilioRestException
+
+        start = time.perf_counter()
         try:
-            print(f"Attempting to send message to {to_number} from {self.from_number}")
             message = self.client.messages.create(
                 body=message,
                 from_=self.from_number,
-                to=to_number
+                to=to_number,
+                **({"status_callback": STATUS_CALLBACK_URL} if STATUS_CALLBACK_URL else {})
             )
-            print(f"Message sent successfully. SID: {message.sid}")
+            elapsed = time.perf_counter() - start
+            self.latency.observe(elapsed)
+            logger.debug("sms sent to=%s sid=%s elapsed_ms=%.1f", to_number, message.sid, elapsed * 1000)
             return {"success": True, "message_sid": message.sid}
+        except TwilioRestException as e:
+            elapsed = time.perf_counter() - start
+            self.latency.observe(elapsed)
+            error_msg = f"Failed to send message: {e.msg}"
+            logger.warning("sms failed to=%s status=%s elapsed_ms=%.1f error=%s",
+                           to_number, e.status, elapsed * 1000, e.msg)
+            return {"success": False, "error": error_msg, "status": e.status}
         except Exception as e:
+            self.latency.observe(time.perf_counter() - start)
             error_msg = f"Failed to send message: {str(e)}"
-            print(error_msg)
+            logger.warning("sms failed to=%s error=%s", to_number, e)
             return {"success": False, "error": error_msg}
 
     def format_phone_number(self, phone: str) -> str:
@@ -70,3 +132,25 @@ class MessageService:
             phone = '61' + phone.lstrip('0')
         
         return f"+{phone}"
+
+
+_service = None
+_service_lock = threading.Lock()
+
+
+def get_message_service() -> MessageService:
+    """The process-wide MessageService, created on first use.
+
+    A service that failed to initialize (e.g. missing credentials) is rebuilt
+    on the next call, so fixing the configuration doesn't need a restart.
+    """
+    global _service
+    service = _service
+    if service is None or service.client is None:
+        with _service_lock:
+            if _service is None or _service.client is None:
+                _service = MessageService()
+                metrics.register_histogram("twilio_send_seconds", "Twilio API call latency per message",
+                                           _service.latency)
+            service = _service
+    return service
@@ -0,0 +1,251 @@
+"""Per-page SQL and render timings, exported in the Prometheus text format.
+
+Off unless METRICS_ENABLED is set. When it is off, no engine listeners are
+installed and ``page`` returns the page function unchanged, so nothing runs
+on the hot path.
+"""
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Dict, Optional
+import functools
+import os
+import threading
+import time
+
+ENABLED = os.getenv("METRICS_ENABLED", "").lower() in ("1", "true", "yes")
+# Written after every page render, e.g. for node_exporter's textfile collector
+METRICS_FILE = os.getenv("METRICS_FILE", "")
+
+# Upper bounds (seconds) of the latency histogram buckets
+LATENCY_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Statements run outside any page, e.g. by a worker
+BACKGROUND = "background"
+
+
+class LatencyHistogram:
+    """Thread-safe fixed-bucket histogram of call durations, in seconds"""
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = tuple(buckets)
+        self._counts = [0] * (len(self.buckets) + 1)  # last slot is +Inf
+        self._sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, seconds: float):
+        index = bisect_left(self.buckets, seconds)
+        with self._lock:
+            self._counts[index] += 1
+            self._sum += seconds
+
+    def reset(self):
+        with self._lock:
+            self._counts = [0] * (len(self.buckets) + 1)
+            self._sum = 0.0
+
+    def snapshot(self) -> dict:
+        """Count, sum and cumulative bucket counts keyed by upper bound"""
+        with self._lock:
+            counts, total = list(self._counts), self._sum
+        cumulative, running = {}, 0
+        for bound, count in zip(self.buckets + (float("inf"),), counts):
+            running += count
+            cumulative[bound] = running
+        return {"count": running, "sum": total, "buckets": cumulative}
+
+    def percentile(self, q: float) -> float:
+        """Estimate the q-th percentile (0-100) by interpolating within its bucket"""
+        snap = self.snapshot()
+        if not snap["count"]:
+            return 0.0
+        rank = snap["count"] * q / 100
+        lower, below = 0.0, 0
+        for bound, cumulative in snap["buckets"].items():
+            if cumulative >= rank:
+                if bound == float("inf"):
+                    return lower
+                in_bucket = cumulative - below
+                return lower + (bound - lower) * (rank - below) / in_bucket
+            lower, below = bound, cumulative
+        return lower
+
+
+@dataclass
+class QueryStats:
+    statements: int = 0
+    seconds: float = 0.0
+    rows: int = 0  # rows the driver reported: affected rows, and selected rows on PostgreSQL
+
+    def add(self, other: "QueryStats"):
+        self.statements += other.statements
+        self.seconds += other.seconds
+        self.rows += other.rows
+
+
+class PageStats:
+    def __init__(self):
+        self.render = LatencyHistogram()
+        self.queries = QueryStats()
+        self.last_render = 0.0
+        self.last_queries = QueryStats()
+
+
+_pages: Dict[str, PageStats] = {}
+_histograms: Dict[str, tuple] = {}
+_lock = threading.Lock()
+
+# The statements of the page render in progress on this thread
+_current: ContextVar[Optional[QueryStats]] = ContextVar("metrics_page", default=None)
+
+
+def _page_stats(name: str) -> PageStats:
+    with _lock:
+        stats = _pages.get(name)
+        if stats is None:
+            stats = _pages[name] = PageStats()
+        return stats
+
+
+def register_histogram(name: str, help_text: str, histogram: LatencyHistogram):
+    """Export an existing histogram, e.g. MessageService.latency"""
+    with _lock:
+        _histograms[name] = (help_text, histogram)
+
+
+def instrument_engine(engine):
+    """Count each statement, its duration and row count against the current page"""
+    from sqlalchemy import event
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _start(conn, cursor, statement, parameters, context, executemany):
+        context._metrics_started = time.perf_counter()
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _finish(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - context._metrics_started
+        rows = max(cursor.rowcount, 0)
+        render = _current.get()
+        if render is not None:
+            render.statements += 1
+            render.seconds += elapsed
+            render.rows += rows
+        else:
+            stats = _page_stats(BACKGROUND)
+            with _lock:
+                stats.queries.add(QueryStats(1, elapsed, rows))
+
+
+@contextmanager
+def track(name):
+    """Time a page render and collect the statements it runs.
+
+    ``name`` may be a callable returning the name, for when it is only known
+    once the render has finished, such as an API request's route.
+    """
+    render = QueryStats()
+    token = _current.set(render)
+    started = time.perf_counter()
+    try:
+        yield render
+    finally:
+        elapsed = time.perf_counter() - started
+        _current.reset(token)
+        stats = _page_stats(name() if callable(name) else name)
+        stats.render.observe(elapsed)
+        with _lock:
+            stats.queries.add(render)
+            stats.last_render, stats.last_queries = elapsed, render
+        if METRICS_FILE:
+            write_textfile(METRICS_FILE)
+
+
+def page(func):
+    """Decorator for a page function; returns it untouched when metrics are off"""
+    if not ENABLED:
+        return func
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        with track(func.__name__):
+            return func(*args, **kwargs)
+
+    return wrapper
+
+
+def page_summary() -> list:
+    """One row per page: renders, latency percentiles, and SQL per render"""
+    with _lock:
+        pages = list(_pages.items())
+    rows = []
+    for name, stats in sorted(pages):
+        renders = stats.render.snapshot()["count"]
+        rows.append({
+            "Page": name,
+            "Renders": renders,
+            "Last ms": round(stats.last_render * 1000, 1),
+            "p50 ms": round(stats.render.percentile(50) * 1000, 1),
+            "p95 ms": round(stats.render.percentile(95) * 1000, 1),
+            "Last SQL": stats.last_queries.statements,
+            "Last SQL ms": round(stats.last_queries.seconds * 1000, 1),
+            "SQL / render": round(stats.queries.statements / renders, 1) if renders else None,
+            "Rows / render": round(stats.queries.rows / renders, 1) if renders else None,
+        })
+    return rows
+
+
+def _labels(**labels) -> str:
+    def escape(value):
+        return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+    return "{" + ",".join(f'{key}="{escape(value)}"' for key, value in labels.items()) + "}"
+
+
+def _histogram_lines(name: str, histogram: LatencyHistogram, **labels) -> list:
+    snap = histogram.snapshot()
+    lines = []
+    for bound, count in snap["buckets"].items():
+        le = "+Inf" if bound == float("inf") else repr(bound)
+        lines.append(f"{name}_bucket{_labels(**labels, le=le)} {count}")
+    suffix = _labels(**labels) if labels else ""
+    lines.append(f"{name}_sum{suffix} {snap['sum']}")
+    lines.append(f"{name}_count{suffix} {snap['count']}")
+    return lines
+
+
+def render_prometheus() -> str:
+    """All metrics in the Prometheus text exposition format"""
+    with _lock:
+        pages = sorted(_pages.items())
+        histograms = sorted(_histograms.items())
+        queries = {name: QueryStats(s.queries.statements, s.queries.seconds, s.queries.rows)
+                   for name, s in pages}
+
+    lines = [
+        "# HELP app_page_render_seconds Time to render each page",
+        "# TYPE app_page_render_seconds histogram",
+    ]
+    for name, stats in pages:
+        if stats.render.snapshot()["count"]:
+            lines += _histogram_lines("app_page_render_seconds", stats.render, page=name)
+    for metric, field, help_text in (
+        ("app_sql_statements_total", "statements", "SQL statements executed"),
+        ("app_sql_seconds_total", "seconds", "Time spent executing SQL statements"),
+        ("app_sql_rows_total", "rows", "Rows reported by the database driver"),
+    ):
+        lines += [f"# HELP {metric} {help_text}, by page", f"# TYPE {metric} counter"]
+        lines += [f"{metric}{_labels(page=name)} {getattr(stats, field)}" for name, stats in queries.items()]
+    for name, (help_text, histogram) in histograms:
+        lines += [f"# HELP {name} {help_text}", f"# TYPE {name} histogram"]
+        lines += _histogram_lines(name, histogram)
+    return "\n".join(lines) + "\n"
+
+
+def write_textfile(path: str):
+    """Write the metrics atomically, so a scraper never reads half a file"""
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w") as f:
+        f.write(render_prometheus())
+    os.replace(tmp_path, path)
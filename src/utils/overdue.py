@@ -0,0 +1,123 @@
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Optional
+import os
+
+import pandas as pd
+from sqlalchemy import insert, select, update
+
+from models.models import Client, Invoice, Job, MessageHistory, WorkerCheckpoint
+from utils.recipients import normalize_phone_numbers, valid_phone_numbers
+from utils.templates import compile_template
+
+# Days after an invoice is raised that payment is due
+PAYMENT_TERMS_DAYS = int(os.getenv("INVOICE_PAYMENT_TERMS_DAYS", "14"))
+
+# Placeholders: client_name, invoice, total, due_date
+REMINDER_TEMPLATE = os.getenv(
+    "OVERDUE_REMINDER_TEMPLATE",
+    "Hi {client_name}, invoice #{invoice} for ${total} was due on {due_date}. "
+    "Please pay by bank transfer quoting INV-{invoice}. Thank you!",
+)
+
+CHECKPOINT = "overdue_sweep"
+
+
+@dataclass
+class SweepResult:
+    overdue: int = 0
+    reminders: int = 0
+    no_phone: int = 0  # overdue invoices whose client has no valid number
+    since: Optional[datetime] = None
+    cutoff: Optional[datetime] = None
+
+
+def _newly_due(since: Optional[datetime], cutoff: datetime, limit: int):
+    """Pending invoices raised in [since, cutoff), read off ix_invoices_status_created_at"""
+    stmt = (
+        select(Invoice.id.label("invoice"), Invoice.amount, Invoice.gst, Invoice.created_at,
+               Client.name.label("client_name"), Client.phone_key, Client.contact)
+        .select_from(Invoice)
+        .outerjoin(Invoice.job)
+        .outerjoin(Job.client)
+        .where(Invoice.status == "Pending", Invoice.created_at < cutoff)
+        .order_by(Invoice.created_at, Invoice.id)
+        .limit(limit)
+    )
+    if since is not None:
+        stmt = stmt.where(Invoice.created_at >= since)
+    return stmt
+
+
+def _reminders(invoices: pd.DataFrame, terms_days: int) -> pd.DataFrame:
+    """Rendered reminder messages for invoices whose client has a valid number"""
+    phones = normalize_phone_numbers(invoices["phone_key"].fillna(invoices["contact"]).fillna(""))
+    invoices = invoices.assign(phone_number=phones)[valid_phone_numbers(phones)]
+    if invoices.empty:
+        return invoices.assign(message=pd.Series(dtype=object))
+    values = pd.DataFrame({
+        "client_name": invoices["client_name"].fillna(""),
+        "invoice": invoices["invoice"].astype(str),
+        "total": (invoices["amount"].fillna(0) + invoices["gst"].fillna(0)).map("{:.2f}".format),
+        "due_date": (pd.to_datetime(invoices["created_at"]) + pd.Timedelta(days=terms_days)
+                     ).dt.strftime("%d/%m/%Y"),
+    }, index=invoices.index)
+    return invoices.assign(message=compile_template(REMINDER_TEMPLATE).render_frame(values))
+
+
+def sweep_overdue(db, terms_days: int = PAYMENT_TERMS_DAYS, batch_size: int = 1000,
+                  send_reminders: bool = True, now: Optional[datetime] = None) -> SweepResult:
+    """Mark invoices that have passed their due date since the last sweep Overdue
+    and queue a reminder SMS for each.
+
+    Only Pending invoices raised between the previous sweep's cutoff and this
+    one's are read, through the (status, created_at) index, so a run costs
+    in proportion to the invoices that fell due since the last one. Each
+    batch is flipped with one UPDATE (which skips invoices paid in the
+    meantime) and its reminders are inserted as scheduled MessageHistory rows
+    for the scheduler worker to send, then committed.
+    """
+    now = now or datetime.utcnow()
+    checkpoint = db.get(WorkerCheckpoint, CHECKPOINT)
+    result = SweepResult(since=checkpoint.watermark if checkpoint else None,
+                         cutoff=now - timedelta(days=terms_days))
+
+    while True:
+        rows = db.execute(_newly_due(result.since, result.cutoff, batch_size))
+        batch = pd.DataFrame(rows.all(), columns=list(rows.keys()))
+        if batch.empty:
+            break
+
+        flipped = db.execute(
+            update(Invoice)
+            .where(Invoice.id.in_(batch["invoice"].tolist()), Invoice.status == "Pending")
+            .values(status="Overdue", updated_at=now)
+            .returning(Invoice.id)
+            .execution_options(synchronize_session=False)
+        ).scalars().all()
+        batch = batch[batch["invoice"].isin(flipped)]
+        result.overdue += len(batch)
+
+        if send_reminders and not batch.empty:
+            reminders = _reminders(batch, terms_days)
+            result.no_phone += len(batch) - len(reminders)
+            if not reminders.empty:
+                # scheduled_for is local time, as the scheduler expects
+                queued_at = datetime.now()
+                db.execute(insert(MessageHistory), [
+                    {"client_name": name, "phone_number": phone, "message": message,
+                     "status": "scheduled", "scheduled_for": queued_at, "created_at": now}
+                    for name, phone, message in zip(reminders["client_name"].fillna("").tolist(),
+                                                    reminders["phone_number"].tolist(),
+                                                    reminders["message"].tolist())
+                ])
+                result.reminders += len(reminders)
+        db.commit()
+
+    # The next sweep starts where this one stopped
+    if checkpoint is None:
+        checkpoint = WorkerCheckpoint(name=CHECKPOINT)
+        db.add(checkpoint)
+    checkpoint.watermark = result.cutoff
+    db.commit()
+    return result
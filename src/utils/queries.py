@@ -0,0 +1,144 @@
+from dataclasses import dataclass
+from datetime import date, datetime, time
+from typing import Optional, Tuple
+
+import pandas as pd
+from sqlalchemy import String, and_, func, or_, select, type_coerce
+
+from models.models import Cleaner, Client, Invoice, Job, MessageHistory
+
+PAGE_SIZE = 50
+
+
+@dataclass
+class Page:
+    data: pd.DataFrame
+    next_cursor: Optional[Tuple] = None
+
+    @property
+    def has_more(self) -> bool:
+        return self.next_cursor is not None
+
+
+def fetch_page(db, stmt, sort, key, after: Optional[Tuple] = None,
+               limit: int = PAGE_SIZE, descending: bool = False, nullable: bool = False) -> Page:
+    """Run one keyset-paginated page of a column-projected query.
+
+    ``sort`` is the ordering expression, normally an indexed column, and
+    ``key`` a unique tie-breaker, normally the primary key. ``after`` is the
+    ``next_cursor`` of the previous page. Each page is a single indexed range
+    query, however deep into the table it is. A ``nullable`` sort column
+    lists its NULL rows first, by key, and then the rest; this keeps the
+    bare column in ORDER BY, so its index still applies, which it would not
+    to a coalesce(). Only ascending order supports NULLs.
+    """
+    if nullable and descending:
+        raise ValueError("nullable sort columns are only paged in ascending order")
+    stmt = stmt.add_columns(sort.label("_sort"), key.label("_key"))
+    rows = []
+    if nullable and (after is None or after[0] is None):
+        nulls = stmt.where(sort.is_(None))
+        if after is not None:
+            nulls = nulls.where(key > after[1])
+        result = db.execute(nulls.order_by(key.asc()).limit(limit + 1))
+        rows = result.all()
+        after = None
+    if len(rows) <= limit:
+        if nullable:
+            stmt = stmt.where(sort.is_not(None))
+        if after is not None:
+            sort_value, key_value = after
+            if descending:
+                stmt = stmt.where(or_(sort < sort_value, and_(sort == sort_value, key < key_value)))
+            else:
+                stmt = stmt.where(or_(sort > sort_value, and_(sort == sort_value, key > key_value)))
+        order = (sort.desc(), key.desc()) if descending else (sort.asc(), key.asc())
+        result = db.execute(stmt.order_by(*order).limit(limit + 1 - len(rows)))
+        rows += result.all()
+    columns = list(result.keys())
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]._mapping
+        next_cursor = (last["_sort"], last["_key"])
+
+    data = pd.DataFrame(rows, columns=columns).drop(columns=["_sort", "_key"])
+    return Page(data, next_cursor)
+
+
+def _enum_value(column, label):
+    # Enum columns store the member name, which is also its value
+    return type_coerce(column, String).label(label)
+
+
+def client_page(db, search: str = "", sort_by: str = "Name", after=None, limit=PAGE_SIZE) -> Page:
+    stmt = select(
+        Client.name.label("Name"),
+        Client.contact.label("Contact"),
+        Client.frequency.label("Frequency"),
+        _enum_value(Client.gst_type, "GST Type"),
+        _enum_value(Client.payment_mode, "Payment Mode"),
+    )
+    if search:
+        stmt = stmt.where(Client.name.ilike(f"%{search}%"))
+    if sort_by == "Newest":
+        return fetch_page(db, stmt, Client.created_at, Client.id, after, limit, descending=True)
+    return fetch_page(db, stmt, Client.name, Client.id, after, limit, nullable=True)
+
+
+def cleaner_page(db, search: str = "", sort_by: str = "Name", after=None, limit=PAGE_SIZE) -> Page:
+    stmt = select(
+        Cleaner.name.label("Name"),
+        Cleaner.cost_rate.label("Cost Rate"),
+        _enum_value(Cleaner.employment_type, "Type"),
+    )
+    if search:
+        stmt = stmt.where(Cleaner.name.ilike(f"%{search}%"))
+    if sort_by == "Cost Rate":
+        page = fetch_page(db, stmt, Cleaner.cost_rate, Cleaner.id, after, limit, nullable=True)
+    else:
+        page = fetch_page(db, stmt, Cleaner.name, Cleaner.id, after, limit, nullable=True)
+    page.data["Cost Rate"] = page.data["Cost Rate"].map("${:.2f}".format, na_action="ignore")
+    return page
+
+
+def invoice_page(db, status: str = "", after=None, limit=PAGE_SIZE) -> Page:
+    # Client names come from the same query via joins, not a lazy load per invoice
+    stmt = (
+        select(
+            Invoice.id.label("Invoice #"),
+            Client.name.label("Client"),
+            Invoice.amount.label("Amount"),
+            Invoice.gst.label("GST"),
+            Invoice.status.label("Status"),
+        )
+        .outerjoin(Invoice.job)
+        .outerjoin(Job.client)
+    )
+    if status:
+        stmt = stmt.where(Invoice.status == status)
+    page = fetch_page(db, stmt, Invoice.id, Invoice.id, after, limit, descending=True)
+    for column in ("Amount", "GST"):
+        page.data[column] = page.data[column].map("${:.2f}".format, na_action="ignore")
+    return page
+
+
+def message_history_page(db, status: str = "", start: Optional[date] = None,
+                         end: Optional[date] = None, after=None, limit=PAGE_SIZE) -> Page:
+    stmt = select(
+        MessageHistory.client_name.label("Client"),
+        MessageHistory.phone_number.label("Phone"),
+        MessageHistory.status.label("Status"),
+        func.coalesce(MessageHistory.delivery_status, "").label("Delivery"),
+        MessageHistory.scheduled_for.label("Scheduled For"),
+        MessageHistory.sent_at.label("Sent At"),
+        func.coalesce(MessageHistory.error, "").label("Error"),
+    )
+    if status:
+        stmt = stmt.where(MessageHistory.status == status)
+    if start:
+        stmt = stmt.where(MessageHistory.created_at >= datetime.combine(start, time.min))
+    if end:
+        stmt = stmt.where(MessageHistory.created_at <= datetime.combine(end, time.max))
+    return fetch_page(db, stmt, MessageHistory.created_at, MessageHistory.id, after, limit, descending=True)
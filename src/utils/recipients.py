@@ -0,0 +1,88 @@
+from dataclasses import dataclass, field
+from typing import List
+
+import pandas as pd
+
+REQUIRED_COLUMNS = ["Client Name", "Phone Number"]
+
+# Australian numbers in E.164: +61 followed by a 9 digit national number
+E164_PATTERN = r"\+61[1-9]\d{8}"
+
+
+def normalize_phone_numbers(phones: pd.Series) -> pd.Series:
+    """Vectorized equivalent of MessageService.format_phone_number"""
+    digits = phones.astype("string").fillna("").str.replace(r"[^\d+]", "", regex=True)
+    digits = digits.str.replace(r"^\+", "", regex=True)
+    local = ~digits.str.startswith("61")
+    digits = digits.mask(local, "61" + digits.str.lstrip("0"))
+    return "+" + digits
+
+
+def valid_phone_numbers(phones: pd.Series) -> pd.Series:
+    """Boolean mask of normalized numbers that are valid E.164 mobile/landline numbers"""
+    return phones.str.fullmatch(E164_PATTERN).fillna(False).astype(bool)
+
+
+@dataclass
+class RecipientSet:
+    recipients: pd.DataFrame
+    invalid: pd.DataFrame
+    preview: pd.DataFrame
+    total_rows: int = 0
+    duplicates: int = 0
+    columns: List[str] = field(default_factory=list)
+
+
+def load_recipients(source, chunksize: int = 50_000, preview_rows: int = 100) -> RecipientSet:
+    """Read a recipient CSV in chunks, normalizing, validating and deduplicating phone numbers.
+
+    Every column is kept as a string so it can be used in message templates.
+    Raises ValueError if the required columns are missing.
+    """
+    valid_chunks = []
+    invalid_chunks = []
+    preview = None
+    total_rows = 0
+
+    for chunk in pd.read_csv(source, chunksize=chunksize, dtype=str, keep_default_na=False):
+        if preview is None:
+            missing = [col for col in REQUIRED_COLUMNS if col not in chunk.columns]
+            if missing:
+                raise ValueError(f"CSV must contain columns: {', '.join(repr(c) for c in REQUIRED_COLUMNS)}")
+            preview = chunk.head(preview_rows)
+
+        # 1-based data row numbers, matching what users see in a spreadsheet
+        chunk.index = pd.RangeIndex(total_rows + 1, total_rows + 1 + len(chunk), name="Row")
+        total_rows += len(chunk)
+
+        raw = chunk["Phone Number"].str.strip()
+        normalized = normalize_phone_numbers(raw)
+        valid = valid_phone_numbers(normalized)
+
+        if not valid.all():
+            bad = chunk.loc[~valid, REQUIRED_COLUMNS].copy()
+            bad["Reason"] = "Invalid phone number"
+            bad.loc[raw[~valid] == "", "Reason"] = "Missing phone number"
+            invalid_chunks.append(bad)
+
+        good = chunk[valid].copy()
+        good["Phone Number"] = normalized[valid]
+        valid_chunks.append(good)
+
+    if preview is None:
+        raise ValueError("CSV file is empty")
+
+    recipients = pd.concat(valid_chunks)
+    before = len(recipients)
+    recipients = recipients.drop_duplicates(subset="Phone Number", keep="first")
+    invalid = pd.concat(invalid_chunks) if invalid_chunks else pd.DataFrame(
+        columns=REQUIRED_COLUMNS + ["Reason"])
+
+    return RecipientSet(
+        recipients=recipients,
+        invalid=invalid,
+        preview=preview,
+        total_rows=total_rows,
+        duplicates=before - len(recipients),
+        columns=list(preview.columns),
+    )
@@ -0,0 +1,153 @@
+from dataclasses import dataclass, field
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import insert, select, update
+
+from models.models import Invoice, Payment, PaymentMode
+
+# Invoices a bank transfer can still pay
+OPEN_STATUSES = ("Pending", "Overdue")
+
+# Invoice numbers as clients write them in a transfer reference:
+# "INV-1234", "inv1234", "Invoice No. 1234", "#1234"
+INVOICE_REFERENCE = r"(?i)(?:\binv(?:oice)?(?:\s*no\.?)?|#)\s*[#:-]?\s*(\d+)"
+
+DATE_COLUMNS = ["Date", "Transaction Date"]
+AMOUNT_COLUMNS = ["Amount", "Credit"]
+TEXT_COLUMNS = ["Reference", "Description", "Narrative", "Details"]
+
+REVIEW_COLUMNS = ["Line", "Date", "Description", "Amount", "Reason"]
+
+
+@dataclass
+class ReconciliationResult:
+    total_lines: int = 0
+    matched: int = 0
+    amount: float = 0.0
+    debits: int = 0  # outgoing transactions, ignored
+    # One row per credit that could not be matched: Line, Date, Description, Amount, Reason
+    unmatched: pd.DataFrame = field(default_factory=lambda: pd.DataFrame(columns=REVIEW_COLUMNS))
+
+
+def _first_column(frame: pd.DataFrame, names):
+    for name in names:
+        if name in frame.columns:
+            return name
+    return None
+
+
+def read_statement(source) -> pd.DataFrame:
+    """Read a bank statement CSV into Line, Date, Description, Amount.
+
+    Needs a date column, an amount (or credit) column and at least one of
+    the reference/description columns; reference columns are joined so an
+    invoice number is found wherever the bank put it. Raises ValueError if
+    the columns are missing.
+    """
+    raw = pd.read_csv(source, dtype=str, keep_default_na=False)
+    raw.columns = raw.columns.str.strip()
+    date_column = _first_column(raw, DATE_COLUMNS)
+    amount_column = _first_column(raw, AMOUNT_COLUMNS)
+    text_columns = [c for c in TEXT_COLUMNS if c in raw.columns]
+    if date_column is None or amount_column is None or not text_columns:
+        raise ValueError("Statement CSV must contain Date, Amount and Reference or Description columns")
+
+    statement = pd.DataFrame(index=pd.RangeIndex(1, len(raw) + 1, name="Line"))
+    statement["Date"] = pd.to_datetime(raw[date_column].str.strip().to_numpy(), dayfirst=True, errors="coerce")
+    description = raw[text_columns[0]]
+    for column in text_columns[1:]:
+        description = description + " " + raw[column]
+    statement["Description"] = description.str.strip().to_numpy()
+    amounts = raw[amount_column].str.replace(r"[$,\s]", "", regex=True)
+    if amount_column == "Credit":
+        # Separate Credit/Debit columns: a blank credit is an outgoing payment
+        amounts = amounts.replace("", "0")
+    statement["Amount"] = pd.to_numeric(amounts.to_numpy(), errors="coerce")
+    return statement
+
+
+def _open_invoices(db) -> pd.DataFrame:
+    result = db.execute(
+        select(Invoice.id.label("invoice_id"), Invoice.amount, Invoice.gst)
+        .where(Invoice.status.in_(OPEN_STATUSES))
+    )
+    invoices = pd.DataFrame(result.all(), columns=list(result.keys()))
+    # Totals in cents, so amounts compare exactly
+    invoices["due_cents"] = np.round((invoices["amount"].fillna(0) + invoices["gst"].fillna(0)) * 100).astype("int64")
+    return invoices.set_index("invoice_id")
+
+
+def match_statement(statement: pd.DataFrame, invoices: pd.DataFrame):
+    """Match credits to open invoices by the invoice number in their reference and the exact total.
+
+    ``invoices`` is indexed by invoice id with a ``due_cents`` column. The
+    lookup is a hash join on invoice id. Returns (matched, unmatched,
+    debits): matched has Line, invoice_id, Date and Amount; unmatched is the
+    review list with a Reason per line.
+    """
+    credits = statement[~(statement["Amount"] <= 0)].copy()
+    debits = len(statement) - len(credits)
+
+    reasons = pd.Series("", index=credits.index)
+    reasons[credits["Date"].isna()] = "Unreadable date"
+    reasons[(reasons == "") & credits["Amount"].isna()] = "Unreadable amount"
+
+    credits["invoice_id"] = pd.to_numeric(
+        credits["Description"].str.extract(INVOICE_REFERENCE, expand=False), errors="coerce").astype("Int64")
+    reasons[(reasons == "") & credits["invoice_id"].isna()] = "No invoice number in reference"
+
+    # Hash join against the outstanding invoices
+    due = credits["invoice_id"].map(invoices["due_cents"])
+    paid_cents = np.round(credits["Amount"] * 100)
+    reasons[(reasons == "") & due.isna()] = ("Invoice " + credits["invoice_id"].astype(str)
+                                              + " not found or already paid")
+    wrong_amount = (reasons == "") & (paid_cents != due)
+    if wrong_amount.any():
+        # (an empty float Series would not concatenate with the string)
+        reasons[wrong_amount] = ("Amount differs from invoice total $"
+                                 + (due[wrong_amount] / 100).map("{:.2f}".format))
+
+    # One payment per invoice: a repeated transfer is left for review
+    candidate = reasons == ""
+    repeated = candidate & credits["invoice_id"].where(candidate).duplicated(keep="first")
+    reasons[repeated] = "Invoice " + credits["invoice_id"].astype(str) + " already matched on an earlier line"
+
+    matched = credits.loc[reasons == "", ["invoice_id", "Date", "Amount"]].reset_index()
+    unmatched = credits.loc[reasons != "", ["Date", "Description", "Amount"]]
+    unmatched = unmatched.assign(Reason=reasons[reasons != ""]).reset_index()[REVIEW_COLUMNS]
+    return matched, unmatched, debits
+
+
+def reconcile_statement(db, source) -> ReconciliationResult:
+    """Record bank transfers from a statement CSV as payments.
+
+    Each matched credit adds a BANK_TRANSFER Payment and marks its invoice
+    Paid; all of them are written in one transaction. Invoices already paid
+    are not open, so re-uploading a statement matches nothing twice.
+    """
+    statement = read_statement(source)
+    result = ReconciliationResult(total_lines=len(statement))
+    if statement.empty:
+        return result
+
+    matched, result.unmatched, result.debits = match_statement(statement, _open_invoices(db))
+    if matched.empty:
+        return result
+
+    now = datetime.utcnow()
+    invoice_ids = matched["invoice_id"].astype(int).tolist()
+    db.execute(insert(Payment), [
+        {"invoice_id": invoice_id, "mode": PaymentMode.BANK_TRANSFER, "amount": amount,
+         "payment_date": paid_on, "created_at": now, "updated_at": now}
+        for invoice_id, amount, paid_on in zip(invoice_ids, matched["Amount"].tolist(),
+                                               matched["Date"].dt.to_pydatetime().tolist())
+    ])
+    db.execute(update(Invoice), [{"id": invoice_id, "status": "Paid", "updated_at": now}
+                                 for invoice_id in invoice_ids])
+    db.commit()
+
+    result.matched = len(matched)
+    result.amount = float(matched["Amount"].sum())
+    return result
@@ -0,0 +1,170 @@
+import glob
+import importlib.util
+import os
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta
+from typing import Optional
+
+import pandas as pd
+from sqlalchemy import delete, select
+
+from models.models import MessageHistory
+from utils.queries import PAGE_SIZE, Page
+
+RETENTION_DAYS = int(os.getenv("MESSAGE_RETENTION_DAYS", "180"))
+ARCHIVE_DIR = os.getenv("MESSAGE_ARCHIVE_DIR", os.path.join("archive", "message_history"))
+# Parquet needs pyarrow, which is optional; gzipped CSV works everywhere
+ARCHIVE_FORMAT = os.getenv(
+    "MESSAGE_ARCHIVE_FORMAT", "parquet" if importlib.util.find_spec("pyarrow") else "csv.gz")
+ARCHIVE_FORMATS = ("parquet", "csv.gz")
+
+# Messages still waiting to be sent are never archived
+ARCHIVABLE_STATUSES = ("success", "failed")
+ARCHIVE_COLUMNS = ["id", "client_name", "phone_number", "message", "status", "error",
+                   "scheduled_for", "sent_at", "message_sid", "delivery_status", "delivery_updated_at",
+                   "created_at"]
+DATETIME_COLUMNS = ["scheduled_for", "sent_at", "delivery_updated_at", "created_at"]
+TEXT_COLUMNS = ["client_name", "phone_number", "message", "status", "error", "message_sid", "delivery_status"]
+
+
+@dataclass
+class ArchiveResult:
+    archived: int = 0
+    files: int = 0
+    partitions: int = 0
+    cutoff: Optional[datetime] = None
+
+
+def _partition_dir(archive_dir, day) -> str:
+    return os.path.join(archive_dir, f"date={day.isoformat()}")
+
+
+def _write(frame, path, fmt):
+    # Write under a temporary name and rename, so a crash never leaves a
+    # truncated file that readers would pick up
+    tmp = path + ".tmp"
+    if fmt == "parquet":
+        frame.to_parquet(tmp, index=False, compression="zstd")
+    else:
+        frame.to_csv(tmp, index=False, compression="gzip")
+    os.replace(tmp, path)
+
+
+def _read(path) -> pd.DataFrame:
+    # Archives written before a column was added read it as empty
+    if path.endswith(".parquet"):
+        return pd.read_parquet(path).reindex(columns=ARCHIVE_COLUMNS)
+    frame = pd.read_csv(path, compression="gzip", dtype={column: str for column in TEXT_COLUMNS},
+                        keep_default_na=False,
+                        na_values={column: [""] for column in DATETIME_COLUMNS})
+    frame = frame.reindex(columns=ARCHIVE_COLUMNS)
+    for column in DATETIME_COLUMNS:
+        frame[column] = pd.to_datetime(frame[column])
+    return frame
+
+
+def archive_message_history(db, older_than_days: int = RETENTION_DAYS, archive_dir: str = ARCHIVE_DIR,
+                            fmt: str = ARCHIVE_FORMAT, batch_size: int = 5000,
+                            now: Optional[datetime] = None) -> ArchiveResult:
+    """Move sent/failed messages older than older_than_days into date-partitioned archive files.
+
+    Rows are taken in id order, batch_size at a time. Each batch is written as
+    one file per created_at date, ``<archive_dir>/date=YYYY-MM-DD/part-<first id>-<last id>.<fmt>``,
+    and only then deleted from message_history and committed. If a run is
+    interrupted between writing and deleting, the next run selects the same
+    rows and overwrites the same files, so nothing is archived twice.
+    """
+    if fmt not in ARCHIVE_FORMATS:
+        raise ValueError(f"Archive format must be one of: {', '.join(ARCHIVE_FORMATS)}")
+
+    cutoff = (now or datetime.utcnow()) - timedelta(days=older_than_days)
+    columns = [getattr(MessageHistory, name) for name in ARCHIVE_COLUMNS]
+    stmt = (
+        select(*columns)
+        .where(MessageHistory.created_at < cutoff, MessageHistory.status.in_(ARCHIVABLE_STATUSES))
+        .order_by(MessageHistory.id)
+        .limit(batch_size)
+    )
+
+    result = ArchiveResult(cutoff=cutoff)
+    partitions = set()
+    while True:
+        rows = db.execute(stmt).all()
+        if not rows:
+            break
+        batch = pd.DataFrame(rows, columns=ARCHIVE_COLUMNS)
+        for day, part in batch.groupby(batch["created_at"].dt.date):
+            directory = _partition_dir(archive_dir, day)
+            os.makedirs(directory, exist_ok=True)
+            name = f"part-{part['id'].iloc[0]:012d}-{part['id'].iloc[-1]:012d}.{fmt}"
+            _write(part, os.path.join(directory, name), fmt)
+            partitions.add(day)
+            result.files += 1
+
+        db.execute(
+            delete(MessageHistory).where(MessageHistory.id.in_(batch["id"].tolist())),
+            execution_options={"synchronize_session": False},
+        )
+        db.commit()
+        result.archived += len(batch)
+
+    result.partitions = len(partitions)
+    return result
+
+
+def archived_history_page(status: str = "", start: Optional[date] = None, end: Optional[date] = None,
+                          after=None, limit: int = PAGE_SIZE, archive_dir: str = ARCHIVE_DIR) -> Page:
+    """One page of archived messages, newest first, shaped like message_history_page.
+
+    Only the date partitions that can hold the page are read: those within
+    start/end, from the cursor's date backwards, until the page is full.
+    """
+    days = []
+    for directory in glob.glob(os.path.join(archive_dir, "date=*")):
+        try:
+            day = date.fromisoformat(os.path.basename(directory)[len("date="):])
+        except ValueError:
+            continue
+        if (start and day < start) or (end and day > end):
+            continue
+        if after is not None and day > pd.Timestamp(after[0]).date():
+            continue
+        days.append((day, directory))
+
+    frames, found = [], 0
+    for day, directory in sorted(days, reverse=True):
+        files = sorted(glob.glob(os.path.join(directory, "*.parquet")) +
+                       glob.glob(os.path.join(directory, "*.csv.gz")))
+        if not files:
+            continue
+        frame = pd.concat([_read(path) for path in files], ignore_index=True)
+        if status:
+            frame = frame[frame["status"] == status]
+        if after is not None:
+            sort_value, key_value = pd.Timestamp(after[0]), after[1]
+            frame = frame[(frame["created_at"] < sort_value) |
+                          ((frame["created_at"] == sort_value) & (frame["id"] < key_value))]
+        frames.append(frame)
+        found += len(frame)
+        if found > limit:
+            break
+
+    columns = {"client_name": "Client", "phone_number": "Phone", "status": "Status",
+               "delivery_status": "Delivery", "scheduled_for": "Scheduled For", "sent_at": "Sent At",
+               "error": "Error"}
+    if not frames:
+        return Page(pd.DataFrame(columns=list(columns.values())))
+
+    rows = (pd.concat(frames, ignore_index=True)
+            .sort_values(["created_at", "id"], ascending=False)
+            .head(limit + 1))
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows.head(limit)
+        last = rows.iloc[-1]
+        next_cursor = (last["created_at"].to_pydatetime(), int(last["id"]))
+
+    data = rows[list(columns)].rename(columns=columns)
+    data["Error"] = data["Error"].fillna("")
+    data["Delivery"] = data["Delivery"].fillna("")
+    return Page(data.reset_index(drop=True), next_cursor)
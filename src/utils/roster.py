@@ -0,0 +1,238 @@
+from dataclasses import dataclass, field
+from datetime import date, datetime, time, timedelta
+from typing import List, Optional
+import os
+
+from dateutil.relativedelta import relativedelta
+import numpy as np
+import pandas as pd
+from sqlalchemy import func, insert, select, update
+
+from models.models import Cleaner, Client, Job, Roster
+
+WEEKDAYS = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
+
+FREQUENCIES = {
+    "Weekly": relativedelta(weeks=1),
+    "Fortnightly": relativedelta(weeks=2),
+    "Monthly": relativedelta(months=1),
+    "3-Monthly": relativedelta(months=3),
+}
+
+JOB_HOURS = float(os.getenv("ROSTER_JOB_HOURS", "2"))
+JOBS_PER_DAY = int(os.getenv("ROSTER_JOBS_PER_DAY", "4"))
+DAY_START = time(8, 0)
+
+
+def availability_mask(availability: Optional[str]) -> int:
+    """Bitmask of weekdays (bit 0 = Monday) from a comma-joined list of day names"""
+    mask = 0
+    for day in (availability or "").split(","):
+        day = day.strip().capitalize()
+        if day in WEEKDAYS:
+            mask |= 1 << WEEKDAYS.index(day)
+    return mask
+
+
+def next_week_start(today: Optional[date] = None) -> date:
+    today = today or date.today()
+    return today + timedelta(days=7 - today.weekday())
+
+
+@dataclass
+class RosterResult:
+    assigned: int = 0
+    created: int = 0
+    total_cost: float = 0.0
+    unassigned: List[dict] = field(default_factory=list)
+
+
+def _demand(db, week_start: datetime, week_end: datetime) -> pd.DataFrame:
+    """Jobs that need a cleaner this week: unassigned existing jobs plus
+    new jobs for clients whose next clean falls due before the week ends."""
+    existing = db.execute(
+        select(Job.id, Job.client_id, Job.date)
+        .where(Job.date >= week_start, Job.date < week_end,
+               Job.cleaner_id.is_(None), Job.status == "Scheduled")
+    ).all()
+
+    # A NULL in a NOT IN list matches nothing, so jobs without a client are left out
+    booked = select(Job.client_id).where(Job.date >= week_start, Job.date < week_end,
+                                         Job.client_id.is_not(None))
+    last_jobs = (
+        select(Job.client_id, func.max(Job.date).label("last_date"))
+        .where(Job.status != "Cancelled")
+        .group_by(Job.client_id)
+        .subquery()
+    )
+    due = db.execute(
+        select(Client.id, Client.frequency, last_jobs.c.last_date)
+        .outerjoin(last_jobs, last_jobs.c.client_id == Client.id)
+        .where(Client.frequency.in_(FREQUENCIES), Client.id.not_in(booked))
+    ).all()
+
+    rows = [{"job_id": job_id, "client_id": client_id, "weekday": job_date.weekday() if job_date else -1}
+            for job_id, client_id, job_date in existing]
+    for client_id, frequency, last_date in due:
+        if last_date is None:
+            rows.append({"job_id": None, "client_id": client_id, "weekday": -1})
+        elif last_date + FREQUENCIES[frequency] < week_end:
+            # Keep clients on the same weekday as their previous clean
+            rows.append({"job_id": None, "client_id": client_id, "weekday": last_date.weekday()})
+    return pd.DataFrame(rows, columns=["job_id", "client_id", "weekday"])
+
+
+def assign(jobs: pd.DataFrame, cost_rates: np.ndarray, masks: np.ndarray,
+           free: np.ndarray, hours: float = JOB_HOURS):
+    """Greedy minimum-cost assignment of jobs to (cleaner, weekday) slots.
+
+    ``free`` is a cleaners x 7 x slots-per-day boolean array of open slots
+    and is updated in place. Jobs with the fewest feasible slots are placed
+    first; each takes the cheapest cleaner with an open slot, preferring the
+    job's usual weekday, and the earliest open slot of that day. Returns
+    arrays of cleaner index, weekday and slot number (-1 where a job could
+    not be placed).
+    """
+    n = len(jobs)
+    cleaner_idx = np.full(n, -1)
+    day_idx = np.full(n, -1)
+    slot_idx = np.full(n, -1)
+    if n == 0 or len(cost_rates) == 0:
+        return cleaner_idx, day_idx, slot_idx
+
+    available = (masks[:, None] >> np.arange(7)) & 1 == 1  # cleaners x 7
+    free[~available] = False
+    capacity = free.sum(axis=2)
+    # Job cost per cleaner, with a small penalty for moving off the preferred day
+    cost = np.broadcast_to((cost_rates * hours)[:, None], capacity.shape)
+    off_day_penalty = 1e-3 * (cost.max() + 1)
+
+    preferred = jobs["weekday"].to_numpy()
+    open_slots = (capacity > 0)
+    flexibility = np.where(preferred >= 0, open_slots[:, preferred.clip(0)].sum(axis=0), open_slots.sum())
+    order = np.argsort(flexibility, kind="stable")
+
+    days = np.arange(7)
+    for j in order:
+        penalty = np.where(days == preferred[j], 0.0, off_day_penalty) if preferred[j] >= 0 else 0.0
+        score = np.where(capacity > 0, cost + penalty, np.inf)
+        best = score.argmin()
+        c, d = divmod(best, 7)
+        if not np.isfinite(score[c, d]):
+            continue
+        cleaner_idx[j], day_idx[j] = c, d
+        slot_idx[j] = int(free[c, d].argmax())
+        free[c, d, slot_idx[j]] = False
+        capacity[c, d] -= 1
+    return cleaner_idx, day_idx, slot_idx
+
+
+def _book(free: np.ndarray, week_start: datetime, start: datetime, end: datetime, hours: float):
+    """Close the slots of one cleaner's week (7 x slots) that [start, end) overlaps.
+
+    A job outside every slot, e.g. one at midnight from before jobs had
+    times, still takes the day's last open slot, so the cleaner does no
+    more than the usual number of jobs that day.
+    """
+    day = (start - week_start).days
+    if not 0 <= day < 7:
+        return
+    day_start = week_start + timedelta(days=day, hours=DAY_START.hour)
+    slot_starts = [day_start + timedelta(hours=s * hours) for s in range(free.shape[1])]
+    overlapping = [s for s, slot_start in enumerate(slot_starts)
+                   if slot_start < end and start < slot_start + timedelta(hours=hours)]
+    if overlapping:
+        free[day, overlapping] = False
+    elif free[day].any():
+        free[day, np.flatnonzero(free[day])[-1]] = False
+
+
+def generate_roster(db, week_start: date, jobs_per_day: int = JOBS_PER_DAY,
+                    hours: float = JOB_HOURS) -> RosterResult:
+    """Create and assign next week's jobs, writing Job and Roster rows in bulk"""
+    start = datetime.combine(week_start, time.min)
+    end = start + timedelta(days=7)
+
+    cleaners = db.execute(select(Cleaner.id, Cleaner.cost_rate, Cleaner.availability)).all()
+    cleaner_ids = np.array([c.id for c in cleaners], dtype=np.int64)
+    cost_rates = np.array([c.cost_rate or 0.0 for c in cleaners], dtype=float)
+    masks = np.array([availability_mask(c.availability) for c in cleaners], dtype=np.int64)
+
+    # Slots left open by the jobs already booked this week, at the times they are booked
+    free = np.ones((len(cleaners), 7, jobs_per_day), dtype=bool)
+    position = {cid: i for i, cid in enumerate(cleaner_ids)}
+    booked = db.execute(
+        select(Job.cleaner_id, Job.date, Job.start_at, Job.end_at)
+        .where(Job.date >= start, Job.date < end, Job.cleaner_id.is_not(None), Job.status != "Cancelled")
+    ).all()
+    for cleaner_id, job_date, start_at, end_at in booked:
+        if cleaner_id in position:
+            job_start = start_at or job_date
+            _book(free[position[cleaner_id]], start, job_start, end_at or job_start + timedelta(hours=hours),
+                  hours)
+
+    jobs = _demand(db, start, end)
+    cleaner_idx, day_idx, slot_idx = assign(jobs, cost_rates, masks, free, hours)
+
+    result = RosterResult()
+    placed = cleaner_idx >= 0
+    for row in jobs[~placed].itertuples():
+        result.unassigned.append({"client_id": row.client_id, "job_id": row.job_id})
+    if not placed.any():
+        return result
+
+    jobs = jobs[placed].assign(
+        cleaner_id=cleaner_ids[cleaner_idx[placed]],
+        cost=cost_rates[cleaner_idx[placed]] * hours,
+    )
+    starts = [start + timedelta(days=int(d), hours=DAY_START.hour + int(s) * hours)
+              for d, s in zip(day_idx[placed], slot_idx[placed])]
+    jobs["date"] = starts
+    jobs["time"] = [s.strftime("%H:%M") for s in starts]
+    jobs["end_at"] = jobs["date"] + pd.Timedelta(hours=hours)
+
+    new = jobs[jobs["job_id"].isna()]
+    existing = jobs[jobs["job_id"].notna()]
+
+    job_ids = []
+    if len(new):
+        job_ids += db.execute(
+            insert(Job).returning(Job.id, sort_by_parameter_order=True),
+            [{"client_id": int(r.client_id), "cleaner_id": int(r.cleaner_id), "date": r.date.to_pydatetime(),
+              "time": r.time, "start_at": r.date.to_pydatetime(), "end_at": r.end_at.to_pydatetime(),
+              "status": "Scheduled"} for r in new.itertuples()]
+        ).scalars().all()
+    if len(existing):
+        db.execute(update(Job), [
+            {"id": int(r.job_id), "cleaner_id": int(r.cleaner_id), "date": r.date.to_pydatetime(), "time": r.time,
+             "start_at": r.date.to_pydatetime(), "end_at": r.end_at.to_pydatetime()}
+            for r in existing.itertuples()
+        ])
+        job_ids += [int(j) for j in existing["job_id"]]
+
+    costs = list(new["cost"]) + list(existing["cost"])
+    db.execute(insert(Roster), [{"job_id": j, "cost": c} for j, c in zip(job_ids, costs)])
+    db.commit()
+
+    result.assigned = len(jobs)
+    result.created = len(new)
+    result.total_cost = float(jobs["cost"].sum())
+    return result
+
+
+def week_roster(db, week_start: date) -> pd.DataFrame:
+    start = datetime.combine(week_start, time.min)
+    result = db.execute(
+        select(
+            Job.date.label("Date"),
+            Job.time.label("Time"),
+            Client.name.label("Client"),
+            Cleaner.name.label("Cleaner"),
+            Job.status.label("Status"),
+        )
+        .outerjoin(Job.client)
+        .outerjoin(Job.cleaner)
+        .where(Job.date >= start, Job.date < start + timedelta(days=7))
+        .order_by(Job.date, Cleaner.name)
+    )
+    return pd.DataFrame(result.all(), columns=list(result.keys()))
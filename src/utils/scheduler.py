@@ -0,0 +1,132 @@
+from datetime import datetime, timedelta
+from typing import List, Optional
+import os
+import socket
+import threading
+import uuid
+
+from sqlalchemy import func, select, update
+
+from models.models import MessageHistory
+from utils.dispatch import BulkDispatcher, DispatchResult, OutgoingMessage
+
+
+class ScheduledMessageWorker:
+    """Deliver MessageHistory rows with status "scheduled" once they fall due.
+
+    Due rows are found through the (status, scheduled_for) index and claimed
+    with a single UPDATE that flips them to "sending" and stamps a claim
+    token, so two workers can never pick up the same row. On PostgreSQL the
+    candidate rows are additionally locked with SKIP LOCKED so concurrent
+    workers claim disjoint batches instead of waiting on each other.
+    """
+
+    def __init__(self, session_factory, service, batch_size: int = 500,
+                 poll_interval: float = 30.0, lease: timedelta = timedelta(minutes=10),
+                 dispatcher: Optional[BulkDispatcher] = None):
+        self.session_factory = session_factory
+        self.service = service
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self.lease = lease
+        self.dispatcher = dispatcher or BulkDispatcher(service)
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}"
+        self._stop = threading.Event()
+
+    @staticmethod
+    def _now() -> datetime:
+        # scheduled_for is entered as local time on the Messaging page
+        return datetime.now()
+
+    def claim_due(self, db, now: datetime) -> List[OutgoingMessage]:
+        """Atomically claim up to batch_size due messages for this worker"""
+        token = f"{self.worker_id}:{uuid.uuid4().hex}"
+        due = (
+            select(MessageHistory.id)
+            .where(MessageHistory.status == "scheduled", MessageHistory.scheduled_for <= now)
+            .order_by(MessageHistory.scheduled_for)
+            .limit(self.batch_size)
+        )
+        if db.bind.dialect.name == "postgresql":
+            due = due.with_for_update(skip_locked=True)
+        claimed = db.execute(
+            update(MessageHistory)
+            .where(MessageHistory.id.in_(due.scalar_subquery()), MessageHistory.status == "scheduled")
+            .values(status="sending", claimed_by=token, claimed_at=now)
+            .returning(MessageHistory.id, MessageHistory.phone_number,
+                       MessageHistory.message, MessageHistory.client_name)
+            .execution_options(synchronize_session=False)
+        ).all()
+        db.commit()
+        return [OutgoingMessage(phone=row.phone_number, body=row.message,
+                                client_name=row.client_name or "", history_id=row.id)
+                for row in claimed]
+
+    def release_stale_claims(self, db, now: datetime) -> int:
+        """Return rows claimed by a worker that died mid-send to the queue"""
+        result = db.execute(
+            update(MessageHistory)
+            .where(MessageHistory.status == "sending", MessageHistory.claimed_at < now - self.lease)
+            .values(status="scheduled", claimed_by=None, claimed_at=None)
+            .execution_options(synchronize_session=False)
+        )
+        db.commit()
+        return result.rowcount
+
+    def next_due(self, db) -> Optional[datetime]:
+        return db.execute(
+            select(func.min(MessageHistory.scheduled_for))
+            .where(MessageHistory.status == "scheduled")
+        ).scalar()
+
+    @staticmethod
+    def _record_results(db, results: List[DispatchResult]):
+        db.execute(update(MessageHistory), [{
+            "id": r.message.history_id,
+            "status": "success" if r.success else "failed",
+            "error": r.error,
+            "sent_at": r.sent_at,
+            "message_sid": r.message_sid,
+            "claimed_by": None,
+        } for r in results])
+        db.commit()
+
+    def run_once(self) -> int:
+        """Claim and send one batch of due messages, returning how many were sent"""
+        db = self.session_factory()
+        try:
+            now = self._now()
+            self.release_stale_claims(db, now)
+            messages = self.claim_due(db, now)
+            if not messages:
+                return 0
+            summary = self.dispatcher.dispatch(
+                messages, on_batch=lambda results: self._record_results(db, results)
+            )
+            print(f"Delivered {summary.succeeded}/{summary.total} scheduled messages "
+                  f"({summary.rate:.1f} msgs/sec)")
+            return summary.total
+        finally:
+            db.close()
+
+    def seconds_until_next_due(self) -> float:
+        db = self.session_factory()
+        try:
+            next_due = self.next_due(db)
+        finally:
+            db.close()
+        if next_due is None:
+            return self.poll_interval
+        # Re-check at least every poll_interval in case earlier messages are scheduled
+        return max(0.0, min(self.poll_interval, (next_due - self._now()).total_seconds()))
+
+    def run_forever(self):
+        print(f"Scheduler {self.worker_id} started")
+        while not self._stop.is_set():
+            if self.run_once():
+                continue  # keep draining while there is a backlog
+            self._stop.wait(self.seconds_until_next_due())
+        print(f"Scheduler {self.worker_id} stopped")
+
+    def stop(self):
+        self._stop.set()
@@ -0,0 +1,180 @@
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from datetime import date, datetime, time, timedelta
+from typing import List, Optional
+import os
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import select, update
+
+from models.models import Client, Job
+from utils.roster import JOB_HOURS
+
+EARTH_RADIUS_KM = 6371.0088
+
+# Processes used to sequence a week; 1 sequences in this process
+WORKERS = int(os.getenv("SEQUENCING_WORKERS", "0")) or os.cpu_count() or 1
+
+# Below this many cleaner-days, starting worker processes costs more than it saves
+PARALLEL_MIN_ROUTES = 200
+
+# Routes up to this long try nearest-neighbour from every job, longer ones from the first
+MULTI_START_MAX = 16
+
+
+@dataclass
+class SequencingResult:
+    routes: int = 0  # cleaner-days with at least three located jobs
+    jobs_moved: int = 0
+    km_before: float = 0.0
+    km_after: float = 0.0
+    unlocated: int = 0  # jobs whose client has no coordinates; they keep their time
+
+
+def haversine_matrix(latitude: np.ndarray, longitude: np.ndarray) -> np.ndarray:
+    """Great-circle distance in km between every pair of points"""
+    lat = np.radians(np.asarray(latitude, dtype=float))
+    lon = np.radians(np.asarray(longitude, dtype=float))
+    dlat = lat[:, None] - lat[None, :]
+    dlon = lon[:, None] - lon[None, :]
+    a = np.sin(dlat / 2) ** 2 + np.cos(lat)[:, None] * np.cos(lat)[None, :] * np.sin(dlon / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+
+def path_length(distances: np.ndarray, order: np.ndarray) -> float:
+    """Length of the open path visiting ``order``; the day starts and ends wherever its jobs do"""
+    return float(distances[order[:-1], order[1:]].sum())
+
+
+def nearest_neighbour(distances: np.ndarray, start: int = 0) -> np.ndarray:
+    n = len(distances)
+    order = np.empty(n, dtype=np.int64)
+    visited = np.zeros(n, dtype=bool)
+    current = start
+    for position in range(n):
+        order[position] = current
+        visited[current] = True
+        if position < n - 1:
+            current = int(np.where(visited, np.inf, distances[current]).argmin())
+    return order
+
+
+def two_opt(distances: np.ndarray, order: np.ndarray) -> np.ndarray:
+    """Reverse segments of an open path while that shortens it.
+
+    Reversing order[i:j + 1] swaps the edges into i and out of j; the path's
+    two ends have no edge beyond them. Every j for a given i is scored at
+    once, and the best improvement is taken until none is left.
+    """
+    order = order.copy()
+    n = len(order)
+    if n < 3:
+        return order
+    improved = True
+    while improved:
+        improved = False
+        for i in range(n - 1):
+            j = np.arange(i + 1, n)
+            before = distances[order[i - 1], order[i]] if i > 0 else 0.0
+            after = np.zeros(len(j))
+            has_next = j < n - 1
+            after[has_next] = distances[order[j[has_next]], order[j[has_next] + 1]]
+            new_before = distances[order[i - 1], order[j]] if i > 0 else np.zeros(len(j))
+            new_after = np.zeros(len(j))
+            new_after[has_next] = distances[order[i], order[j[has_next] + 1]]
+            gain = before + after - new_before - new_after
+            best = int(gain.argmax())
+            if gain[best] > 1e-9:
+                order[i:j[best] + 1] = order[i:j[best] + 1][::-1]
+                improved = True
+    return order
+
+
+def sequence_route(latitude: np.ndarray, longitude: np.ndarray) -> np.ndarray:
+    """Visiting order of the points that keeps travel short: the best
+    nearest-neighbour path, improved with 2-opt."""
+    n = len(latitude)
+    if n < 3:
+        return np.arange(n)
+    distances = haversine_matrix(latitude, longitude)
+    best, best_length = None, np.inf
+    for start in range(n if n <= MULTI_START_MAX else 1):
+        order = two_opt(distances, nearest_neighbour(distances, start))
+        length = path_length(distances, order)
+        if length < best_length - 1e-9:
+            best, best_length = order, length
+    # A path reads the same both ways; start at whichever end was booked first
+    return best if best[0] <= best[-1] else best[::-1]
+
+
+def _sequence_batch(routes: List[tuple]) -> List[np.ndarray]:
+    # Runs in a worker process: plain arrays in, plain arrays out
+    return [sequence_route(latitude, longitude) for latitude, longitude in routes]
+
+
+def sequence_routes(routes: List[tuple], workers: int = WORKERS) -> List[np.ndarray]:
+    """sequence_route for each (latitude, longitude) pair, across a process pool when there are enough"""
+    if workers <= 1 or len(routes) < PARALLEL_MIN_ROUTES:
+        return _sequence_batch(routes)
+    # A few batches per process, so a slow batch does not hold up the rest
+    size = -(-len(routes) // (workers * 4))
+    batches = [routes[i:i + size] for i in range(0, len(routes), size)]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return [order for orders in pool.map(_sequence_batch, batches) for order in orders]
+
+
+def sequence_week(db, week_start: date, workers: int = WORKERS, today: Optional[date] = None) -> SequencingResult:
+    """Reorder each cleaner's scheduled jobs, day by day, to minimise travel.
+
+    Jobs swap time slots: the day's start times stay the same and each is
+    given to the next job on the shortest path found between the clients'
+    coordinates. Days before ``today`` are left alone, and so are jobs
+    whose client has no coordinates. Changed jobs are updated in bulk, in
+    one commit.
+    """
+    start = datetime.combine(max(week_start, today or date.today()), time.min)
+    end = datetime.combine(week_start, time.min) + timedelta(days=7)
+    result = db.execute(
+        select(Job.id, Job.cleaner_id, Job.start_at, Job.end_at, Client.latitude, Client.longitude)
+        .join(Job.client)
+        .where(Job.start_at >= start, Job.start_at < end, Job.cleaner_id.is_not(None),
+               Job.status == "Scheduled")
+    )
+    jobs = pd.DataFrame(result.all(), columns=list(result.keys()))
+    outcome = SequencingResult()
+    if jobs.empty:
+        return outcome
+
+    located = jobs["latitude"].notna() & jobs["longitude"].notna()
+    outcome.unlocated = int((~located).sum())
+    jobs = jobs[located].sort_values(["cleaner_id", "start_at", "id"], ignore_index=True)
+    days = jobs.groupby([jobs["cleaner_id"], jobs["start_at"].dt.normalize()], sort=False).indices
+    groups = [positions for positions in days.values() if len(positions) >= 3]
+    if not groups:
+        return outcome
+
+    latitude, longitude = jobs["latitude"].to_numpy(), jobs["longitude"].to_numpy()
+    orders = sequence_routes([(latitude[g], longitude[g]) for g in groups], workers)
+
+    starts = list(jobs["start_at"].dt.to_pydatetime())
+    ends = jobs["end_at"].fillna(jobs["start_at"] + pd.Timedelta(hours=JOB_HOURS))
+    lengths = list((ends - jobs["start_at"]).dt.to_pytimedelta())
+    ids = jobs["id"].to_numpy()
+    changes = []
+    for positions, order in zip(groups, orders):
+        distances = haversine_matrix(latitude[positions], longitude[positions])
+        outcome.km_before += path_length(distances, np.arange(len(positions)))
+        outcome.km_after += path_length(distances, order)
+        # positions are in start order, so slot k goes to the k-th job on the path
+        for slot, job in zip(positions, positions[order]):
+            if starts[job] != starts[slot]:
+                new_start = starts[slot]
+                changes.append({"id": int(ids[job]), "date": new_start, "time": new_start.strftime("%H:%M"),
+                                "start_at": new_start, "end_at": new_start + lengths[job]})
+    outcome.routes = len(groups)
+    outcome.jobs_moved = len(changes)
+    if changes:
+        db.execute(update(Job), changes)
+        db.commit()
+    return outcome
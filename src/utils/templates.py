@@ -0,0 +1,191 @@
+import os
+import re
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Tuple
+
+import numpy as np
+import pandas as pd
+
+# {Column Name} is replaced by that CSV column; {{ and }} are literal braces
+PLACEHOLDER = re.compile(r"\{\{|\}\}|\{([^{}]+)\}")
+
+# GSM 03.38 default alphabet (one septet each) and its extension table,
+# whose characters take an escape septet plus their own
+GSM_BASIC = ("@£$¥èéùìòÇ\nØø\rÅåΔ_ΦΓΛΩΠΨΣΘΞÆæßÉ !\"#¤%&'()*+,-./0123456789:;<=>?"
+             "¡ABCDEFGHIJKLMNOPQRSTUVWXYZÄÖÑÜ§¿abcdefghijklmnopqrstuvwxyzäöñüà")
+GSM_EXTENDED = "^{}\\[~]|€\f"
+GSM_PATTERN = "[" + re.escape(GSM_BASIC + GSM_EXTENDED) + "]*"
+GSM_EXTENDED_PATTERN = "[" + re.escape(GSM_EXTENDED) + "]"
+# Characters outside the BMP take two UTF-16 code units in a UCS-2 message
+ASTRAL_PATTERN = "[\U00010000-\U0010FFFF]"
+
+# (single-part limit, per-part limit once concatenated), in septets / code units
+SEGMENT_LIMITS = {"GSM-7": (160, 153), "UCS-2": (70, 67)}
+
+# Price per outbound segment, used for campaign estimates
+SEGMENT_PRICE = float(os.getenv("SMS_SEGMENT_PRICE", "0.0515"))
+
+
+@dataclass(frozen=True)
+class CompiledTemplate:
+    """A template split into literal text around its placeholders.
+
+    ``literals`` always has one more entry than ``fields``: the message is
+    literals[0] + value of fields[0] + literals[1] + ...
+    """
+    literals: Tuple[str, ...]
+    fields: Tuple[str, ...]
+
+    def missing_columns(self, columns) -> list:
+        return sorted(set(self.fields) - set(columns))
+
+    def render(self, values) -> str:
+        """Render one message from a mapping (or DataFrame row) of column values"""
+        parts = [self.literals[0]]
+        for field, literal in zip(self.fields, self.literals[1:]):
+            parts.append(str(values[field]))
+            parts.append(literal)
+        return "".join(parts)
+
+    def render_frame(self, recipients: pd.DataFrame) -> pd.Series:
+        """Render a message for every row of recipients in one pass per placeholder"""
+        self._check_columns(recipients)
+        messages = pd.Series(self.literals[0], index=recipients.index, dtype=object)
+        for field, literal in zip(self.fields, self.literals[1:]):
+            messages = messages + _as_text(recipients[field]) + literal
+        return messages
+
+    def _check_columns(self, recipients):
+        missing = self.missing_columns(recipients.columns)
+        if missing:
+            raise ValueError(f"Template uses columns missing from the CSV: {', '.join(missing)}")
+
+
+def compile_template(content: str) -> CompiledTemplate:
+    literals, fields, current = [], [], []
+    position = 0
+    for match in PLACEHOLDER.finditer(content):
+        current.append(content[position:match.start()])
+        token = match.group(0)
+        if token in ("{{", "}}"):
+            current.append(token[0])
+        else:
+            literals.append("".join(current))
+            fields.append(match.group(1).strip())
+            current = []
+        position = match.end()
+    current.append(content[position:])
+    literals.append("".join(current))
+    return CompiledTemplate(tuple(literals), tuple(fields))
+
+
+class TemplateCache:
+    """Compiled MessageTemplates keyed by (id, updated_at), least recently used evicted first.
+
+    Editing a template changes its updated_at, so a stale compilation is
+    never returned.
+    """
+
+    def __init__(self, maxsize: int = 256):
+        self.maxsize = maxsize
+        self._compiled = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, template) -> CompiledTemplate:
+        key = (template.id, template.updated_at)
+        with self._lock:
+            compiled = self._compiled.get(key)
+            if compiled is not None:
+                self._compiled.move_to_end(key)
+                return compiled
+        compiled = compile_template(template.content or "")
+        with self._lock:
+            self._compiled[key] = compiled
+            while len(self._compiled) > self.maxsize:
+                self._compiled.popitem(last=False)
+        return compiled
+
+
+templates = TemplateCache()
+
+
+def _as_text(values: pd.Series) -> pd.Series:
+    return values.fillna("").astype(str)
+
+
+def _measure(texts: pd.Series):
+    """GSM-7 mask, septet count and UTF-16 length of each text"""
+    lengths = texts.str.len().to_numpy(dtype=np.int64)
+    gsm = texts.str.fullmatch(GSM_PATTERN).to_numpy(dtype=bool)
+    septets = lengths + texts.str.count(GSM_EXTENDED_PATTERN).to_numpy(dtype=np.int64)
+    units = lengths + texts.str.count(ASTRAL_PATTERN).to_numpy(dtype=np.int64)
+    return gsm, septets, units
+
+
+def _segments(gsm, septets, units, index) -> pd.DataFrame:
+    length = np.where(gsm, septets, units)
+    single = np.where(gsm, SEGMENT_LIMITS["GSM-7"][0], SEGMENT_LIMITS["UCS-2"][0])
+    per_part = np.where(gsm, SEGMENT_LIMITS["GSM-7"][1], SEGMENT_LIMITS["UCS-2"][1])
+    segments = np.where(length <= single, 1, -(-length // per_part))
+    return pd.DataFrame({
+        "Encoding": np.where(gsm, "GSM-7", "UCS-2"),
+        "Length": length,
+        "Segments": segments,
+    }, index=index)
+
+
+def text_segments(texts: pd.Series) -> pd.DataFrame:
+    """Encoding, length (septets or UTF-16 units) and segment count of each message"""
+    texts = _as_text(texts)
+    return _segments(*_measure(texts), texts.index)
+
+
+def message_segments(compiled: CompiledTemplate, recipients: pd.DataFrame) -> pd.DataFrame:
+    """Same as text_segments(compiled.render_frame(recipients)) without rendering.
+
+    A message is GSM-7 only if its literal text and every substituted value
+    are, and its length is the sum of theirs, so each column is measured once
+    and the results added up.
+    """
+    compiled._check_columns(recipients)
+    literal_gsm, literal_septets, literal_units = _measure(pd.Series(["".join(compiled.literals)]))
+    rows = len(recipients)
+    gsm = np.full(rows, literal_gsm[0])
+    septets = np.full(rows, literal_septets[0], dtype=np.int64)
+    units = np.full(rows, literal_units[0], dtype=np.int64)
+    measured = {}
+    for field in compiled.fields:
+        if field not in measured:
+            measured[field] = _measure(_as_text(recipients[field]))
+        field_gsm, field_septets, field_units = measured[field]
+        gsm &= field_gsm
+        septets += field_septets
+        units += field_units
+    return _segments(gsm, septets, units, recipients.index)
+
+
+@dataclass
+class CampaignEstimate:
+    messages: int = 0
+    segments: int = 0
+    unicode_messages: int = 0
+    max_segments: int = 0
+    cost: float = 0.0
+
+
+def estimate_campaign(compiled: CompiledTemplate, recipients: pd.DataFrame,
+                      price: float = SEGMENT_PRICE) -> CampaignEstimate:
+    """Total segments and cost of sending compiled to every recipient"""
+    if recipients.empty:
+        return CampaignEstimate()
+    segments = message_segments(compiled, recipients)
+    total = int(segments["Segments"].sum())
+    return CampaignEstimate(
+        messages=len(segments),
+        segments=total,
+        unicode_messages=int((segments["Encoding"] == "UCS-2").sum()),
+        max_segments=int(segments["Segments"].max()),
+        cost=round(total * price, 2),
+    )
@@ -0,0 +1,177 @@
+"""Background worker processes for the cleaning business system.
+
+Run from the project root, e.g.:
+
+    python src/worker.py scheduler
+    python src/worker.py materialize
+    python src/worker.py archive
+    python src/worker.py overdue
+    python src/worker.py geocode
+    python src/worker.py sequence
+"""
+import argparse
+import logging
+import os
+import signal
+import sys
+
+# Add the src directory to Python path
+src_dir = os.path.dirname(os.path.abspath(__file__))
+if src_dir not in sys.path:
+    sys.path.append(src_dir)
+
+
+def run_scheduler(args):
+    from models.base import SessionLocal
+    from utils.dispatch import BulkDispatcher
+    from utils.messaging import get_message_service
+    from utils.scheduler import ScheduledMessageWorker
+
+    service = get_message_service()
+    worker = ScheduledMessageWorker(
+        SessionLocal,
+        service,
+        batch_size=args.batch_size,
+        poll_interval=args.poll_interval,
+        dispatcher=BulkDispatcher(service, workers=args.workers),
+    )
+    signal.signal(signal.SIGTERM, lambda *_: worker.stop())
+    signal.signal(signal.SIGINT, lambda *_: worker.stop())
+    if args.once:
+        worker.run_once()
+    else:
+        worker.run_forever()
+
+
+def run_materializer(args):
+    from models.base import SessionLocal
+    from utils.materializer import materialize_jobs
+
+    db = SessionLocal()
+    try:
+        result = materialize_jobs(db, horizon_weeks=args.horizon_weeks)
+    finally:
+        db.close()
+    print(f"Created {result.created} recurring jobs for {result.clients} clients "
+          f"({result.removed} removed after frequency changes)")
+
+
+def run_archiver(args):
+    from sqlalchemy import text
+    from models.base import SessionLocal, engine
+    from utils.retention import ARCHIVE_FORMAT, archive_message_history
+
+    db = SessionLocal()
+    try:
+        result = archive_message_history(db, older_than_days=args.older_than_days,
+                                         archive_dir=args.archive_dir, fmt=args.format or ARCHIVE_FORMAT,
+                                         batch_size=args.batch_size)
+    finally:
+        db.close()
+    print(f"Archived {result.archived} messages created before {result.cutoff:%Y-%m-%d} "
+          f"into {result.files} files across {result.partitions} days")
+
+    if args.vacuum and result.archived and engine.dialect.name == "sqlite":
+        # Deleted rows leave free pages behind; VACUUM returns them to the filesystem
+        with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+            conn.execute(text("VACUUM"))
+
+
+def run_overdue_sweep(args):
+    from models.base import SessionLocal
+    from utils.overdue import sweep_overdue
+
+    db = SessionLocal()
+    try:
+        result = sweep_overdue(db, terms_days=args.terms_days, batch_size=args.batch_size,
+                               send_reminders=not args.no_reminders)
+    finally:
+        db.close()
+    print(f"Marked {result.overdue} invoices raised before {result.cutoff:%Y-%m-%d} overdue and queued "
+          f"{result.reminders} reminders ({result.no_phone} clients without a valid number)")
+
+
+def run_geocoder(args):
+    from models.base import SessionLocal
+    from utils.geocoding import geocode_clients, load_centroids
+
+    try:
+        centroids = load_centroids(args.file)
+    except ValueError as e:
+        sys.exit(str(e))
+    db = SessionLocal()
+    try:
+        result = geocode_clients(db, centroids, overwrite=args.all)
+    finally:
+        db.close()
+    print(f"Located {result.located} of {result.clients} clients ({result.no_postcode} without a postcode, "
+          f"{result.unknown_postcode} with a postcode not in the file)")
+
+
+def run_sequencer(args):
+    from datetime import date, timedelta
+    from models.base import SessionLocal
+    from utils.roster import next_week_start
+    from utils.sequencing import sequence_week
+
+    week_start = date.fromisoformat(args.week) if args.week else next_week_start()
+    week_start -= timedelta(days=week_start.weekday())
+    db = SessionLocal()
+    try:
+        result = sequence_week(db, week_start, workers=args.workers)
+    finally:
+        db.close()
+    print(f"Reordered {result.jobs_moved} jobs across {result.routes} cleaner-days of the week of "
+          f"{week_start:%Y-%m-%d}: {result.km_before:,.1f} km -> {result.km_after:,.1f} km "
+          f"({result.unlocated} jobs without client coordinates left as they were)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Cleaning business background workers")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    scheduler = commands.add_parser("scheduler", help="Deliver scheduled messages as they fall due")
+    scheduler.add_argument("--batch-size", type=int, default=500)
+    scheduler.add_argument("--poll-interval", type=float, default=30.0,
+                           help="Maximum seconds to sleep between checks")
+    scheduler.add_argument("--workers", type=int, default=int(os.getenv("SMS_DISPATCH_WORKERS", "8")))
+    scheduler.add_argument("--once", action="store_true", help="Send one batch and exit")
+    scheduler.set_defaults(func=run_scheduler)
+
+    materialize = commands.add_parser("materialize", help="Generate upcoming recurring jobs for each client")
+    materialize.add_argument("--horizon-weeks", type=int, default=int(os.getenv("JOB_HORIZON_WEEKS", "12")))
+    materialize.set_defaults(func=run_materializer)
+
+    archive = commands.add_parser("archive", help="Move old message history into compressed archive files")
+    archive.add_argument("--older-than-days", type=int, default=int(os.getenv("MESSAGE_RETENTION_DAYS", "180")))
+    archive.add_argument("--archive-dir", default=os.getenv("MESSAGE_ARCHIVE_DIR", "archive/message_history"))
+    archive.add_argument("--format", choices=["parquet", "csv.gz"],
+                         help="Default: MESSAGE_ARCHIVE_FORMAT, else parquet if pyarrow is installed")
+    archive.add_argument("--batch-size", type=int, default=5000)
+    archive.add_argument("--vacuum", action="store_true", help="Shrink the SQLite file afterwards")
+    archive.set_defaults(func=run_archiver)
+
+    overdue = commands.add_parser("overdue", help="Mark newly overdue invoices and queue payment reminders")
+    overdue.add_argument("--terms-days", type=int, default=int(os.getenv("INVOICE_PAYMENT_TERMS_DAYS", "14")))
+    overdue.add_argument("--batch-size", type=int, default=1000)
+    overdue.add_argument("--no-reminders", action="store_true", help="Only update invoice statuses")
+    overdue.set_defaults(func=run_overdue_sweep)
+
+    geocode = commands.add_parser("geocode", help="Locate clients from the postcode in their address")
+    geocode.add_argument("--file", default="", help="Postcode centroid CSV; default: POSTCODE_CENTROIDS_FILE")
+    geocode.add_argument("--all", action="store_true", help="Also relocate clients that already have coordinates")
+    geocode.set_defaults(func=run_geocoder)
+
+    sequence = commands.add_parser("sequence", help="Order each cleaner's jobs per day to minimise travel")
+    sequence.add_argument("--week", help="Any date in the week (YYYY-MM-DD); default: next week")
+    sequence.add_argument("--workers", type=int, default=int(os.getenv("SEQUENCING_WORKERS", "0")) or os.cpu_count())
+    sequence.set_defaults(func=run_sequencer)
+
+    args = parser.parse_args()
+    logging.basicConfig(level=os.getenv("LOG_LEVEL", "INFO"),
+                        format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()